@@ -1,65 +1,195 @@
-from prefect import flow, task
-import random
+"""Nightly preparation of the review documents as a Prefect flow.
+
+The flow refreshes the S3 inventory, fingerprints every batch and writes
+the outputs the app reads: ``data/inventory.csv``, ``data/fingerprints.csv``,
+a catalog snapshot and one manifest per batch in ``data/manifests/``.
+
+Batches are processed concurrently, and each batch task is cached by the
+hash of its inputs (the keys and ETags of its documents), so batches that
+did not change since the last run are skipped. A batch whose manifest is
+missing or lists failed documents is always run again. Documents that
+cannot be fingerprinted are listed in their batch manifest, batches that
+fail as a whole in the flow report, and neither stops the run; their
+previous fingerprints are kept. Without ``PREFECT_API_URL``
+the flow runs against Prefect's local ephemeral API; no server is needed:
+
+    python my_flow.py
+"""
+
+import json
+import os
+import re
+import sys
 import time
+from datetime import timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent / 'src'))
 
-# Simulate data extraction from different sources
-@task
-def extract_data_source_a():
-    time.sleep(1)
-    return {"source": "A", "data": [random.randint(0, 100) for _ in range(5)]}
+from prefect import flow, get_run_logger, task, unmapped
+from prefect.task_runners import ConcurrentTaskRunner
+from prefect.tasks import task_input_hash
 
-@task
-def extract_data_source_b():
-    time.sleep(1)
-    return {"source": "B", "data": [random.randint(0, 100) for _ in range(5)]}
+from catalog import (CATALOG_SNAPSHOT_PATH, DOC_TYPES, INVENTORY_PATH, MANUAL_REVIEW_PATH,
+                     write_catalog_snapshot)
+from fingerprints import FINGERPRINTS_PATH, classify_pair, fingerprint_object, read_fingerprints, write_fingerprints
+from inventory import read_inventory, sync_inventory
+from utils import generate_comparison_pairs
 
-# Simulate data transformation
-@task
-def transform_data(data):
-    time.sleep(1)
-    transformed = [x * 2 for x in data["data"]]
-    return {"source": data["source"], "data": transformed}
+MANIFEST_DIR = "data/manifests"
+FLOW_REPORT_PATH = "data/flow_report.json"
+# Cached batch results are reused for this long while their inputs match
+BATCH_CACHE_EXPIRATION = timedelta(days=30)
 
-# Simulate data loading
-@task
-def load_data(data):
-    time.sleep(1)
-    print(f"Loaded data from source {data['source']}: {data['data']}")
-    return True
+_DOCUMENT_KEY_RE = re.compile(rf"^(?:{'|'.join(DOC_TYPES)})/(?P<batch>[^/]+)/(?P=batch)_\d+\.pdf$")
 
-# Simulate report generation
-@task
-def generate_report():
-    time.sleep(1)
-    print("Report generated.")
-    return "report.pdf"
 
-# Simulate sending notification
+@task(retries=2, retry_delay_seconds=30)
+def refresh_inventory(inventory_path):
+    """List the key ranges of the S3 documents in parallel into the inventory."""
+    start = time.perf_counter()
+    summary = sync_inventory(inventory_path)
+    return {'summary': summary, 'seconds': time.perf_counter() - start}
+
+def _manifest_path(manifest_dir, batch):
+    return os.path.join(manifest_dir, f"{batch}.json")
+
+def batch_cache_key(context, parameters):
+    """Cache a batch by its inputs, but only while its manifest exists and is complete."""
+    try:
+        with open(_manifest_path(parameters['manifest_dir'], parameters['batch']), 'r') as f:
+            complete = not json.load(f).get('failed')
+    except (OSError, ValueError):
+        complete = False
+    # None disables the cache for this run, so the manifest is written again
+    return task_input_hash(context, parameters) if complete else None
+
+@task(cache_key_fn=batch_cache_key, cache_expiration=BATCH_CACHE_EXPIRATION, persist_result=True,
+      retries=2, retry_delay_seconds=30)
+def prepare_batch(batch, objects, manifest_dir):
+    """Fingerprint one batch's documents and write its manifest.
+
+    A document that cannot be fingerprinted is listed under ``failed`` in
+    the manifest and left out of the pairs; the other documents are still
+    prepared.
+
+    Args:
+        batch (str): Batch id
+        objects (list): ``key``, ``etag`` and ``size`` of each of its PDFs
+        manifest_dir (str): Directory for the batch manifest
+
+    Returns:
+        dict: ``batch``, ``fingerprints`` (rows for the fingerprint file),
+        ``failed`` (keys and errors) and ``seconds``
+    """
+    start = time.perf_counter()
+    fingerprints, failed = [], []
+    for obj in objects:
+        try:
+            fingerprints.append(fingerprint_object(obj['key']))
+        except Exception as e:
+            get_run_logger().warning(f"Fingerprinting {obj['key']} failed: {e}")
+            failed.append({'key': obj['key'], 'error': str(e)})
+    by_key = {row['key']: row for row in fingerprints}
+
+    documents = {}
+    for row in fingerprints:
+        doc_type, _, filename = row['key'].split('/')
+        version = int(filename.rsplit('_', 1)[1].split('.')[0])
+        documents.setdefault(doc_type, {})[version] = row['key']
+
+    pairs = []
+    for doc_type, versions in sorted(documents.items()):
+        for v1, v2 in generate_comparison_pairs(sorted(versions)):
+            pairs.append({
+                'type': doc_type, 'v1': v1, 'v2': v2,
+                'label': classify_pair(by_key[versions[v1]], by_key[versions[v2]]),
+            })
+
+    os.makedirs(manifest_dir, exist_ok=True)
+    path = _manifest_path(manifest_dir, batch)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump({'batch': batch, 'documents': fingerprints, 'pairs': pairs, 'failed': failed}, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+    return {'batch': batch, 'fingerprints': fingerprints, 'failed': failed, 'seconds': time.perf_counter() - start}
+
 @task
-def send_notification(report):
-    time.sleep(1)
-    print(f"Notification sent with report: {report}")
-    return True
+def write_outputs(results, failed_keys, review_path, inventory_path, fingerprints_path, snapshot_path):
+    """Write the fingerprint file and the catalog snapshot for the app.
+
+    Documents in ``failed_keys`` keep the fingerprints of the previous run.
+    """
+    start = time.perf_counter()
+    rows = [row for result in results for row in result['fingerprints']]
+    if failed_keys:
+        previous = read_fingerprints(fingerprints_path)
+        rows.extend(previous[previous['key'].isin(set(failed_keys))].to_dict('records'))
+    write_fingerprints(sorted(rows, key=lambda row: row['key']), fingerprints_path)
+    catalog = write_catalog_snapshot(review_path, inventory_path, snapshot_path)
+    return {'documents': len(catalog), 'seconds': time.perf_counter() - start}
+
+def batch_inputs(inventory_path):
+    """Group the inventory's PDFs by batch as ``prepare_batch`` inputs."""
+    inventory = read_inventory(inventory_path).sort_values('key')
+    batches = {}
+    for obj in inventory[['key', 'etag', 'size']].astype(str).to_dict('records'):
+        match = _DOCUMENT_KEY_RE.match(obj['key'])
+        if match:
+            batches.setdefault(match.group('batch'), []).append(obj)
+    return batches
 
-@flow
-def complex_data_pipeline():
-    # Extraction
-    data_a = extract_data_source_a()
-    data_b = extract_data_source_b()
+@flow(name="prepare-review-documents", task_runner=ConcurrentTaskRunner())
+def prepare_review_documents(review_path=MANUAL_REVIEW_PATH, inventory_path=INVENTORY_PATH,
+                             fingerprints_path=FINGERPRINTS_PATH, snapshot_path=CATALOG_SNAPSHOT_PATH,
+                             manifest_dir=MANIFEST_DIR, report_path=FLOW_REPORT_PATH):
+    """Refresh the inventory and prepare every batch for review."""
+    logger = get_run_logger()
+    report = {'stages': {}}
 
-    # Transformation
-    transformed_a = transform_data(data_a)
-    transformed_b = transform_data(data_b)
+    stage_start = time.perf_counter()
+    inventory = refresh_inventory(inventory_path)
+    report['stages']['inventory'] = {'tasks': 1, 'cached': 0, 'task_seconds': inventory['seconds'],
+                                     'wall_seconds': time.perf_counter() - stage_start}
 
-    # Loading
-    load_result_a = load_data(transformed_a)
-    load_result_b = load_data(transformed_b)
+    stage_start = time.perf_counter()
+    batches = batch_inputs(inventory_path)
+    futures = prepare_batch.map(list(batches), list(batches.values()), unmapped(manifest_dir))
+    results, cached, task_seconds, slowest = [], 0, 0.0, []
+    failed_batches, failed_keys = [], []
+    for batch, future in zip(batches, futures):
+        state = future.wait()
+        # A failed batch is reported and its documents keep their previous fingerprints
+        result = state.result(raise_on_failure=False)
+        if state.is_failed():
+            logger.warning(f"Batch {batch} failed: {result}")
+            failed_batches.append({'batch': batch, 'error': str(result)})
+            failed_keys.extend(obj['key'] for obj in batches[batch])
+            continue
+        results.append(result)
+        failed_keys.extend(entry['key'] for entry in result.get('failed', []))
+        if state.name == 'Cached':
+            cached += 1
+        else:
+            task_seconds += result['seconds']
+            slowest.append((result['seconds'], result['batch']))
+    report['stages']['batches'] = {
+        'tasks': len(futures), 'cached': cached, 'task_seconds': task_seconds,
+        'wall_seconds': time.perf_counter() - stage_start,
+        'slowest': [{'batch': batch, 'seconds': seconds} for seconds, batch in sorted(slowest)[-5:][::-1]],
+        'failed_batches': failed_batches,
+        'failed_documents': len(failed_keys),
+    }
 
-    # Reporting
-    report = generate_report()
+    stage_start = time.perf_counter()
+    outputs = write_outputs(results, failed_keys, review_path, inventory_path, fingerprints_path, snapshot_path)
+    report['stages']['outputs'] = {'tasks': 1, 'cached': 0, 'task_seconds': outputs['seconds'],
+                                   'wall_seconds': time.perf_counter() - stage_start}
 
-    # Notification
-    send_notification(report)
+    for name, stage in report['stages'].items():
+        logger.info(f"{name}: {stage['tasks']} tasks ({stage['cached']} cached), "
+                    f"{stage['task_seconds']:.1f}s task time, {stage['wall_seconds']:.1f}s wall")
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
 
 if __name__ == "__main__":
-    complex_data_pipeline()
+    prepare_review_documents()
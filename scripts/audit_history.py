@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Query, compact or back-fill the partitioned audit history in S3.
+
+    python scripts/audit_history.py query --batch BATCH0008145
+    python scripts/audit_history.py compact
+    python scripts/audit_history.py import-legacy
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from audit import audit_trail_csv, compact_audit_history, import_legacy_audit, query_audit
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    """Run the chosen command."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    query = commands.add_parser('query', help='Print matching entries as CSV, newest first')
+    query.add_argument('--batch')
+    query.add_argument('--doc-type')
+    query.add_argument('--since', help='Entries at or after this timestamp, e.g. 2024-05-01')
+    query.add_argument('--until', help='Entries before this timestamp')
+    query.add_argument('--limit', type=int)
+    commands.add_parser('compact', help='Merge the small files of every partition')
+    commands.add_parser('import-legacy', help='Copy the daily audit_trail CSVs into the history')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'query':
+        rows = query_audit(args.batch, args.doc_type, args.since, args.until, args.limit)
+        sys.stdout.write(audit_trail_csv(rows))
+        logging.info(f"{len(rows)} entries in {(time.perf_counter() - start) * 1000:.0f} ms")
+    elif args.command == 'compact':
+        merged = compact_audit_history()
+        logging.info(f"Merged {merged} files in {time.perf_counter() - start:.1f}s")
+    else:
+        imported = import_legacy_audit()
+        logging.info(f"Imported {imported} entries in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
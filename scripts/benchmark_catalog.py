@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Benchmark catalog construction at several source sizes.
+
+With ``--memory``, report the memory of the compact catalog against the
+expanded layout it replaced, and the size and load time of its Parquet
+snapshot against a CSV of the expanded layout.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from catalog import build_catalog, expand_catalog, read_catalog_snapshot
+
+def synthetic_batches(rows, versions_per_batch=5):
+    """Create a Manual_Review-style frame with ``rows`` rows."""
+    index = np.arange(rows)
+    batch_ids = 8000000 + index // versions_per_batch
+    return pd.DataFrame({
+        'Batch': pd.Series(batch_ids).map('BATCH{:07d}'.format),
+        'batch_count': index % versions_per_batch + 1,
+        'portal_status': pd.Series(index % 4).map({0: 'Pending', 1: 'Accepted', 2: 'Rejected', 3: 'In Review'}),
+        'reason': pd.Series(index).map('Reason {}'.format),
+    })
+
+def best_time(function, repeat):
+    """Return the fastest of ``repeat`` calls to ``function`` in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def memory_report(sizes, repeat):
+    """Compare memory, file size and load time of both catalog layouts."""
+    print(f"{'rows':>10} {'expanded MB':>12} {'compact MB':>11} {'ratio':>6} "
+          f"{'CSV MB':>7} {'Parquet MB':>11} {'CSV load (s)':>13} {'Parquet load (s)':>17} {'pruned (s)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, parquet_path = os.path.join(tmp, 'catalog.csv'), os.path.join(tmp, 'catalog.parquet')
+        for size in sizes:
+            compact = build_catalog(synthetic_batches(size))
+            expanded = expand_catalog(compact)
+            expanded_mb = expanded.memory_usage(deep=True).sum() / 1e6
+            compact_mb = compact.memory_usage(deep=True).sum() / 1e6
+            expanded.to_csv(csv_path, index=False)
+            compact.to_parquet(parquet_path, index=False)
+            csv_load = best_time(lambda: pd.read_csv(csv_path, keep_default_na=False), repeat)
+            parquet_load = best_time(lambda: read_catalog_snapshot(parquet_path), repeat)
+            pruned_load = best_time(lambda: read_catalog_snapshot(parquet_path, ['batch', 'version']), repeat)
+            print(f"{size:>10} {expanded_mb:>12.1f} {compact_mb:>11.1f} {expanded_mb / compact_mb:>5.1f}x "
+                  f"{os.path.getsize(csv_path) / 1e6:>7.1f} {os.path.getsize(parquet_path) / 1e6:>11.1f} "
+                  f"{csv_load:>13.3f} {parquet_load:>17.3f} {pruned_load:>11.3f}")
+
+def main():
+    """Time build_catalog for each requested size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--memory', action='store_true', help='Report memory and snapshot sizes instead')
+    args = parser.parse_args()
+
+    if args.memory:
+        memory_report(args.sizes, args.repeat)
+        return
+
+    print(f"{'rows':>10} {'catalog rows':>13} {'best (s)':>10} {'rows/s':>12}")
+    for size in args.sizes:
+        df_batches = synthetic_batches(size)
+        best = best_time(lambda: build_catalog(df_batches), args.repeat)
+        print(f"{size:>10} {2 * size:>13} {best:>10.3f} {size / best:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Benchmark time-to-first-render of the app for a cold process and a warm rerun."""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+APP_PATH = ROOT / 'src' / 'app.py'
+
+def measure_in_process(reruns):
+    """Render the app in this (fresh) process, then rerun it.
+
+    Returns:
+        dict: ``first_render`` and median ``warm_rerun`` seconds, the
+        seconds from process start to the first render and the number of
+        exceptions the app rendered
+    """
+    from streamlit.testing.v1 import AppTest
+
+    # ``streamlit run`` puts the script's directory on the path
+    sys.path.insert(0, str(APP_PATH.parent))
+    app = AppTest.from_file(str(APP_PATH), default_timeout=120)
+    start = time.perf_counter()
+    app.run()
+    first_render = time.perf_counter() - start
+    since_spawn = time.time() - float(os.environ.get('BENCHMARK_SPAWNED_AT', time.time()))
+
+    warm = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        warm.append(time.perf_counter() - start)
+    return {
+        'process_to_first_render': since_spawn,
+        'first_render': first_render,
+        'warm_rerun': statistics.median(warm) if warm else None,
+        'exceptions': len(app.exception),
+    }
+
+def main():
+    """Start one fresh interpreter per repeat and report the medians."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3, help='Cold processes to start')
+    parser.add_argument('--reruns', type=int, default=5, help='Warm reruns per process')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_in_process(args.reruns)))
+        return
+
+    results = []
+    print(f"{'run':>4} {'process→render (s)':>19} {'first render (s)':>17} {'warm rerun (s)':>15}")
+    for run in range(1, args.repeat + 1):
+        env = dict(os.environ, BENCHMARK_SPAWNED_AT=repr(time.time()))
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', '--reruns', str(args.reruns)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{run:>4} {result['process_to_first_render']:>19.3f} {result['first_render']:>17.3f} "
+              f"{result['warm_rerun']:>15.3f}")
+        if result['exceptions']:
+            print(f"     warning: the app rendered {result['exceptions']} exception(s)")
+
+    print(f"{'med':>4} {statistics.median(r['process_to_first_render'] for r in results):>19.3f} "
+          f"{statistics.median(r['first_render'] for r in results):>17.3f} "
+          f"{statistics.median(r['warm_rerun'] for r in results):>15.3f}")
+
+if __name__ == "__main__":
+    main()
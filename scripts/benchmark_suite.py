@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the catalog, pairing, export and S3 paths.
+
+All inputs are synthetic and S3 is an in-process moto stand-in, so runs
+are comparable across machines only relative to a baseline from the same
+machine. Results are written as JSON; with ``--baseline`` the run fails
+(exit code 1) when any benchmark's median is slower than the baseline's by
+more than ``--threshold``:
+
+    python scripts/benchmark_suite.py --output baseline.json
+    python scripts/benchmark_suite.py --baseline baseline.json --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT / 'src'))
+
+RESULTS_DIR = ROOT / '.cache' / 'benchmarks'
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.2
+# Each timed sample calls the function until it has run at least this long
+MIN_SAMPLE_SECONDS = 0.05
+SIZES = {
+    'catalog_rows': [1_000, 10_000, 100_000],
+    'versions': [10, 100, 1_000],
+    'audit_rows': [1_000, 10_000, 100_000],
+    'pdf_bytes': [100_000, 1_000_000, 10_000_000],
+}
+QUICK_SIZES = {
+    'catalog_rows': [1_000, 10_000],
+    'versions': [10, 100],
+    'audit_rows': [1_000, 10_000],
+    'pdf_bytes': [100_000, 1_000_000],
+}
+BUCKET = 'benchmark-bucket'
+
+
+def measure(function, repeat=DEFAULT_REPEAT, setup=None):
+    """Time ``function`` and return per-call statistics.
+
+    Fast functions are called several times per sample so that timer
+    resolution does not dominate; ``setup`` runs before every call and is
+    not timed.
+
+    Returns:
+        dict: ``median``, ``min`` and ``max`` seconds per call, ``repeat``
+        and ``number`` (calls per sample)
+    """
+    def sample(number):
+        elapsed = 0.0
+        for _ in range(number):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            function()
+            elapsed += time.perf_counter() - start
+        return elapsed
+
+    number = 1
+    while sample(number) < MIN_SAMPLE_SECONDS and number < 1_000_000:
+        number *= 10
+    samples = [sample(number) / number for _ in range(repeat)]
+    return {'median': statistics.median(samples), 'min': min(samples), 'max': max(samples),
+            'repeat': repeat, 'number': number}
+
+def synthetic_review_rows(rows, versions_per_batch=5):
+    """Create a Manual_Review-style frame with ``rows`` rows."""
+    import pandas as pd
+
+    return pd.DataFrame({
+        'Batch': [f"BATCH{8000000 + n // versions_per_batch:07d}" for n in range(rows)],
+        'batch_count': [n % versions_per_batch + 1 for n in range(rows)],
+        'portal_status': [('Pending', 'Accepted', 'Rejected', 'In Review')[n % 4] for n in range(rows)],
+        'reason': [f"Reason {n % 50}" for n in range(rows)],
+    })
+
+def synthetic_pdf(size, pages=5):
+    """Build a valid ``pages``-page PDF of roughly ``size`` bytes."""
+    padding = max(0, size // pages - 64)
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>',
+               b'<< /Type /Pages /Kids [' + b' '.join(b'%d 0 R' % (3 + 2 * i) for i in range(pages)) +
+               b'] /Count %d >>' % pages]
+    for i in range(pages):
+        content = b'BT /F1 12 Tf 72 720 Td (Page %d) Tj ET\n%% ' % (i + 1) + b'x' * padding
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R >>' % (4 + 2 * i))
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+    body = b'%PDF-1.4\n'
+    for number, obj in enumerate(objects, 1):
+        body += b'%d 0 obj\n' % number + obj + b'\nendobj\n'
+    return body + b'%%EOF\n'
+
+def synthetic_audit_trail(rows):
+    """Create ``rows`` audit entries as the app records them."""
+    return [{'timestamp': f"2024-05-01 10:{n // 60 % 60:02d}:{n % 60:02d}", 'batch': f"BATCH{8000000 + n:07d}",
+             'doc_type': ('CI', 'PL')[n % 2], 'v1_v2': '1-2', 'status': 'reviewed',
+             'notes': 'Checked totals and addresses', 'decision': ('Accept', 'Reject')[n % 3 == 0]}
+            for n in range(rows)]
+
+def bench_catalog(results, sizes, repeat, workdir):
+    """Catalog loading (what ``load_data`` returns) and ``(batch, type)`` lookups."""
+    from catalog import CatalogIndex, build_catalog, invalidate_catalog, load_catalog, write_catalog_snapshot
+
+    for rows in sizes['catalog_rows']:
+        path = os.path.join(workdir, f'review_{rows}.csv')
+        snapshot = os.path.join(workdir, f'catalog_{rows}.parquet')
+        synthetic_review_rows(rows).to_csv(path, index=False)
+        write_catalog_snapshot(path, None, snapshot)
+
+        results[f'load_catalog/csv/{rows}'] = measure(
+            lambda: load_catalog(path, None, None), repeat, setup=invalidate_catalog)
+        results[f'load_catalog/snapshot/{rows}'] = measure(
+            lambda: load_catalog(path, None, snapshot), repeat, setup=invalidate_catalog)
+        results[f'load_catalog/warm/{rows}'] = measure(lambda: load_catalog(path, None, None), repeat)
+
+        catalog = build_catalog(synthetic_review_rows(rows))
+        results[f'catalog_index/build/{rows}'] = measure(lambda: CatalogIndex(catalog), repeat)
+        index = CatalogIndex(catalog)
+        picks = random.Random(rows).choices(index.batches, k=100)
+
+        def index_lookups():
+            for batch in picks:
+                for version in index.versions(batch, 'CI'):
+                    index.row(batch, 'CI', version)
+
+        def frame_filters():
+            for batch in picks:
+                catalog[(catalog['batch'] == batch) & (catalog['type'] == 'CI')]
+
+        results[f'filter/index_100_batches/{rows}'] = measure(index_lookups, repeat)
+        results[f'filter/dataframe_100_batches/{rows}'] = measure(frame_filters, repeat)
+    invalidate_catalog()
+
+def bench_pairs(results, sizes, repeat, workdir):
+    """``generate_comparison_pairs`` over long version lists."""
+    from utils import generate_comparison_pairs
+
+    for count in sizes['versions']:
+        versions = list(range(1, count + 1))
+        results[f'comparison_pairs/{count}'] = measure(lambda: generate_comparison_pairs(versions), repeat)
+
+def bench_audit(results, sizes, repeat, workdir):
+    """CSV serialization and ``export_audit_trail`` of large trails."""
+    from audit import audit_trail_csv
+    from utils import export_audit_trail
+
+    for rows in sizes['audit_rows']:
+        trail = synthetic_audit_trail(rows)
+        results[f'audit_trail_csv/{rows}'] = measure(lambda: audit_trail_csv(trail), repeat)
+        results[f'export_audit_trail/{rows}'] = measure(lambda: export_audit_trail(trail), repeat)
+
+def bench_transfers(results, sizes, repeat, workdir):
+    """``upload_file_to_s3`` and ``download_file_from_s3`` of synthetic PDFs."""
+    from s3_utils import download_file_from_s3, upload_file_to_s3
+
+    for size in sizes['pdf_bytes']:
+        local = os.path.join(workdir, f'upload_{size}.pdf')
+        with open(local, 'wb') as f:
+            f.write(synthetic_pdf(size))
+        key = f'benchmark/{size}.pdf'
+        results[f'upload_file_to_s3/{size}'] = measure(lambda: upload_file_to_s3(local, key), repeat)
+        target = os.path.join(workdir, 'downloads', f'{size}.pdf')
+        results[f'download_file_from_s3/{size}'] = measure(lambda: download_file_from_s3(key, target), repeat)
+
+def _embed_app():
+    """App script that renders one document and records how long it took."""
+    import time
+    import streamlit as st
+    from utils import embed_pdf_base64
+
+    start = time.perf_counter()
+    embed_pdf_base64(st.session_state.bench_key, st.session_state.bench_mode, st.session_state.bench_paged)
+    st.session_state.bench_seconds = time.perf_counter() - start
+
+def bench_embed(results, sizes, repeat, workdir):
+    """``embed_pdf_base64`` in each viewer mode, with a warm document cache.
+
+    The viewer component only works inside a script run, so each call runs
+    in an ``AppTest`` and only the time spent in the function is counted.
+    """
+    from streamlit.testing.v1 import AppTest
+    from s3_utils import get_s3_client, get_full_s3_key
+    from utils import VIEWER_MODE_PRESIGNED, VIEWER_MODE_PROXY
+
+    for size in sizes['pdf_bytes']:
+        key = f'CI/BENCH{size}/BENCH{size}_1.pdf'
+        get_s3_client().put_object(Bucket=BUCKET, Key=get_full_s3_key(key), Body=synthetic_pdf(size))
+        for mode in (VIEWER_MODE_PROXY, VIEWER_MODE_PRESIGNED):
+            for paged in (False, True):
+                app = AppTest.from_function(_embed_app, default_timeout=120)
+                app.session_state['bench_key'] = key
+                app.session_state['bench_mode'] = mode
+                app.session_state['bench_paged'] = paged
+                app.run()
+                samples = []
+                for _ in range(repeat):
+                    app.run()
+                    samples.append(app.session_state['bench_seconds'])
+                name = f"embed_pdf_base64/{mode}{'/paged' if paged else ''}/{size}"
+                results[name] = {'median': statistics.median(samples), 'min': min(samples),
+                                 'max': max(samples), 'repeat': repeat, 'number': 1,
+                                 'exceptions': len(app.exception)}
+
+BENCHMARKS = {
+    'catalog': bench_catalog,
+    'pairs': bench_pairs,
+    'audit': bench_audit,
+    'transfers': bench_transfers,
+    'embed': bench_embed,
+}
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Find benchmarks whose median got slower than the baseline allows.
+
+    Args:
+        current (dict): Results of this run, as written by ``main``
+        baseline (dict): Results of an earlier run
+        threshold (float): Allowed slowdown as a fraction of the baseline
+
+    Returns:
+        list: ``(name, baseline median, current median)`` per regression
+    """
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        before = baseline['results'].get(name)
+        if before and result['median'] > before['median'] * (1 + threshold):
+            regressions.append((name, before['median'], result['median']))
+    return regressions
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _run_against_mock_s3(groups, sizes, repeat):
+    """Run the benchmark groups with S3 replaced by moto."""
+    from moto import mock_aws
+
+    os.environ.update(AWS_ACCESS_KEY_ID='benchmark', AWS_SECRET_ACCESS_KEY='benchmark',
+                      AWS_BUCKET_NAME=BUCKET, AWS_REGION='eu-central-1',
+                      DOC_REVIEW_CACHE_DIR=tempfile.mkdtemp(prefix='benchmark-pdf-cache-'))
+    for name in ('AWS_ENDPOINT_URL', 'AWS_SESSION_TOKEN'):
+        os.environ.pop(name, None)
+    results = {}
+    with mock_aws(), tempfile.TemporaryDirectory() as workdir:
+        from s3_utils import get_s3_client, reset_s3_client
+
+        reset_s3_client()
+        get_s3_client().create_bucket(Bucket=BUCKET,
+                                      CreateBucketConfiguration={'LocationConstraint': 'eu-central-1'})
+        for group in groups:
+            start = time.perf_counter()
+            BENCHMARKS[group](results, sizes, repeat, workdir)
+            print(f"{group}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        reset_s3_client()
+    return results
+
+def main():
+    """Run the selected benchmarks, save the results and check for regressions."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS),
+                        help='Benchmark groups to run')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Timed samples per benchmark')
+    parser.add_argument('--quick', action='store_true', help='Skip the largest input sizes')
+    parser.add_argument('--output', help=f'Results JSON; defaults to a timestamped file in {RESULTS_DIR}')
+    parser.add_argument('--baseline', help='Results JSON of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown of a median over the baseline (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    started = datetime.now()
+    sizes = QUICK_SIZES if args.quick else SIZES
+    report = {
+        'meta': {
+            'started': started.isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+        },
+        'results': _run_against_mock_s3(args.only, sizes, args.repeat),
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{started.strftime('%Y%m%dT%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    print(f"{'benchmark':<48} {'median (ms)':>12} {'min (ms)':>10}")
+    for name, result in sorted(report['results'].items()):
+        print(f"{name:<48} {result['median'] * 1000:>12.3f} {result['min'] * 1000:>10.3f}")
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        regressions = compare_results(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for name, before, now in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.3f} ms -> {now * 1000:.3f} ms "
+                  f"(+{(now / before - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"No benchmark slower than the baseline by more than {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Export every document version and the audit rows of batches as one ZIP.
+
+Batches are chosen by id, by review date, or both. The bundle is streamed
+to an S3 multipart upload (default), a local file or stdout; memory use
+stays bounded however large the bundle is.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from bundle import DEFAULT_PART_SIZE, bundle_entries, export_bundle, write_bundle
+from catalog import load_catalog_index
+from review_store import get_review_store
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    """Select the batches, then stream their bundle to the chosen output."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch', action='append', default=[], help='Batch to export (repeatable)')
+    parser.add_argument('--since', help='Add batches reviewed at or after this date (YYYY-MM-DD)')
+    parser.add_argument('--until', help='Add batches reviewed before this date (YYYY-MM-DD)')
+    parser.add_argument('--output', help="Local ZIP path or '-' for stdout; uploads to S3 if omitted")
+    parser.add_argument('--part-size', type=int, default=DEFAULT_PART_SIZE, help='Multipart part size in bytes')
+    args = parser.parse_args()
+
+    store = get_review_store()
+    batches = list(args.batch)
+    if args.since or args.until:
+        reviewed = store.history(since=args.since, until=args.until)
+        batches += sorted({row['batch'] for row in reviewed} - set(batches))
+    if not batches:
+        parser.error("no batches selected; use --batch, --since or --until")
+    audit_rows = [row for batch in batches for row in store.history(batch=batch, since=args.since, until=args.until)]
+
+    index = load_catalog_index()
+    if args.output is None:
+        key, summary = export_bundle(index, batches, audit_rows, part_size=args.part_size)
+        destination = f"S3 key {key}"
+    elif args.output == '-':
+        summary = write_bundle(sys.stdout.buffer, bundle_entries(index, batches), audit_rows)
+        destination = 'stdout'
+    else:
+        with open(args.output, 'wb') as f:
+            summary = write_bundle(f, bundle_entries(index, batches), audit_rows)
+        destination = args.output
+
+    logging.info(f"Exported {summary['documents']} documents ({summary['bytes'] / 1e6:.1f} MB) "
+                 f"of {len(batches)} batches to {destination}")
+    if summary['missing']:
+        logging.warning(f"{len(summary['missing'])} documents were missing: {', '.join(summary['missing'])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Generate a large synthetic document corpus for load testing.
+
+Creates N batches x M versions x {CI, PL} PDFs in the S3 key layout
+(``{type}/{batch}/{batch}_{version}.pdf``) plus a matching
+Manual_Review-style CSV, using a process pool. PDFs are written directly
+(text pages plus a scan-like image to reach the requested size), so no
+rendering library is involved. With ``--upload`` every document is also
+put into the configured S3 bucket, e.g. a local stand-in started with
+``moto_server`` and ``AWS_ENDPOINT_URL=http://localhost:5000``:
+
+    python scripts/generate_corpus.py --batches 5000 --versions 10 --output .cache/corpus
+"""
+
+import argparse
+import csv
+import logging
+import os
+import random
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+DOC_TYPES = ['CI', 'PL']
+DEFAULT_OUTPUT = '.cache/corpus'
+DEFAULT_FIRST_BATCH = 8000000
+# Batches handed to a worker at a time; large enough to amortize the IPC
+DEFAULT_CHUNK = 25
+PORTAL_STATUSES = ['Accepted', 'Pending', 'Rejected', 'In Review']
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def parse_range(text):
+    """Parse ``"3"`` or ``"1-5"`` into an inclusive ``(low, high)`` pair."""
+    low, _, high = text.partition('-')
+    low, high = int(low), int(high or low)
+    if low < 1 or high < low:
+        raise argparse.ArgumentTypeError(f"invalid range: {text}")
+    return low, high
+
+def batch_id(number):
+    return f"BATCH{number:07d}"
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def build_pdf(lines_per_page, image_bytes=0, rng=None):
+    """Build a PDF with one text page per entry of ``lines_per_page``.
+
+    Args:
+        lines_per_page (list): Lines of text for each page
+        image_bytes (int): Bytes of grayscale noise spread over the pages
+            as scan-like images, to reach a realistic file size
+        rng (random.Random): Source of the noise
+
+    Returns:
+        bytes: The PDF file
+    """
+    rng = rng or random.Random()
+    pages = len(lines_per_page)
+    image_width = 600
+    image_rows = image_bytes // pages // image_width if image_bytes else 0
+    objects = {1: b'<< /Type /Catalog /Pages 2 0 R >>',
+               3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'}
+    kids = []
+    for page, lines in enumerate(lines_per_page):
+        page_id, content_id, image_id = 4 + 3 * page, 5 + 3 * page, 6 + 3 * page
+        kids.append(page_id)
+        text = [b'BT /F1 12 Tf 50 780 Td 16 TL']
+        text += [b'(' + _escape(line).encode('latin-1', 'replace') + b') \'' for line in lines]
+        text.append(b'ET')
+        resources = b'/Font << /F1 3 0 R >>'
+        if image_rows:
+            text.append(b'q 495 %d 0 0 50 60 cm /Im1 Do Q' % min(600, max(1, 495 * image_rows // image_width)))
+            resources += b' /XObject << /Im1 %d 0 R >>' % image_id
+            objects[image_id] = (
+                b'<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray '
+                b'/BitsPerComponent 8 /Length %d >>\nstream\n' % (image_width, image_rows, image_width * image_rows)
+                + rng.randbytes(image_width * image_rows) + b'\nendstream')
+        content = zlib.compress(b'\n'.join(text))
+        objects[content_id] = (b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content)
+                               + content + b'\nendstream')
+        objects[page_id] = (b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R '
+                            b'/Resources << %s >> >>' % (PAGE_WIDTH, PAGE_HEIGHT, content_id, resources))
+    objects[2] = (b'<< /Type /Pages /Kids [' + b' '.join(b'%d 0 R' % kid for kid in kids) +
+                  b'] /Count %d >>' % pages)
+
+    body = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    size = max(objects) + 1
+    offsets = [0] * size
+    for number in sorted(objects):
+        offsets[number] = len(body)
+        body += b'%d 0 obj\n' % number + objects[number] + b'\nendobj\n'
+    xref = len(body)
+    body += b'xref\n0 %d\n0000000000 65535 f \n' % size
+    for number in range(1, size):
+        # Unused numbers (pages without an image) are free entries
+        body += b'%010d 00000 n \n' % offsets[number] if number in objects else b'0000000000 00000 f \n'
+    body += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, xref)
+    return bytes(body)
+
+def document_lines(doc_type, batch, revision, page, pages, rng):
+    """Return the text of one page of a synthetic CI or PL document."""
+    title = 'Commercial Invoice' if doc_type == 'CI' else 'Packing List'
+    lines = [f"{title} - page {page} of {pages}", f"Batch: {batch}", f"Revision: {revision}", '']
+    for item in range(1, 31):
+        quantity, price = rng.randint(1, 500), rng.randint(100, 99999) / 100
+        lines.append(f"Item {page}.{item:02d}  SKU-{rng.randint(10000, 99999)}  qty {quantity}  "
+                     f"unit {price:.2f}  total {quantity * price:.2f}")
+    return lines
+
+def review_rows(first_batch, batches, versions, seed):
+    """Return the Manual_Review rows for the corpus: one per batch and version."""
+    rows = []
+    for number in range(first_batch, first_batch + batches):
+        rng = random.Random(f"{seed}/{number}")
+        for version in range(1, rng.randint(*versions) + 1):
+            status = rng.choice(PORTAL_STATUSES)
+            rows.append({'Batch': batch_id(number), 'batch_count': version, 'portal_status': status,
+                         'reason': f"Reason {rng.randint(1, 200)}"})
+    return rows
+
+def content_version(batch, version, doc_type, unchanged, seed):
+    """Return the version whose content ``version`` repeats.
+
+    With probability ``unchanged`` a version is a byte-identical
+    re-submission of the previous one, as happens in real batches.
+    """
+    while version > 1 and random.Random(f"{seed}/{batch}/{version}/{doc_type}/unchanged").random() < unchanged:
+        version -= 1
+    return version
+
+def generate_batches(rows, output, pages, size_kb, unchanged, seed, upload):
+    """Write (and optionally upload) the documents of some review rows.
+
+    Runs in a worker process.
+
+    Returns:
+        tuple: ``(documents, bytes)`` written
+    """
+    client = bucket_name = None
+    if upload:
+        from s3_utils import get_bucket_name, get_full_s3_key, get_s3_client
+        client, bucket_name = get_s3_client(), get_bucket_name()
+    documents = total = 0
+    for row in rows:
+        batch, version = row['Batch'], row['batch_count']
+        for doc_type in DOC_TYPES:
+            revision = content_version(batch, version, doc_type, unchanged, seed)
+            rng = random.Random(f"{seed}/{batch}/{revision}/{doc_type}")
+            page_count = rng.randint(*pages)
+            lines = [document_lines(doc_type, batch, revision, page, page_count, rng)
+                     for page in range(1, page_count + 1)]
+            pdf = build_pdf(lines, rng.randint(*size_kb) * 1024, rng)
+            key = f"{doc_type}/{batch}/{batch}_{version}.pdf"
+            if output:
+                path = os.path.join(output, key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(pdf)
+            if client is not None:
+                client.put_object(Bucket=bucket_name, Key=get_full_s3_key(key), Body=pdf,
+                                  ContentType='application/pdf')
+            documents += 1
+            total += len(pdf)
+    return documents, total
+
+def generate_corpus(batches, versions=(5, 5), pages=(1, 3), size_kb=(50, 200), unchanged=0.2,
+                    output=DEFAULT_OUTPUT, csv_path=None, upload=False, workers=None,
+                    first_batch=DEFAULT_FIRST_BATCH, seed=0, chunk=DEFAULT_CHUNK):
+    """Generate the corpus and its review CSV.
+
+    The corpus depends only on the arguments and ``seed``, not on the
+    number of workers.
+
+    Args:
+        batches (int): Number of batches
+        versions (tuple): Range of versions per batch
+        pages (tuple): Range of pages per document
+        size_kb (tuple): Range of scan-like image data per document, in KB
+        unchanged (float): Share of versions identical to their predecessor
+        output (str): Directory for the PDFs; None to only upload
+        csv_path (str): Review CSV to write; defaults to
+            ``{output}/Manual_Review.csv``
+        upload (bool): Also put every document into the configured bucket
+        workers (int): Worker processes; 1 generates in this process
+        first_batch (int): Number of the first ``BATCHnnnnnnn`` id
+        seed (int): Seed for all generated content
+        chunk (int): Batches per worker task
+
+    Returns:
+        dict: ``batches``, ``documents``, ``bytes`` and ``seconds``
+    """
+    start = time.perf_counter()
+    rows = review_rows(first_batch, batches, versions, seed)
+    csv_path = csv_path or os.path.join(output or '.', 'Manual_Review.csv')
+    os.makedirs(os.path.dirname(csv_path) or '.', exist_ok=True)
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['Batch', 'batch_count', 'portal_status', 'reason'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    by_batch = {}
+    for row in rows:
+        by_batch.setdefault(row['Batch'], []).append(row)
+    groups = list(by_batch.values())
+    tasks = [sum(groups[i:i + chunk], []) for i in range(0, len(groups), chunk)]
+    args = (output, pages, size_kb, unchanged, seed, upload)
+
+    documents = total = 0
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        for task in tasks:
+            done, nbytes = generate_batches(task, *args)
+            documents, total = documents + done, total + nbytes
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(generate_batches, task, *args) for task in tasks]
+            for finished, future in enumerate(as_completed(futures), 1):
+                done, nbytes = future.result()
+                documents, total = documents + done, total + nbytes
+                if finished % 20 == 0 or finished == len(futures):
+                    logging.info(f"{finished}/{len(futures)} tasks, {documents} documents")
+    return {'batches': batches, 'documents': documents, 'bytes': total,
+            'seconds': time.perf_counter() - start}
+
+def main():
+    """Generate a corpus from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batches', type=int, required=True, help='Number of batches')
+    parser.add_argument('--versions', type=parse_range, default=(5, 5), help='Versions per batch, e.g. 3 or 2-8')
+    parser.add_argument('--pages', type=parse_range, default=(1, 3), help='Pages per document, e.g. 1-5')
+    parser.add_argument('--size-kb', type=parse_range, default=(50, 200),
+                        help='Image data per document in KB, e.g. 100-800')
+    parser.add_argument('--unchanged', type=float, default=0.2,
+                        help='Share of versions that repeat the previous version byte for byte')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help="Directory for the PDFs, e.g. static/documents; 'none' to only upload")
+    parser.add_argument('--csv', help='Review CSV to write (default: Manual_Review.csv in --output)')
+    parser.add_argument('--upload', action='store_true', help='Also upload every document to the configured S3')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--first-batch', type=int, default=DEFAULT_FIRST_BATCH)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    output = None if args.output == 'none' else args.output
+    if output is None and not args.upload:
+        parser.error("--output none requires --upload")
+    summary = generate_corpus(args.batches, args.versions, args.pages, args.size_kb, args.unchanged, output,
+                              args.csv, args.upload, args.workers, args.first_batch, args.seed)
+    logging.info(f"Generated {summary['documents']} documents ({summary['bytes'] / 1e6:.0f} MB) in "
+                 f"{summary['batches']} batches in {summary['seconds']:.1f}s "
+                 f"({summary['documents'] / summary['seconds']:.0f} documents/s)")
+
+if __name__ == "__main__":
+    main()
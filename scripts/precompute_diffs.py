@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Precompute visual page diffs for every version pair in the catalog."""
+
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from catalog import DOC_TYPES, load_catalog_index
+from page_diff import DIFF_CACHE_DIR, get_page_diff
+from pdf_cache import get_pdf_cache
+from utils import generate_comparison_pairs
+
+DEFAULT_WORKERS = 4
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def diff_batch(index, batch, doc_type, cache_dir):
+    """Diff every comparison pair of one batch and document type.
+
+    Each version is fetched and rasterized once, however many pairs it is in.
+    A pair that fails is logged and skipped, so the other pairs are still diffed.
+
+    Returns:
+        int: Number of pairs diffed
+    """
+    versions = index.versions(batch, doc_type)
+    cache = get_pdf_cache()
+    done = 0
+    for v1, v2 in generate_comparison_pairs(versions):
+        rows = [index.row(batch, doc_type, v) for v in (v1, v2)]
+        if not all(rows):
+            continue
+        try:
+            old_bytes, new_bytes = (cache.get_pdf(row['file_path']) for row in rows)
+            diff = get_page_diff(old_bytes, new_bytes, cache_dir)
+        except Exception as e:
+            logging.error(f"Failed to diff {batch} {doc_type} {v1}->{v2}: {str(e)}")
+            continue
+        logging.info(f"{batch} {doc_type} {v1}->{v2}: changed pages {diff['changed_pages']}")
+        done += 1
+    return done
+
+def main():
+    """Diff all pairs, or only those of the given batches."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch', action='append', default=[], help='Only diff this batch')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Batches diffed in parallel')
+    parser.add_argument('--cache-dir', default=DIFF_CACHE_DIR)
+    args = parser.parse_args()
+
+    index = load_catalog_index()
+    batches = args.batch or index.batches
+    start = time.perf_counter()
+    pairs = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(diff_batch, index, batch, doc_type, args.cache_dir): (batch, doc_type)
+            for batch in batches for doc_type in DOC_TYPES
+        }
+        for future in as_completed(futures):
+            batch, doc_type = futures[future]
+            try:
+                pairs += future.result()
+            except Exception as e:
+                logging.error(f"Failed to diff {batch} {doc_type}: {str(e)}")
+    logging.info(f"Diffed {pairs} pairs in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Refresh the local S3 inventory used as the catalog source."""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from catalog import INVENTORY_PATH
+from inventory import DEFAULT_WORKERS, RANGE_KEYS, sync_inventory
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    """Run one inventory sync."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', default=INVENTORY_PATH, help='Inventory CSV to write')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--range-keys', type=int, default=RANGE_KEYS,
+                        help='Keys per range after a split; each range is checked with one request')
+    parser.add_argument('--force', action='store_true', help='Cut the key ranges again from the batch folders')
+    args = parser.parse_args()
+
+    summary = sync_inventory(args.output, workers=args.workers, range_keys=args.range_keys, force=args.force)
+    logging.info(
+        f"Inventory synced: {summary['objects']} objects in {summary['ranges']} ranges "
+        f"({summary['requests']} requests, {summary['changed']} ranges changed, {summary['split']} split) "
+        f"in {summary['seconds']:.1f}s"
+    )
+
+if __name__ == "__main__":
+    main()
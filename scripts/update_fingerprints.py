@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""Fingerprint new and changed document versions for the review app."""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from catalog import INVENTORY_PATH
+from fingerprints import DEFAULT_WORKERS, FINGERPRINTS_PATH, update_fingerprints
+from sidecars import repeat_update
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    """Run one update, or keep updating at a fixed interval."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', default=FINGERPRINTS_PATH, help='Fingerprint CSV to write')
+    parser.add_argument('--inventory', default=INVENTORY_PATH)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--every', type=float, default=0,
+                        help='Repeat every this many seconds instead of running once')
+    args = parser.parse_args()
+
+    repeat_update(lambda: update_fingerprints(args.output, inventory_path=args.inventory, workers=args.workers),
+                  "Fingerprints", args.every)
+
+if __name__ == "__main__":
+    main()
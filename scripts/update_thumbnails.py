@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Render WebP thumbnails of new and changed document versions next to them in S3."""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from catalog import INVENTORY_PATH
+from sidecars import repeat_update
+from thumbnails import DEFAULT_WORKERS, THUMBNAIL_WIDTH, THUMBNAILS_PATH, update_thumbnails
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main():
+    """Run one update, or keep updating at a fixed interval."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', default=THUMBNAILS_PATH, help='Thumbnail manifest CSV to write')
+    parser.add_argument('--inventory', default=INVENTORY_PATH)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--width', type=int, default=THUMBNAIL_WIDTH, help='Thumbnail width in pixels')
+    parser.add_argument('--all-pages', action='store_true', help='Render every page, not only the first')
+    parser.add_argument('--every', type=float, default=0,
+                        help='Repeat every this many seconds instead of running once')
+    args = parser.parse_args()
+
+    repeat_update(lambda: update_thumbnails(args.output, inventory_path=args.inventory, workers=args.workers,
+                                            width=args.width, all_pages=args.all_pages),
+                  "Thumbnails", args.every)
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,218 @@
 #!/usr/bin/env python3
 """Script to migrate documents from local storage to S3."""
 
+import argparse
+import hashlib
+import json
 import os
 import sys
 import logging
-import pandas as pd
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent))
-
-from src.s3_utils import upload_file_to_s3
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('migration.log'),
-        logging.StreamHandler()
-    ]
-)
-
-def process_batch(batch_path):
-    """Process a single batch directory.
-    
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from boto3.s3.transfer import TransferConfig
+from s3_utils import get_s3_client, get_bucket_name, get_full_s3_key, get_s3_config
+
+DEFAULT_SOURCE_DIR = "/Users/teq-admin/Downloads/RB"
+DEFAULT_MANIFEST = "migration_manifest.jsonl"
+DEFAULT_WORKERS = 16
+DEFAULT_MULTIPART_THRESHOLD_MB = 16
+DEFAULT_MULTIPART_CHUNK_MB = 16
+DEFAULT_PART_CONCURRENCY = 4
+
+def collect_uploads(batch_path):
+    """List the files of a single batch directory with their S3 keys.
+
     Args:
         batch_path (Path): Path to the batch directory
+
+    Returns:
+        list: ``(local_path, s3_key)`` tuples
     """
     batch_id = batch_path.name
-    
-    # Process CI documents
-    ci_path = batch_path / "CI"
-    if ci_path.exists():
-        for pdf in ci_path.glob("*.pdf"):
-            version = pdf.stem.split("_")[-1]
-            s3_key = f"CI/{batch_id}/{batch_id}_{version}.pdf"
-            if upload_file_to_s3(str(pdf), s3_key):
-                logging.info(f"Uploaded CI document: {s3_key}")
-            else:
-                logging.error(f"Failed to upload: {pdf}")
-    
-    # Process PL documents
-    pl_path = batch_path / "PL"
-    if pl_path.exists():
-        for pdf in pl_path.glob("*.pdf"):
-            version = pdf.stem.split("_")[-1]
-            s3_key = f"PL/{batch_id}/{batch_id}_{version}.pdf"
-            if upload_file_to_s3(str(pdf), s3_key):
-                logging.info(f"Uploaded PL document: {s3_key}")
-            else:
-                logging.error(f"Failed to upload: {pdf}")
-    
-    # Process RG Excel files
-    for excel in batch_path.glob("RG*.xlsx"):
-        s3_key = f"audit/{batch_id}/{excel.name}"
-        if upload_file_to_s3(str(excel), s3_key):
-            logging.info(f"Uploaded audit file: {s3_key}")
-        else:
-            logging.error(f"Failed to upload: {excel}")
+    uploads = []
+
+    # CI and PL documents
+    for doc_type in ("CI", "PL"):
+        doc_path = batch_path / doc_type
+        if doc_path.exists():
+            for pdf in sorted(doc_path.glob("*.pdf")):
+                version = pdf.stem.split("_")[-1]
+                uploads.append((pdf, f"{doc_type}/{batch_id}/{batch_id}_{version}.pdf"))
+
+    # RG Excel files
+    for excel in sorted(batch_path.glob("RG*.xlsx")):
+        uploads.append((excel, f"audit/{batch_id}/{excel.name}"))
+    return uploads
+
+def file_md5(path, chunk_size=8 * 1024 * 1024):
+    """Return the hex MD5 of a file, read in chunks."""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Append-only record of completed uploads, keyed by S3 key.
+
+    Each completed upload is appended as one JSON line, so a crash loses at
+    most the uploads that were in flight. On load, the last line per key wins.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry['key']] = entry
+
+    def is_current(self, key, local_path):
+        """Return True if ``local_path`` matches what was uploaded to ``key``.
+
+        Size and mtime are compared first; the MD5 is only computed when the
+        mtime changed but the size did not.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        stat = os.stat(local_path)
+        if stat.st_size != entry['size']:
+            return False
+        if stat.st_mtime == entry.get('mtime'):
+            return True
+        return file_md5(local_path) == entry['md5']
+
+    def record(self, key, local_path, md5):
+        stat = os.stat(local_path)
+        entry = {'key': key, 'size': stat.st_size, 'mtime': stat.st_mtime, 'md5': md5}
+        with self._lock:
+            self.entries[key] = entry
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+
+def upload_one(local_path, s3_key, manifest, transfer_config):
+    """Upload one file unless the manifest shows it is unchanged.
+
+    Returns:
+        tuple: ``(status, bytes)`` where status is ``uploaded`` or ``skipped``
+    """
+    if manifest.is_current(s3_key, local_path):
+        return 'skipped', 0
+
+    md5 = file_md5(local_path)
+    client = get_s3_client()
+    bucket_name = get_bucket_name()
+    full_key = get_full_s3_key(s3_key)
+    client.upload_file(str(local_path), bucket_name, full_key, Config=transfer_config,
+                       ExtraArgs={'Metadata': {'md5': md5}})
+    manifest.record(s3_key, local_path, md5)
+    return 'uploaded', os.path.getsize(local_path)
+
+def migrate(source_dir, manifest_path=DEFAULT_MANIFEST, workers=DEFAULT_WORKERS,
+            transfer_config=None):
+    """Upload every batch below ``source_dir`` in parallel.
+
+    Args:
+        source_dir (Path): Directory containing ``BATCH*`` folders
+        manifest_path (str): Manifest of completed uploads used to resume
+        workers (int): Number of files uploaded concurrently
+        transfer_config (TransferConfig): Multipart settings per file
+
+    Returns:
+        dict: Counts, bytes, elapsed seconds and throughput
+    """
+    if transfer_config is None:
+        transfer_config = TransferConfig()
+    manifest = Manifest(manifest_path)
+
+    uploads = []
+    batch_pattern = "BATCH*"
+    for batch_path in sorted(Path(source_dir).glob(batch_pattern)):
+        if batch_path.is_dir():
+            uploads.extend(collect_uploads(batch_path))
+    logging.info(f"Found {len(uploads)} files in {source_dir}")
+
+    summary = {'files': len(uploads), 'uploaded': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(upload_one, local_path, s3_key, manifest, transfer_config): (local_path, s3_key)
+            for local_path, s3_key in uploads
+        }
+        for future in as_completed(futures):
+            local_path, s3_key = futures[future]
+            try:
+                status, nbytes = future.result()
+            except Exception as e:
+                summary['failed'] += 1
+                logging.error(f"Failed to upload {local_path}: {str(e)}")
+                continue
+            summary[status] += 1
+            summary['bytes'] += nbytes
+            if status == 'uploaded':
+                logging.info(f"Uploaded: {s3_key}")
+
+    elapsed = time.perf_counter() - start
+    summary['seconds'] = elapsed
+    summary['files_per_second'] = summary['uploaded'] / elapsed if elapsed else 0.0
+    summary['mb_per_second'] = summary['bytes'] / (1024 * 1024) / elapsed if elapsed else 0.0
+    return summary
 
 def main():
     """Main migration function."""
-    source_dir = Path("/Users/teq-admin/Downloads/RB")
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('source_dir', nargs='?', default=DEFAULT_SOURCE_DIR)
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--multipart-threshold-mb', type=int, default=DEFAULT_MULTIPART_THRESHOLD_MB)
+    parser.add_argument('--multipart-chunk-mb', type=int, default=DEFAULT_MULTIPART_CHUNK_MB)
+    parser.add_argument('--part-concurrency', type=int, default=DEFAULT_PART_CONCURRENCY,
+                        help='Parts uploaded in parallel for each multipart file')
+    args = parser.parse_args()
+
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('migration.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    source_dir = Path(args.source_dir)
     if not source_dir.exists():
         logging.error(f"Source directory not found: {source_dir}")
         return
-    
-    # Process all batch directories
-    batch_pattern = "BATCH*"
-    for batch_path in sorted(source_dir.glob(batch_pattern)):
-        if batch_path.is_dir():
-            logging.info(f"Processing batch: {batch_path.name}")
-            try:
-                process_batch(batch_path)
-            except Exception as e:
-                logging.error(f"Error processing batch {batch_path.name}: {str(e)}")
+
+    connections = args.workers * args.part_concurrency
+    if connections > get_s3_config()['max_pool_connections']:
+        logging.warning(f"{connections} concurrent transfers exceed the S3 connection pool; "
+                        f"set AWS_MAX_POOL_CONNECTIONS={connections} to avoid waiting on it")
+
+    transfer_config = TransferConfig(
+        multipart_threshold=args.multipart_threshold_mb * 1024 * 1024,
+        multipart_chunksize=args.multipart_chunk_mb * 1024 * 1024,
+        max_concurrency=args.part_concurrency,
+    )
+    summary = migrate(source_dir, args.manifest, args.workers, transfer_config)
+    logging.info(
+        f"Done: {summary['uploaded']} uploaded, {summary['skipped']} skipped, "
+        f"{summary['failed']} failed in {summary['seconds']:.1f}s "
+        f"({summary['files_per_second']:.1f} files/s, {summary['mb_per_second']:.1f} MB/s)"
+    )
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
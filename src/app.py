@@ -1,5 +1,8 @@
 """Main Streamlit application for document review system."""
 
+import uuid
+from contextlib import contextmanager
+
 import streamlit as st
 from datetime import datetime
 
@@ -9,9 +12,24 @@ from utils import (
     format_portal_status,
     embed_pdf_base64,
     generate_comparison_pairs,
-    export_audit_trail
+    render_timing_panel,
+    DEFAULT_VIEWER_MODE,
+    VIEWER_MODE_PROXY,
+    VIEWER_MODE_PRESIGNED
 )
+from audit import audit_trail_csv, get_audit_journal
+from batch_search import DEFAULT_PAGE_SIZE, get_batch_search
+from bundle import start_export
+from catalog import load_catalog_index
+from fingerprints import load_fingerprint_index
+from page_diff import content_hash, load_page_diff
+from prefetch import get_prefetcher, get_prefetch_keys
+from review_store import NOT_REVIEWED, REVIEWED, get_review_store
+from s3_utils import get_presigned_url
 from styles import STYLES
+from thumbnails import load_thumbnail_index
+from timing import TIMING_ENABLED, begin_run, current_run, finish_run, span
+from work_queue import DEFAULT_PRIORITY, PRIORITY_AGE, PRIORITY_PORTAL_STATUS, get_work_queue
 
 # Set page config
 st.set_page_config(
@@ -20,6 +38,17 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Decisions listed under the review form
+MAX_HISTORY_ROWS = 50
+
+# Time this rerun if enabled for the process or the page was opened with ?perf=1
+MAX_TIMED_RERUNS = 20
+show_timing = 'perf' in st.query_params
+if 'timing_session' not in st.session_state:
+    st.session_state.timing_session = uuid.uuid4().hex[:12]
+if TIMING_ENABLED or show_timing:
+    begin_run(st.session_state.timing_session)
+
 # Apply custom CSS
 st.markdown(STYLES, unsafe_allow_html=True)
 
@@ -40,32 +69,80 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'batch_statuses' not in st.session_state:
-    st.session_state.batch_statuses = {}
-
-if 'audit_trail' not in st.session_state:
-    st.session_state.audit_trail = []
-
 if 'review_notes' not in st.session_state:
     st.session_state.review_notes = ''
 
 if 'review_decision' not in st.session_state:
     st.session_state.review_decision = 'Accept'
 
+if 'viewer_mode' not in st.session_state:
+    st.session_state.viewer_mode = DEFAULT_VIEWER_MODE
+
+if 'paged_view' not in st.session_state:
+    # Proxy mode sends the whole file to the viewer either way; paging only saves bytes when the browser fetches
+    st.session_state.paged_view = st.session_state.viewer_mode == VIEWER_MODE_PRESIGNED
+
+if 'audit_trail' not in st.session_state:
+    # Reviews saved in this session, for the audit download
+    st.session_state.audit_trail = []
+
+if 'queue_owner' not in st.session_state:
+    st.session_state.queue_owner = uuid.uuid4().hex[:12]
+
+if 'queue_order' not in st.session_state:
+    st.session_state.queue_order = DEFAULT_PRIORITY
+
+with st.sidebar:
+    st.radio("PDF Rendering", [VIEWER_MODE_PROXY, VIEWER_MODE_PRESIGNED], key='viewer_mode',
+             format_func={VIEWER_MODE_PROXY: "Through server",
+                          VIEWER_MODE_PRESIGNED: "Direct from S3"}.get,
+             help="Direct from S3 requires the bucket to allow this app's origin.")
+    st.checkbox("Paged viewing", key='paged_view',
+                help="Render the first pages right away and load the rest on demand. "
+                     "Through the server the whole file is still sent, so this mainly helps direct from S3.")
+    st.radio("Review Queue Order", [PRIORITY_AGE, PRIORITY_PORTAL_STATUS], key='queue_order',
+             format_func={PRIORITY_AGE: "Oldest batches first",
+                          PRIORITY_PORTAL_STATUS: "By portal status"}.get)
+    # Filled in at the end of the rerun, once all stages have been timed
+    timing_panel = st.expander("⏱ Performance", expanded=True).empty() if show_timing else None
+
 # Helper functions for state management
 def on_batch_change():
     """Handle batch selection change."""
+    st.session_state.batch = st.session_state.batch_pick
+    # Picked by hand, so an earlier empty queue no longer describes this item
+    st.session_state.queue_empty = False
     update_document_options()
 
+def on_batch_filter_change():
+    """Show the first page of matches after the search or a filter changed."""
+    st.session_state.batch_page = 0
+
+def set_batch_page(page):
+    st.session_state.batch_page = page
+
+def claim_next_item():
+    """Release this session's item and move to the next one in the shared queue."""
+    lease = work_queue.next(st.session_state.queue_owner, index, st.session_state.queue_order)
+    st.session_state.queue_empty = lease is None
+    if lease is not None:
+        st.session_state.lease = lease
+        st.session_state.batch, st.session_state.doc_type = lease['batch'], lease['doc_type']
+        update_document_options()
+
+def hold_current_item():
+    """Hold the item on screen so the queue hands it to no one else; renews only near expiry."""
+    st.session_state.lease = work_queue.hold(st.session_state.queue_owner, st.session_state.batch,
+                                             st.session_state.doc_type, st.session_state.get('lease'))
+
 def on_doc_type_change():
     """Handle document type selection change."""
+    st.session_state.queue_empty = False
     update_document_options()
 
 def update_document_options():
     """Update document version options based on current selections."""
-    filtered = df[(df['batch'] == st.session_state.batch) & 
-                 (df['type'] == st.session_state.doc_type)]
-    versions = sorted(filtered['version'].unique())
+    versions = index.versions(st.session_state.batch, st.session_state.doc_type)
 
     if len(versions) >= 1:
         if 'version_1' not in st.session_state or st.session_state.version_1 not in versions:
@@ -73,26 +150,157 @@ def update_document_options():
         if 'version_2' not in st.session_state or st.session_state.version_2 not in versions:
             st.session_state.version_2 = versions[1] if len(versions) > 1 else versions[0]
 
-def get_batch_status(batch, doc_type):
-    """Get the review status for a batch/document type combination."""
-    key = f"{batch}/{doc_type}"
-    return st.session_state.batch_statuses.get(key, 'not-reviewed')
+def store_timed_run():
+    """Finish the current timed run and keep it for the performance panel."""
+    timed_reruns = st.session_state.setdefault('timed_reruns', [])
+    timed_reruns.append(finish_run())
+    del timed_reruns[:-MAX_TIMED_RERUNS]
+    return timed_reruns
+
+@contextmanager
+def timed_fragment(stage):
+    """Time a fragment as one span, or as a run of its own when it reruns alone."""
+    own_run = current_run() is None and (TIMING_ENABLED or show_timing)
+    if own_run:
+        begin_run(st.session_state.timing_session)
+    try:
+        with span(stage):
+            yield
+    finally:
+        if own_run:
+            store_timed_run()
 
 # Load data
 try:
     df = load_data()
+    with span('catalog_index'):
+        index = load_catalog_index()
+    review_store = get_review_store()
+    work_queue = get_work_queue()
 except Exception as e:
     st.error(str(e))
     st.stop()
 
 # Prepare selection lists
-batches = sorted(df['batch'].unique())
+batches = index.batches
 if 'batch' not in st.session_state and batches:
-    st.session_state.batch = batches[0]
+    # A new session starts on the next item of the queue, or the first batch if none is left
+    claim_next_item()
+    if 'batch' not in st.session_state:
+        st.session_state.batch = batches[0]
 if 'doc_type' not in st.session_state:
     st.session_state.doc_type = 'CI'
+if 'batch_page' not in st.session_state:
+    st.session_state.batch_page = 0
 
 update_document_options()
+# Fragments compare against this to tell that a new batch needs a full rerun
+st.session_state.rendered_item = (st.session_state.batch, st.session_state.doc_type)
+hold_current_item()
+
+@st.experimental_fragment
+def batch_selection():
+    """Search, page through and pick batches; only a new batch reruns the whole page."""
+    if (st.session_state.batch, st.session_state.doc_type) != st.session_state.rendered_item:
+        # Picked in a rerun of this fragment alone; the panes still show the old batch
+        st.rerun()
+    with timed_fragment('batch_selection'):
+        # One query for every batch's status, shared by all sessions and read once per render
+        statuses = review_store.statuses()
+        doc_type = st.session_state.doc_type
+        batch_search = get_batch_search(df)
+        search_cols = st.columns([2, 1, 1])
+        with search_cols[0]:
+            st.text_input("Search Batches", key='batch_query', placeholder="Batch id or part of it",
+                          on_change=on_batch_filter_change)
+        with search_cols[1]:
+            st.selectbox("Portal Status", ['All'] + batch_search.portal_statuses, key='portal_filter',
+                         on_change=on_batch_filter_change)
+        with search_cols[2]:
+            st.selectbox("Review Status", ['All', 'Reviewed', 'Not Reviewed'], key='review_filter',
+                         on_change=on_batch_filter_change)
+
+        # Only the current page of matches is sent to the browser
+        review_filter = st.session_state.review_filter
+        search_args = dict(
+            query=st.session_state.batch_query,
+            portal_status=None if st.session_state.portal_filter == 'All' else st.session_state.portal_filter,
+            reviewed=None if review_filter == 'All' else review_filter == 'Reviewed',
+            reviewed_batches=[b for (b, t), status in statuses.items() if t == doc_type and status == REVIEWED],
+        )
+        with span('batch_search'):
+            page_batches, total = batch_search.search(page=st.session_state.batch_page, **search_args)
+            if not page_batches and st.session_state.batch_page:
+                # Fewer matches than before, e.g. after a review; go to the last page
+                st.session_state.batch_page = max(0, -(-total // DEFAULT_PAGE_SIZE) - 1)
+                page_batches, total = batch_search.search(page=st.session_state.batch_page, **search_args)
+        st.selectbox("Select Batch", page_batches, key='batch_pick', on_change=on_batch_change,
+                     index=page_batches.index(st.session_state.batch) if st.session_state.batch in page_batches else None,
+                     placeholder=f"{total} matching batches",
+                     format_func=lambda batch: f"✓ {batch}" if statuses.get((batch, doc_type)) == REVIEWED else batch)
+        page = st.session_state.batch_page
+        page_count = max(1, -(-total // DEFAULT_PAGE_SIZE))
+        nav_cols = st.columns([1, 2, 1])
+        with nav_cols[0]:
+            st.button("‹ Previous", disabled=page == 0, on_click=set_batch_page, args=(page - 1,),
+                      use_container_width=True)
+        with nav_cols[1]:
+            st.caption(f"Page {page + 1} of {page_count} · {total} batches · showing {st.session_state.batch}")
+        with nav_cols[2]:
+            st.button("Next ›", disabled=page + 1 >= page_count, on_click=set_batch_page, args=(page + 1,),
+                      use_container_width=True)
+        st.markdown(format_status_tag(statuses.get((st.session_state.batch, doc_type), NOT_REVIEWED)),
+                    unsafe_allow_html=True)
+        queue_cols = st.columns([1, 2])
+        with queue_cols[0]:
+            st.button("▶ Next in Queue", on_click=claim_next_item, use_container_width=True,
+                      help="Release this batch and claim the next unreviewed one")
+        with queue_cols[1]:
+            lease = st.session_state.lease
+            if st.session_state.get('queue_empty'):
+                st.caption("Every batch is reviewed or claimed by another reviewer")
+            elif lease['owner'] != st.session_state.queue_owner:
+                st.warning("Another reviewer is working on this batch")
+            pace = work_queue.throughput()
+            st.caption(f"Team: {pace['reviews']} reviews in the last hour · {pace['reviewers']} active reviewers")
+        # Build the CSV of this session's reviews only on request; saved reviews are already journaled
+        if st.button("📊 Download Audit"):
+            if st.session_state.audit_trail:
+                st.download_button(
+                    label="💾 Save audit_trail.csv",
+                    data=audit_trail_csv(st.session_state.audit_trail),
+                    file_name="audit_trail.csv",
+                    mime="text/csv"
+                    )
+            else:
+                st.caption("No reviews saved in this session yet")
+        # Bundles can be several GB; they are streamed to S3 in the background and handed out as a link
+        export = st.session_state.get('bundle_export')
+        if export is None or not export['thread'].is_alive():
+            if st.button("📦 Export Batch Bundle"):
+                st.session_state.bundle_export = start_export(index, [st.session_state.batch],
+                                                              review_store.history(batch=st.session_state.batch))
+                # The progress panel polls outside this fragment
+                st.rerun()
+            elif export is not None and export['batches'] == [st.session_state.batch]:
+                if export['error'] is not None:
+                    st.error(f"Bundle export failed: {export['error']}")
+                else:
+                    if export['summary']['missing']:
+                        st.warning(f"{len(export['summary']['missing'])} document(s) could not be found "
+                                   "and are listed in MISSING.txt")
+                    st.link_button(f"💾 Download bundle ({export['summary']['documents']} documents)",
+                                   get_presigned_url(export['key']))
+
+@st.experimental_fragment(run_every=1)
+def bundle_export_progress():
+    """Poll a running bundle export; rendered only while one runs."""
+    export = st.session_state.bundle_export
+    if not export['thread'].is_alive():
+        # The batch panel shows the result
+        st.rerun()
+    st.progress(export['done'] / max(export['total'], 1),
+                text=f"Bundling {', '.join(export['batches'])}: {export['done']} of {export['total'] or '?'} documents")
 
 # Main layout
 # title_col, download_col = st.columns([2, 1])
@@ -110,15 +318,9 @@ with col1:
     # S1: Batch selection and Document type
     # with col1:
     st.title("Document Review Panel")
-
-    st.selectbox("Select Batch", batches, key='batch', on_change=on_batch_change)
-    if st.session_state.audit_trail:
-        st.download_button(
-            label="📊 Download Audit",
-            data=export_audit_trail(st.session_state.audit_trail),
-            file_name="audit_trail.csv",
-            mime="text/csv"
-            )
+    batch_selection()
+    if st.session_state.get('bundle_export') and st.session_state.bundle_export['thread'].is_alive():
+        bundle_export_progress()
  
 # Right column contains S3 (Version comparison)
 with col2:
@@ -129,12 +331,12 @@ with col2:
         st.radio("Document Type", ['CI','PL'], key='doc_type', 
                 on_change=on_doc_type_change, horizontal=True)
     
-    filtered = df[(df['batch'] == st.session_state.batch) & 
-                 (df['type'] == st.session_state.doc_type)]
-    versions = sorted(filtered['version'].unique())
+    versions = index.versions(st.session_state.batch, st.session_state.doc_type)
 
     if len(versions) < 2:
         st.warning("Not enough versions available for comparison. At least 2 versions are required.")
+        if current_run() is not None:
+            store_timed_run()
         st.stop()
         
     pairs = generate_comparison_pairs(versions)
@@ -143,9 +345,17 @@ with col2:
 
     # Create version comparison buttons
     st.markdown("#### Select Versions to Compare")
+    with span('catalog_lookup', versions=len(versions)):
+        fingerprints = load_fingerprint_index()
+        file_paths = {v: (index.row(st.session_state.batch, st.session_state.doc_type, v) or {}).get('file_path')
+                      for v in versions}
     cols = st.columns(3)
     for i, (v1, v2) in enumerate(pairs):
         label = f"Ver {v1} vs {v2}"
+        # Filled in by scripts/update_fingerprints.py; no download needed here
+        similarity = fingerprints.label(file_paths[v1], file_paths[v2])
+        if similarity:
+            label = f"{label} · {similarity}"
         col_index = i % 3
         with cols[col_index]:
             if st.button(label, key=f"btn_{v1}_{v2}", 
@@ -158,53 +368,142 @@ with col2:
                     st.markdown("<p class='caption-selected'>✓ Selected</p>",
                               unsafe_allow_html=True)
 
+    # First-page sidecars from scripts/update_thumbnails.py; browsers load them straight from S3
+    with span('thumbnails'):
+        thumbnails = {v: load_thumbnail_index().keys(file_paths[v]) for v in versions}
+    if any(thumbnails.values()):
+        with st.expander("Version overview", expanded=True):
+            grid = st.columns(5)
+            for i, v in enumerate(versions):
+                with grid[i % 5]:
+                    if thumbnails[v]:
+                        st.image(get_presigned_url(thumbnails[v][0]), caption=f"Ver {v}", use_column_width=True)
+                    else:
+                        st.caption(f"Ver {v}: no thumbnail yet")
+
 # Document display section
 st.markdown("---")
-review_cols = st.columns(4)
-# with review_cols[0]:
-#     st.markdown("### Review Input")
-with review_cols[0]:
-    st.selectbox("Decision", ['Accept','Reject','Request More Information'],
-                key='review_decision')
-with review_cols[1]:
-    st.text_input("Review Notes", key='review_notes')
-with review_cols[3]:
-    if st.button("Save Batch Review"):
-        key = f"{st.session_state.batch}/{st.session_state.doc_type}"
-        st.session_state.batch_statuses[key] = 'reviewed'
-        entry = {
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'batch': st.session_state.batch,
-            'doc_type': st.session_state.doc_type,
-            'v1_v2': f"{st.session_state.version_1}-{st.session_state.version_2}",
-            'status': 'reviewed',
-            'notes': st.session_state.review_notes,
-            'decision': st.session_state.review_decision
-        }
-        st.session_state.audit_trail.append(entry)
-        st.success(f"Review saved for batch {st.session_state.batch} ({st.session_state.doc_type})")
+@st.experimental_fragment
+def review_form():
+    """Decision, notes and save; typing and saving leave the document panes untouched."""
+    with timed_fragment('review_form'):
+        # Working on the review keeps the lease
+        hold_current_item()
+        review_cols = st.columns(4)
+        # with review_cols[0]:
+        #     st.markdown("### Review Input")
+        with review_cols[0]:
+            st.selectbox("Decision", ['Accept','Reject','Request More Information'],
+                        key='review_decision')
+        with review_cols[1]:
+            st.text_input("Review Notes", key='review_notes')
+        with review_cols[3]:
+            if st.button("Save Batch Review"):
+                entry = {
+                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    'batch': st.session_state.batch,
+                    'doc_type': st.session_state.doc_type,
+                    'v1_v2': f"{st.session_state.version_1}-{st.session_state.version_2}",
+                    'status': REVIEWED,
+                    'notes': st.session_state.review_notes,
+                    'decision': st.session_state.review_decision
+                }
+                review_store.record(entry)
+                get_audit_journal().append(entry)
+                st.session_state.audit_trail.append(entry)
+                # Read the history again so it shows the new decision
+                st.session_state.pop('decision_history', None)
+                st.success(f"Review saved for batch {st.session_state.batch} ({st.session_state.doc_type})")
+        # Decisions of every session, read from the batch's partitions of the audit history once per
+        # item and after each save, not on every keystroke in the notes
+        item = (st.session_state.batch, st.session_state.doc_type)
+        try:
+            history = st.session_state.get('decision_history')
+            if history is None or history[0] != item:
+                with span('audit_history'):
+                    history = (item, get_audit_journal().query(batch=item[0], doc_type=item[1],
+                                                               limit=MAX_HISTORY_ROWS))
+                st.session_state.decision_history = history
+            decisions = history[1]
+        except Exception as e:
+            st.caption(f"Decision history unavailable: {e}")
+        else:
+            with st.expander(f"Decision history ({len(decisions)})"):
+                if decisions:
+                    st.dataframe([{column: row[column] for column in ('timestamp', 'decision', 'v1_v2', 'notes')}
+                                  for row in decisions], hide_index=True, use_container_width=True)
+                else:
+                    st.caption("No decisions recorded for this batch yet")
+
+review_form()
 
 # Display PDF comparison
-if 'selected_comparison' in st.session_state:
-    v1, v2 = st.session_state.selected_comparison
-    col1, col2 = st.columns(2)
+@st.experimental_fragment
+def document_panes():
+    """Both versions side by side; reruns alone when a pane loads more pages."""
+    if 'selected_comparison' not in st.session_state:
+        return
+    with timed_fragment('document_panes'):
+        v1, v2 = st.session_state.selected_comparison
+        v1_row = index.row(st.session_state.batch, st.session_state.doc_type, v1)
+        v2_row = index.row(st.session_state.batch, st.session_state.doc_type, v2)
+
+        proxy_mode = st.session_state.viewer_mode == VIEWER_MODE_PROXY
+        page_diff = None
+        if proxy_mode:
+            # Fetch both versions in parallel before either pane renders
+            prefetcher = get_prefetcher()
+            with span('fetch_documents') as timed:
+                contents = prefetcher.fetch_many([row['file_path'] for row in (v1_row, v2_row) if row])
+                timed.set(bytes=sum(len(body) for body in contents.values()))
+            if v1_row and v2_row and v1_row['file_path'] in contents and v2_row['file_path'] in contents:
+                # Diffs are computed offline by scripts/precompute_diffs.py
+                with span('page_diff'):
+                    page_diff = load_page_diff(content_hash(contents[v1_row['file_path']]),
+                                               content_hash(contents[v2_row['file_path']]))
+            if page_diff is None:
+                st.caption("No precomputed page diff for this pair")
+            elif page_diff['changed_pages']:
+                st.caption(f"Changed pages: {', '.join(map(str, page_diff['changed_pages']))}")
+            else:
+                st.caption("No visual changes between these versions")
+
+        col1, col2 = st.columns(2)
     
-    with col1:
-        v1_row = filtered[filtered['version']==v1]
-        v1_status = v1_row['portal_status'].iloc[0] if not v1_row.empty else 'Unknown'
-        v1_reason = v1_row['reason'].iloc[0] if not v1_row.empty else ''
-        st.markdown(f"#### Version {v1} {format_portal_status(v1_status,v1_reason)}",
-                   unsafe_allow_html=True)
-        # st.markdown(embed_pdf_base64(v1_row['file_path'].iloc[0] if not v1_row.empty else ''),
-        #            unsafe_allow_html=True)
-        embed_pdf_base64(v1_row['file_path'].iloc[0])
+        with col1:
+            v1_status = v1_row['portal_status'] if v1_row else 'Unknown'
+            v1_reason = v1_row['reason'] if v1_row else ''
+            st.markdown(f"#### Version {v1} {format_portal_status(v1_status,v1_reason)}",
+                       unsafe_allow_html=True)
+            # st.markdown(embed_pdf_base64(v1_row['file_path'].iloc[0] if not v1_row.empty else ''),
+            #            unsafe_allow_html=True)
+            embed_pdf_base64(v1_row['file_path'] if v1_row else '', st.session_state.viewer_mode,
+                             st.session_state.paged_view, page_diff)
     
-    with col2:
-        v2_row = filtered[filtered['version']==v2]
-        v2_status = v2_row['portal_status'].iloc[0] if not v2_row.empty else 'Unknown'
-        v2_reason = v2_row['reason'].iloc[0] if not v2_row.empty else ''
-        st.markdown(f"#### Version {v2} {format_portal_status(v2_status,v2_reason)}",
-                   unsafe_allow_html=True)
-        # st.markdown(embed_pdf_base64(v2_row['file_path'].iloc[0] if not v2_row.empty else ''),
-        #            unsafe_allow_html=True) 
-        embed_pdf_base64(v2_row['file_path'].iloc[0]) 
\ No newline at end of file
+        with col2:
+            v2_status = v2_row['portal_status'] if v2_row else 'Unknown'
+            v2_reason = v2_row['reason'] if v2_row else ''
+            st.markdown(f"#### Version {v2} {format_portal_status(v2_status,v2_reason)}",
+                       unsafe_allow_html=True)
+            # st.markdown(embed_pdf_base64(v2_row['file_path'].iloc[0] if not v2_row.empty else ''),
+            #            unsafe_allow_html=True) 
+            embed_pdf_base64(v2_row['file_path'] if v2_row else '', st.session_state.viewer_mode,
+                             st.session_state.paged_view, page_diff)
+
+        if proxy_mode:
+            # Warm the cache for the other pairs and the next batch
+            with span('prefetch'):
+                keys = get_prefetch_keys(index, st.session_state.batch, st.session_state.doc_type, (v1, v2))
+                # The first pair of the item "Next in Queue" will most likely hand out
+                upcoming = work_queue.peek(index, st.session_state.queue_order)
+                if upcoming is not None:
+                    keys[:0] = [index.row(*upcoming, version)['file_path'] for version in index.versions(*upcoming)[:2]]
+                prefetcher.prefetch(keys)
+
+document_panes()
+
+if current_run() is not None:
+    timed_reruns = store_timed_run()
+    if timing_panel is not None:
+        with timing_panel.container():
+            render_timing_panel(timed_reruns)
@@ -0,0 +1,549 @@
+"""Append-only, write-behind audit trail and its partitioned, queryable history."""
+
+import atexit
+import csv
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from io import BytesIO, StringIO
+
+from s3_utils import get_s3_client, get_bucket_name, get_full_s3_key
+
+# Daily CSV trails written before the partitioned history existed
+AUDIT_PREFIX = 'audit/audit_trails'
+# Parquet files under {prefix}/bucket={NN}/month={YYYY-MM}/; a batch always hashes to the same bucket
+AUDIT_HISTORY_PREFIX = 'audit/history'
+AUDIT_COLUMNS = ['entry_id', 'timestamp', 'batch', 'doc_type', 'v1_v2', 'status', 'notes', 'decision']
+BATCH_BUCKETS = 16
+# Files are sorted by batch, so small row groups let filtered reads skip most of a file
+ROW_GROUP_SIZE = 2048
+DEFAULT_JOURNAL_DIR = os.environ.get('DOC_REVIEW_AUDIT_DIR', '.cache/audit')
+# Partition files never change once written, so local copies are reused until they are compacted away
+HISTORY_CACHE_DIR = os.path.join(DEFAULT_JOURNAL_DIR, 'history')
+# Partition listings are reused for this many seconds
+LISTING_TTL = 30
+# A part file is uploaded once this many entries are pending ...
+DEFAULT_FLUSH_SIZE = 50
+# ... or once the oldest pending entry is this many seconds old.
+DEFAULT_FLUSH_INTERVAL = 30
+DEFAULT_COMPACT_INTERVAL = 3600
+
+logger = logging.getLogger(__name__)
+
+_journal_lock = threading.Lock()
+_audit_journal = None
+_listing_lock = threading.Lock()
+_listings = {}
+_cleanup_lock = threading.Lock()
+
+
+def audit_trail_csv(audit_trail):
+    """Serialize audit entries to CSV.
+
+    Columns follow the order in which keys first appear in the entries.
+
+    Args:
+        audit_trail (list): Audit entries as dicts
+
+    Returns:
+        str: CSV text including a header, or "" for no entries
+    """
+    if not audit_trail:
+        return ""
+    fieldnames = list(dict.fromkeys(key for row in audit_trail for key in row))
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    for row in audit_trail:
+        writer.writerow({key: row.get(key) for key in fieldnames})
+    return buffer.getvalue()
+
+def _entry_date(entry):
+    timestamp = str(entry.get('timestamp') or '')
+    return timestamp[:10] if len(timestamp) >= 10 else datetime.now().strftime("%Y-%m-%d")
+
+def batch_bucket(batch):
+    """Return the history bucket (0 to ``BATCH_BUCKETS - 1``) of a batch."""
+    return zlib.crc32(str(batch).encode('utf-8')) % BATCH_BUCKETS
+
+def entry_partition(entry):
+    """Return the ``(bucket, month)`` partition an audit entry belongs to."""
+    return batch_bucket(entry.get('batch')), _entry_date(entry)[:7]
+
+def partition_prefix(bucket, month=None):
+    """Return the relative prefix of a partition, or of a whole bucket."""
+    prefix = f"{AUDIT_HISTORY_PREFIX}/bucket={bucket:02d}/"
+    return f"{prefix}month={month}/" if month else prefix
+
+def audit_table(entries):
+    """Convert audit entries to an Arrow table sorted by batch and time.
+
+    Values are stored as strings; keys outside ``AUDIT_COLUMNS`` are dropped.
+    Sorting keeps each batch in few row groups, so filtered reads skip the rest.
+    """
+    import pyarrow as pa
+
+    rows = sorted(entries, key=lambda e: (str(e.get('batch') or ''), str(e.get('timestamp') or '')))
+    return pa.table({
+        column: pa.array([None if row.get(column) is None else str(row.get(column)) for row in rows],
+                         type=pa.string())
+        for column in AUDIT_COLUMNS
+    })
+
+def _put_table(relative_key, table):
+    import pyarrow.parquet as pq
+
+    buffer = BytesIO()
+    pq.write_table(table, buffer, compression='zstd', row_group_size=ROW_GROUP_SIZE)
+    get_s3_client().put_object(Bucket=get_bucket_name(), Key=get_full_s3_key(relative_key),
+                               Body=buffer.getvalue(), ContentType='application/vnd.apache.parquet')
+
+def _file_name(kind):
+    return f"{kind}-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+
+def write_audit_parts(entries):
+    """Upload entries as one small Parquet part per partition they touch.
+
+    Returns:
+        set: The ``(bucket, month)`` partitions written to
+    """
+    by_partition = {}
+    for entry in entries:
+        by_partition.setdefault(entry_partition(entry), []).append(entry)
+    for (bucket, month), rows in by_partition.items():
+        _put_table(partition_prefix(bucket, month) + _file_name('part'), audit_table(rows))
+        _invalidate_listing(bucket)
+    return set(by_partition)
+
+def _invalidate_listing(bucket):
+    with _listing_lock:
+        _listings.pop(bucket, None)
+
+def _bucket_files(bucket, cache_dir):
+    """Return the relative keys of a bucket's Parquet files, listed at most every ``LISTING_TTL``."""
+    now = time.monotonic()
+    with _listing_lock:
+        cached = _listings.get(bucket)
+    if cached is not None and now - cached[0] < LISTING_TTL:
+        return cached[1]
+    base = get_full_s3_key('')
+    files = [key[len(base):] for key in _list_keys(partition_prefix(bucket)) if key.endswith('.parquet')]
+    with _listing_lock:
+        _listings[bucket] = (now, files)
+    # Drop local copies of files that were compacted away. Downloads still in
+    # progress in other threads are *.tmp files and are left alone.
+    local_dir = os.path.join(cache_dir, partition_prefix(bucket))
+    listed = {os.path.normpath(os.path.join(cache_dir, key)) for key in files}
+    with _cleanup_lock:
+        for root, _, names in os.walk(local_dir):
+            for name in names:
+                path = os.path.normpath(os.path.join(root, name))
+                if path not in listed and not name.endswith('.tmp'):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        # Removed by another process sharing the cache directory
+                        pass
+    return files
+
+def _local_file(relative_key, cache_dir):
+    """Return a local path of a partition file, downloading it once."""
+    path = os.path.join(cache_dir, relative_key)
+    if not os.path.exists(path):
+        response = get_s3_client().get_object(Bucket=get_bucket_name(), Key=get_full_s3_key(relative_key))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(response['Body'].read())
+        os.replace(tmp_path, path)
+    return path
+
+def _month_of(relative_key):
+    return relative_key.rsplit('month=', 1)[1][:7]
+
+def _overlaps(statistics, low, high):
+    """Tell whether a row group's value range can hold values in [low, high]."""
+    if statistics is None or not statistics.has_min_max:
+        return True
+    return (low is None or statistics.max >= low) and (high is None or statistics.min <= high)
+
+def _read_file(path, batch, doc_type, since, until):
+    """Read the matching rows of one partition file, skipping row groups by their statistics."""
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+    batch_column = parquet_file.schema_arrow.get_field_index('batch')
+    time_column = parquet_file.schema_arrow.get_field_index('timestamp')
+    groups = [
+        i for i in range(metadata.num_row_groups)
+        if _overlaps(metadata.row_group(i).column(batch_column).statistics, batch, batch)
+        and _overlaps(metadata.row_group(i).column(time_column).statistics, since, until)
+    ]
+    table = parquet_file.read_row_groups(groups)
+    masks = []
+    if batch is not None:
+        masks.append(pc.equal(table['batch'], batch))
+    if doc_type is not None:
+        masks.append(pc.equal(table['doc_type'], doc_type))
+    if since is not None:
+        masks.append(pc.greater_equal(table['timestamp'], since))
+    if until is not None:
+        masks.append(pc.less(table['timestamp'], until))
+    if masks:
+        mask = masks[0]
+        for other in masks[1:]:
+            mask = pc.and_(mask, other)
+        table = table.filter(mask)
+    return table
+
+def _read_bucket(bucket, batch, doc_type, since, until, cache_dir):
+    """Read the files of one bucket in the months between ``since`` and ``until``."""
+    from botocore.exceptions import ClientError
+
+    for attempt in range(2):
+        tables = []
+        try:
+            for key in _bucket_files(bucket, cache_dir):
+                month = _month_of(key)
+                if (since is not None and month < since[:7]) or (until is not None and month > until[:7]):
+                    continue
+                tables.append(_read_file(_local_file(key, cache_dir), batch, doc_type, since, until))
+            return tables
+        except ClientError as e:
+            if attempt or e.response.get('Error', {}).get('Code') not in ('NoSuchKey', '404'):
+                raise
+            # Compacted away since the listing; list again to find the merged file
+            _invalidate_listing(bucket)
+
+def query_audit(batch=None, doc_type=None, since=None, until=None, limit=None, cache_dir=HISTORY_CACHE_DIR):
+    """Return audit entries matching the filters, newest first.
+
+    Only the partitions a filter can match are read: one bucket when
+    ``batch`` is given, and only the months between ``since`` and ``until``.
+    Within a file, row groups are skipped by their statistics.
+
+    Args:
+        batch (str): Only entries of this batch
+        doc_type (str): Only entries of this document type
+        since (str): Only entries at or after this timestamp
+        until (str): Only entries before this timestamp
+        limit (int): Maximum number of entries
+        cache_dir (str): Directory for local copies of partition files
+
+    Returns:
+        list: Entries as dicts with the keys in ``AUDIT_COLUMNS``
+    """
+    batch = None if batch is None else str(batch)
+    buckets = [batch_bucket(batch)] if batch is not None else range(BATCH_BUCKETS)
+    tables = []
+    for bucket in buckets:
+        tables.extend(_read_bucket(bucket, batch, doc_type, since, until, cache_dir))
+
+    entries = {}
+    for table in tables:
+        for row in table.to_pylist():
+            # Files being compacted and their merged result can both be listed
+            entries[row['entry_id']] = row
+    rows = sorted(entries.values(), key=lambda row: (row['timestamp'] or '', row['entry_id']), reverse=True)
+    return rows[:limit] if limit is not None else rows
+
+
+class AuditJournal:
+    """Local append-only journal flushed to S3 in batches.
+
+    ``append`` writes one line to the journal and returns. A background
+    thread uploads pending entries as Parquet parts into their
+    ``(bucket, month)`` partitions of the history when enough have
+    accumulated or the oldest is old enough, and periodically compacts the
+    partitions it wrote to. Entries not yet uploaded when the process stops
+    are recovered from the journal on the next start.
+    """
+
+    def __init__(self, journal_dir=DEFAULT_JOURNAL_DIR, flush_size=DEFAULT_FLUSH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, compact_interval=DEFAULT_COMPACT_INTERVAL):
+        self.journal_dir = journal_dir
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.journal_path = os.path.join(journal_dir, 'journal.jsonl')
+        self.offset_path = os.path.join(journal_dir, 'journal.offset')
+        self.history_dir = os.path.join(journal_dir, 'history')
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pending = []
+        self._pending_since = None
+        self._dirty_partitions = set()
+        self._last_compact = time.monotonic()
+        os.makedirs(journal_dir, exist_ok=True)
+        self._recover()
+
+    def append(self, entry):
+        """Record one audit entry; the upload happens in the background."""
+        entry = dict(entry, entry_id=entry.get('entry_id') or uuid.uuid4().hex)
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            with open(self.journal_path, 'a') as f:
+                f.write(line + '\n')
+                end = f.tell()
+            self._pending.append((entry, end))
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            due = len(self._pending) >= self.flush_size
+        if due:
+            self._wakeup.set()
+
+    def pending_count(self):
+        """Return the number of entries not yet uploaded."""
+        with self._lock:
+            return len(self._pending)
+
+    def pending_entries(self):
+        """Return the entries not yet uploaded, oldest first."""
+        with self._lock:
+            return [entry for entry, _ in self._pending]
+
+    def flush(self):
+        """Upload all pending entries, one part file per partition.
+
+        Returns:
+            int: Number of entries uploaded
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+            if not batch:
+                return 0
+
+            partitions = write_audit_parts([entry for entry, _ in batch])
+
+            with self._lock:
+                del self._pending[:len(batch)]
+                self._pending_since = time.monotonic() if self._pending else None
+                self._dirty_partitions.update(partitions)
+                if self._pending:
+                    self._write_offset(batch[-1][1])
+                else:
+                    # Everything is uploaded; start a fresh journal
+                    open(self.journal_path, 'w').close()
+                    self._write_offset(0)
+            return len(batch)
+
+    def compact(self, partitions=None):
+        """Merge the small files of partitions into one file each.
+
+        Args:
+            partitions (iterable): ``(bucket, month)`` pairs to compact;
+                defaults to those this journal has flushed to since the last
+                compaction
+
+        Returns:
+            int: Number of files merged
+        """
+        with self._lock:
+            if partitions is None:
+                partitions = set(self._dirty_partitions)
+            self._dirty_partitions.difference_update(partitions)
+        merged = 0
+        for bucket, month in sorted(partitions):
+            merged += compact_audit_partition(bucket, month, self.history_dir)
+        self._last_compact = time.monotonic()
+        return merged
+
+    def query(self, batch=None, doc_type=None, since=None, until=None, limit=None):
+        """Return ``query_audit`` results including this journal's pending entries."""
+        entries = {row['entry_id']: row
+                   for row in query_audit(batch, doc_type, since, until, cache_dir=self.history_dir)}
+        for entry in self.pending_entries():
+            timestamp = str(entry.get('timestamp') or '')
+            if ((batch is None or entry.get('batch') == batch) and
+                    (doc_type is None or entry.get('doc_type') == doc_type) and
+                    (since is None or timestamp >= since) and (until is None or timestamp < until)):
+                entries[entry['entry_id']] = {column: entry.get(column) for column in AUDIT_COLUMNS}
+        rows = sorted(entries.values(), key=lambda row: (row['timestamp'] or '', row['entry_id']), reverse=True)
+        return rows[:limit] if limit is not None else rows
+
+    def start(self):
+        """Start the background flush thread if it is not running."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='audit-flush', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Flush what is pending and stop the background thread."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        try:
+            self.flush()
+        except ValueError as e:
+            logger.warning(f"Final audit flush skipped: {e}")
+        except Exception:
+            logger.exception("Final audit flush failed; entries remain in the journal")
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(timeout=min(self.flush_interval, 5))
+            self._wakeup.clear()
+            with self._lock:
+                due = bool(self._pending) and (
+                    len(self._pending) >= self.flush_size or
+                    time.monotonic() - self._pending_since >= self.flush_interval)
+            try:
+                if due:
+                    self.flush()
+                if time.monotonic() - self._last_compact >= self.compact_interval:
+                    self.compact()
+            except ValueError as e:
+                logger.warning(f"Audit flush skipped: {e}")
+            except Exception:
+                logger.exception("Audit flush failed; will retry")
+
+    def _write_offset(self, offset):
+        tmp_path = f"{self.offset_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(offset))
+        os.replace(tmp_path, self.offset_path)
+
+    def _recover(self):
+        """Reload entries appended after the last confirmed upload."""
+        try:
+            with open(self.offset_path, 'r') as f:
+                offset = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            offset = 0
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r') as f:
+            f.seek(offset)
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith('\n'):
+                    # Torn write from a crash; nothing after it is valid
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                # Journals written before entries had ids
+                entry.setdefault('entry_id', uuid.uuid4().hex)
+                self._pending.append((entry, f.tell()))
+        if self._pending:
+            self._pending_since = time.monotonic()
+
+
+def _list_keys(prefix):
+    """Return full keys below a relative prefix."""
+    paginator = get_s3_client().get_paginator('list_objects_v2')
+    keys = []
+    for page in paginator.paginate(Bucket=get_bucket_name(), Prefix=get_full_s3_key(prefix)):
+        keys.extend(obj['Key'] for obj in page.get('Contents', []))
+    return keys
+
+def _read_csv_rows(full_key):
+    from botocore.exceptions import ClientError
+
+    try:
+        response = get_s3_client().get_object(Bucket=get_bucket_name(), Key=full_key)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return []
+        raise
+    return list(csv.DictReader(StringIO(response['Body'].read().decode('utf-8'))))
+
+def compact_audit_partition(bucket, month, cache_dir=HISTORY_CACHE_DIR):
+    """Merge the files of one partition into a single Parquet file.
+
+    The merged file is written before the files it replaces are deleted, so
+    readers never miss entries; duplicates seen in between, or left by two
+    concurrent compactions, are removed by ``entry_id`` when reading and in
+    the next compaction.
+
+    Args:
+        bucket (int): Batch bucket of the partition
+        month (str): Month of the partition, as YYYY-MM
+        cache_dir (str): Directory for local copies of partition files
+
+    Returns:
+        int: Number of files merged; 0 if the partition had fewer than two
+    """
+    import pyarrow.parquet as pq
+
+    _invalidate_listing(bucket)
+    prefix = partition_prefix(bucket, month)
+    files = sorted(key for key in _bucket_files(bucket, cache_dir) if key.startswith(prefix))
+    if len(files) < 2:
+        return 0
+    entries = {}
+    for key in files:
+        for row in pq.read_table(_local_file(key, cache_dir)).to_pylist():
+            entries[row['entry_id']] = row
+    _put_table(prefix + _file_name('data'), audit_table(list(entries.values())))
+
+    client = get_s3_client()
+    bucket_name = get_bucket_name()
+    for start in range(0, len(files), 1000):
+        client.delete_objects(Bucket=bucket_name, Delete={
+            'Objects': [{'Key': get_full_s3_key(key)} for key in files[start:start + 1000]],
+            'Quiet': True,
+        })
+    _invalidate_listing(bucket)
+    return len(files)
+
+def compact_audit_history(cache_dir=HISTORY_CACHE_DIR):
+    """Compact every partition of the history that has more than one file.
+
+    Returns:
+        int: Number of files merged
+    """
+    merged = 0
+    for bucket in range(BATCH_BUCKETS):
+        _invalidate_listing(bucket)
+        for month in sorted({_month_of(key) for key in _bucket_files(bucket, cache_dir)}):
+            merged += compact_audit_partition(bucket, month, cache_dir)
+    return merged
+
+def import_legacy_audit():
+    """Copy the daily CSV trails under ``AUDIT_PREFIX`` into the partitioned history.
+
+    Entry ids are derived from the row contents, so importing twice does
+    not duplicate entries. The CSV files are left in place.
+
+    Returns:
+        int: Number of entries imported
+    """
+    entries = []
+    for key in sorted(_list_keys(f"{AUDIT_PREFIX}/")):
+        if not key.endswith('.csv'):
+            continue
+        for row in _read_csv_rows(key):
+            row.setdefault('entry_id', hashlib.md5(json.dumps(row, sort_keys=True).encode('utf-8')).hexdigest())
+            entries.append(row)
+    for start in range(0, len(entries), 10000):
+        write_audit_parts(entries[start:start + 10000])
+    return len(entries)
+
+def get_audit_journal():
+    """Return the process-wide audit journal with its flush thread running."""
+    global _audit_journal
+    if _audit_journal is None:
+        with _journal_lock:
+            if _audit_journal is None:
+                journal = AuditJournal()
+                journal.start()
+                _audit_journal = journal
+    return _audit_journal
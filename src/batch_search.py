@@ -0,0 +1,120 @@
+"""Search over batch ids for the batch picker."""
+
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+DEFAULT_PAGE_SIZE = 50
+MAX_CACHED_QUERIES = 64
+
+_search_lock = threading.Lock()
+_search_cache = {}
+
+
+class BatchSearchIndex:
+    """Sorted batch ids with prefix and substring search.
+
+    Prefix matches are two binary searches over the sorted ids. Substring
+    matches are a single scan over all ids joined into one string, mapped
+    back to ids with a binary search over their offsets. Filters are
+    boolean masks over the matching positions, and only the requested page
+    of ids is materialized as a list.
+    """
+
+    def __init__(self, catalog):
+        import numpy as np
+
+        latest = (catalog.assign(key=catalog['batch'].astype(str).str.upper())
+                  .sort_values(['key', 'version'], kind='stable')
+                  .drop_duplicates('batch', keep='last'))
+        self.batches = np.array(latest['batch'].astype(str).tolist(), dtype=object)
+        self._portal_statuses = latest['portal_status'].astype(str).to_numpy()
+        self.portal_statuses = sorted(set(self._portal_statuses.tolist()))
+        self._positions = {batch: i for i, batch in enumerate(self.batches.tolist())}
+
+        self._keys = latest['key'].tolist()
+        self._text = '\n'.join(self._keys)
+        lengths = np.fromiter((len(key) + 1 for key in self._keys), dtype=np.int64, count=len(self._keys))
+        self._offsets = (np.cumsum(lengths) - lengths).tolist()
+        self._lock = threading.Lock()
+        self._matches = OrderedDict()
+
+    def __len__(self):
+        return len(self.batches)
+
+    def match(self, query):
+        """Return positions of batches containing ``query``, case-insensitively.
+
+        Prefix matches come first, followed by the other substring matches,
+        each in sorted order.
+
+        Returns:
+            np.ndarray: Positions into ``batches``
+        """
+        import numpy as np
+
+        query = query.strip().upper()
+        if not query:
+            return np.arange(len(self.batches))
+        with self._lock:
+            positions = self._matches.get(query)
+            if positions is not None:
+                self._matches.move_to_end(query)
+                return positions
+
+        start = bisect_left(self._keys, query)
+        end = bisect_left(self._keys, query + '\uffff', lo=start)
+        hits = np.fromiter((bisect_right(self._offsets, m.start()) - 1
+                            for m in re.finditer(re.escape(query), self._text)), dtype=np.int64)
+        hits = np.unique(hits)
+        others = hits[(hits < start) | (hits >= end)]
+        positions = np.concatenate([np.arange(start, end, dtype=np.int64), others])
+
+        with self._lock:
+            self._matches[query] = positions
+            while len(self._matches) > MAX_CACHED_QUERIES:
+                self._matches.popitem(last=False)
+        return positions
+
+    def search(self, query='', portal_status=None, reviewed=None, reviewed_batches=(),
+               page=0, page_size=DEFAULT_PAGE_SIZE):
+        """Return one page of matching batches.
+
+        Args:
+            query (str): Prefix or substring of the batch id
+            portal_status (str): Only batches whose latest version has this status
+            reviewed (bool): Only reviewed (True) or unreviewed (False) batches
+            reviewed_batches (iterable): Batches that count as reviewed
+            page (int): Zero-based page number
+            page_size (int): Batches per page
+
+        Returns:
+            tuple: ``(batches, total)`` with the ids on the page and the
+            number of matches over all pages
+        """
+        import numpy as np
+
+        positions = self.match(query)
+        if portal_status is not None:
+            positions = positions[self._portal_statuses[positions] == portal_status]
+        if reviewed is not None:
+            mask = np.zeros(len(self.batches), dtype=bool)
+            mask[[self._positions[b] for b in reviewed_batches if b in self._positions]] = True
+            positions = positions[mask[positions] == reviewed]
+        start = page * page_size
+        return self.batches[positions[start:start + page_size]].tolist(), len(positions)
+
+def get_batch_search(catalog):
+    """Return the ``BatchSearchIndex`` of a catalog, built once per catalog."""
+    entry = _search_cache.get(id(catalog))
+    if entry is not None and entry[0] is catalog:
+        return entry[1]
+    with _search_lock:
+        entry = _search_cache.get(id(catalog))
+        if entry is None or entry[0] is not catalog:
+            # Only the current catalog is searched; drop older builds
+            _search_cache.clear()
+            entry = (catalog, BatchSearchIndex(catalog))
+            _search_cache[id(catalog)] = entry
+    return entry[1]
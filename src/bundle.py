@@ -0,0 +1,201 @@
+"""Streaming ZIP export of whole batches."""
+
+import io
+import os
+import threading
+import zipfile
+from datetime import datetime
+
+from audit import audit_trail_csv
+from catalog import DOC_TYPES
+from s3_utils import get_s3_client, get_bucket_name, get_full_s3_key
+
+BUNDLE_PREFIX = 'exports/bundles'
+LOCAL_DOCUMENTS_DIR = 'static/documents'
+# Bytes read from a document per step; bounds memory together with the part size.
+CHUNK_SIZE = 1024 * 1024
+# S3 requires at least 5 MB per part, except for the last one.
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+
+
+class MultipartUploadWriter(io.RawIOBase):
+    """Write-only stream that uploads to S3 in multipart chunks.
+
+    At most one part is held in memory. ``close`` completes the upload;
+    ``abort`` discards it.
+    """
+
+    def __init__(self, relative_key, part_size=DEFAULT_PART_SIZE, content_type='application/zip'):
+        super().__init__()
+        self.part_size = part_size
+        self.bytes_written = 0
+        self._client = get_s3_client()
+        self._bucket_name = get_bucket_name()
+        self._key = get_full_s3_key(relative_key)
+        self._upload_id = self._client.create_multipart_upload(
+            Bucket=self._bucket_name, Key=self._key, ContentType=content_type)['UploadId']
+        self._buffer = bytearray()
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def _upload_part(self, body):
+        number = len(self._parts) + 1
+        response = self._client.upload_part(Bucket=self._bucket_name, Key=self._key, PartNumber=number,
+                                            UploadId=self._upload_id, Body=bytes(body))
+        self._parts.append({'ETag': response['ETag'], 'PartNumber': number})
+
+    def close(self):
+        if self.closed:
+            return
+        if self._buffer or not self._parts:
+            self._upload_part(self._buffer)
+            self._buffer = bytearray()
+        self._client.complete_multipart_upload(Bucket=self._bucket_name, Key=self._key,
+                                               UploadId=self._upload_id,
+                                               MultipartUpload={'Parts': self._parts})
+        super().close()
+
+    def abort(self):
+        """Discard the upload and every part sent so far."""
+        if not self.closed:
+            self._client.abort_multipart_upload(Bucket=self._bucket_name, Key=self._key,
+                                                UploadId=self._upload_id)
+            self._buffer = bytearray()
+            super().close()
+
+def bundle_entries(index, batches, doc_types=DOC_TYPES):
+    """List every version of ``batches`` as ``(archive name, S3 key)`` pairs.
+
+    Documents are filed as ``{batch}/{doc_type}/{filename}`` in the archive.
+    """
+    entries = []
+    for batch in batches:
+        for doc_type in doc_types:
+            for version in index.versions(batch, doc_type):
+                row = index.row(batch, doc_type, version)
+                if row:
+                    filename = os.path.basename(row['file_path'])
+                    entries.append((f"{batch}/{doc_type}/{filename}", row['file_path']))
+    return entries
+
+def _document_chunks(relative_key):
+    """Yield a document's bytes from S3, or from the local fallback copy.
+
+    The local copy is only used when S3 has no such object or no bucket is
+    configured; other S3 errors, such as denied access, are raised.
+    """
+    from botocore.exceptions import ClientError
+
+    try:
+        response = get_s3_client().get_object(Bucket=get_bucket_name(), Key=get_full_s3_key(relative_key))
+    except (ClientError, ValueError) as e:
+        if isinstance(e, ClientError) and e.response.get('Error', {}).get('Code') not in ('NoSuchKey', '404'):
+            raise
+        local_path = os.path.join(LOCAL_DOCUMENTS_DIR, relative_key)
+        if not os.path.exists(local_path):
+            raise FileNotFoundError(relative_key)
+        with open(local_path, 'rb') as f:
+            yield from iter(lambda: f.read(CHUNK_SIZE), b'')
+        return
+    yield from response['Body'].iter_chunks(CHUNK_SIZE)
+
+def write_bundle(fileobj, entries, audit_rows=None, progress=None):
+    """Stream a ZIP of documents and their audit rows into ``fileobj``.
+
+    ``fileobj`` only needs ``write``; it can be a file, a response stream
+    or a ``MultipartUploadWriter``. Documents are copied chunk by chunk and
+    stored uncompressed (PDFs are already compressed), so memory use does
+    not depend on the bundle size.
+
+    Args:
+        fileobj: Writable binary stream
+        entries (list): ``(archive name, S3 key)`` pairs
+        audit_rows (list): Audit entries written as ``audit_trail.csv``
+        progress (callable): Called as ``progress(done, total)`` after each entry
+
+    Returns:
+        dict: ``documents`` written, ``missing`` keys and document ``bytes``
+    """
+    summary = {'documents': 0, 'missing': [], 'bytes': 0}
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as bundle:
+        for done, (arcname, relative_key) in enumerate(entries, start=1):
+            chunks = _document_chunks(relative_key)
+            try:
+                first = next(chunks, b'')
+            except FileNotFoundError:
+                summary['missing'].append(relative_key)
+            else:
+                with bundle.open(arcname, 'w', force_zip64=True) as member:
+                    member.write(first)
+                    summary['bytes'] += len(first)
+                    for chunk in chunks:
+                        member.write(chunk)
+                        summary['bytes'] += len(chunk)
+                summary['documents'] += 1
+            if progress is not None:
+                progress(done, len(entries))
+        if audit_rows:
+            bundle.writestr('audit_trail.csv', audit_trail_csv(audit_rows))
+        if summary['missing']:
+            bundle.writestr('MISSING.txt', '\n'.join(summary['missing']) + '\n')
+    return summary
+
+def export_bundle(index, batches, audit_rows=None, relative_key=None, part_size=DEFAULT_PART_SIZE, progress=None):
+    """Export a bundle of ``batches`` to S3 through a multipart upload.
+
+    Args:
+        index (CatalogIndex): Catalog index used to find the documents
+        batches (list): Batches to include
+        audit_rows (list): Audit entries to include
+        relative_key (str): Target key; defaults to a timestamped key
+            below ``exports/bundles/``
+        part_size (int): Multipart part size in bytes
+        progress (callable): Passed on to ``write_bundle``
+
+    Returns:
+        tuple: ``(relative_key, summary)`` with the ``write_bundle`` summary
+    """
+    if relative_key is None:
+        name = batches[0] if len(batches) == 1 else f"{len(batches)}-batches"
+        relative_key = f"{BUNDLE_PREFIX}/{datetime.now().strftime('%Y%m%dT%H%M%S')}-{name}.zip"
+    writer = MultipartUploadWriter(relative_key, part_size)
+    try:
+        summary = write_bundle(writer, bundle_entries(index, batches), audit_rows, progress)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return relative_key, summary
+
+def start_export(index, batches, audit_rows=None):
+    """Run ``export_bundle`` in a background thread.
+
+    Returns:
+        dict: The job. ``done`` and ``total`` count documents while it runs;
+        afterwards ``key`` and ``summary`` are set, or ``error`` if it
+        failed. ``thread`` is the worker.
+    """
+    job = {'batches': list(batches), 'done': 0, 'total': 0, 'key': None, 'summary': None, 'error': None}
+
+    def progress(done, total):
+        job['done'], job['total'] = done, total
+
+    def run():
+        try:
+            job['key'], job['summary'] = export_bundle(index, batches, audit_rows, progress=progress)
+        except Exception as e:
+            job['error'] = e
+
+    job['thread'] = threading.Thread(target=run, name='bundle-export', daemon=True)
+    job['thread'].start()
+    return job
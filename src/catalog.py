@@ -0,0 +1,361 @@
+"""Document catalog construction for the review system."""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+MANUAL_REVIEW_PATH = "data/Manual_Review.csv"
+# Written by scripts/sync_inventory.py; used as the catalog source if present
+INVENTORY_PATH = "data/inventory.csv"
+# Written by the preparation flow; read instead of rebuilding the catalog
+# when it was built from the current source files
+CATALOG_SNAPSHOT_PATH = "data/catalog_snapshot.parquet"
+DOC_TYPES = ['CI', 'PL']
+# Stored columns; file paths and filenames are derived from them on access
+CATALOG_COLUMNS = ['batch', 'type', 'version', 'portal_status', 'reason']
+# Layout of the catalog before it was compacted, produced by ``expand_catalog``
+EXPANDED_COLUMNS = ['batch', 'type', 'version', 'file_path', 'filename',
+                    'timestamp', 'portal_status', 'reason']
+
+_catalog_lock = threading.Lock()
+_catalog_cache = {}
+
+
+class CatalogIndex:
+    """Lookup structure over a catalog, built once per catalog.
+
+    Rows are sorted by batch, type and version and each ``(batch, type)``
+    group is stored as a slice, so version lists, single rows and the batch
+    list are served without scanning the catalog.
+    """
+
+    def __init__(self, catalog):
+        import numpy as np
+
+        ordered = catalog.sort_values(['batch', 'type', 'version'], kind='stable')
+        batches = ordered['batch'].to_numpy(dtype=object)
+        types = ordered['type'].to_numpy(dtype=object)
+        self._versions = ordered['version'].to_numpy()
+        self._statuses = ordered['portal_status'].to_numpy(dtype=object)
+        self._reasons = ordered['reason'].to_numpy(dtype=object)
+
+        size = len(ordered)
+        boundary = np.ones(size, dtype=bool)
+        if size:
+            boundary[1:] = (batches[1:] != batches[:-1]) | (types[1:] != types[:-1])
+        starts = np.flatnonzero(boundary)
+        ends = np.append(starts[1:], size)
+        self._groups = {
+            (batch, doc_type): (start, end)
+            for batch, doc_type, start, end in zip(batches[starts].tolist(), types[starts].tolist(),
+                                                   starts.tolist(), ends.tolist())
+        }
+        self._version_lists = {}
+        self.batches = list(dict.fromkeys(batches[starts].tolist()))
+        self._batch_positions = {batch: i for i, batch in enumerate(self.batches)}
+
+    def versions(self, batch, doc_type):
+        """Return the sorted, distinct versions of one batch and type."""
+        key = (batch, doc_type)
+        versions = self._version_lists.get(key)
+        if versions is None:
+            start, end = self._groups.get(key, (0, 0))
+            versions = list(dict.fromkeys(self._versions[start:end].tolist()))
+            self._version_lists[key] = versions
+        return versions
+
+    def row(self, batch, doc_type, version):
+        """Return ``file_path``, ``portal_status`` and ``reason`` of a version.
+
+        Returns:
+            dict: The row's fields, or None if the version does not exist
+        """
+        import numpy as np
+
+        start, end = self._groups.get((batch, doc_type), (0, 0))
+        position = start + int(np.searchsorted(self._versions[start:end], version))
+        if position >= end or self._versions[position] != version:
+            return None
+        return {
+            'file_path': f"{doc_type}/{batch}/{batch}_{version}.pdf",
+            'portal_status': self._statuses[position],
+            'reason': self._reasons[position],
+        }
+
+    def latest_statuses(self):
+        """Return the portal status of the latest version of every ``(batch, type)``.
+
+        Returns:
+            dict: ``(batch, type)`` to status, sorted by batch and type
+        """
+        return {key: self._statuses[end - 1] for key, (_, end) in self._groups.items()}
+
+    def next_batch(self, batch):
+        """Return the batch after ``batch`` in sorted order, or None."""
+        position = self._batch_positions.get(batch)
+        if position is None or position + 1 >= len(self.batches):
+            return None
+        return self.batches[position + 1]
+
+def demo_batches():
+    """Return the demo review data used when no CSV is available."""
+    import pandas as pd
+
+    data = {
+        'Batch': ['B001', 'B001', 'B002', 'B002', 'B003', 'B003'],
+        'batch_count': [1, 2, 1, 2, 1, 2],
+        'portal_status': ['Pending', 'Accepted', 'Rejected', 'Pending', 'Accepted', 'In Review'],
+        'reason': ['', 'Approved by agent', 'Missing information', '', 'Complete documentation', 'Waiting for verification']
+    }
+    return pd.DataFrame(data)
+
+def compact_catalog(batch, doc_type, version, portal_status, reason, timestamp):
+    """Assemble catalog columns into the compact catalog layout.
+
+    Repeated strings become categoricals (batch categories are sorted, so
+    sorting by batch sorts by name), versions the smallest fitting integer
+    type, and the build timestamp, shared by all rows, is kept in
+    ``attrs['timestamp']`` instead of a column.
+
+    Returns:
+        pd.DataFrame: Catalog with the columns in ``CATALOG_COLUMNS``
+    """
+    import numpy as np
+    import pandas as pd
+
+    batch = pd.Series(batch).astype(str).reset_index(drop=True)
+    version = pd.Series(version).astype('int64').reset_index(drop=True)
+    small = version.empty or version.max() <= np.iinfo(np.int16).max
+    catalog = pd.DataFrame({
+        'batch': pd.Categorical(batch, categories=np.sort(batch.unique())),
+        'type': pd.Categorical(pd.Series(doc_type).reset_index(drop=True), categories=DOC_TYPES),
+        'version': version.astype(np.int16 if small else np.int32),
+        'portal_status': pd.Series(portal_status).astype(str).astype('category').reset_index(drop=True),
+        'reason': pd.Series(reason).astype(str).astype('category').reset_index(drop=True),
+    }, columns=CATALOG_COLUMNS)
+    catalog.attrs['timestamp'] = timestamp
+    return catalog
+
+def catalog_file_paths(catalog):
+    """Return the relative S3 key of every catalog row."""
+    return (catalog['type'].astype(str) + '/' + catalog['batch'].astype(str) + '/' +
+            catalog_filenames(catalog))
+
+def catalog_filenames(catalog):
+    """Return the PDF filename of every catalog row."""
+    return catalog['batch'].astype(str) + '_' + catalog['version'].astype(str) + '.pdf'
+
+def expand_catalog(catalog):
+    """Return the catalog with derived columns materialized as plain objects.
+
+    This is the layout the catalog had before it was compacted, for exports
+    and for comparing memory use.
+
+    Returns:
+        pd.DataFrame: Catalog with the columns in ``EXPANDED_COLUMNS``
+    """
+    import pandas as pd
+
+    return pd.DataFrame({
+        'batch': catalog['batch'].astype(object),
+        'type': catalog['type'].astype(object),
+        'version': catalog['version'].astype('int64'),
+        'file_path': catalog_file_paths(catalog),
+        'filename': catalog_filenames(catalog),
+        'timestamp': catalog.attrs.get('timestamp'),
+        'portal_status': catalog['portal_status'].astype(object),
+        'reason': catalog['reason'].astype(object),
+    }, columns=EXPANDED_COLUMNS)
+
+def build_catalog(df_batches, timestamp=None):
+    """Expand review rows into one catalog row per document type.
+
+    Every source row yields a CI and a PL entry, in that order. All columns
+    are built with vectorized operations.
+
+    Args:
+        df_batches (pd.DataFrame): Rows with ``Batch`` and ``batch_count``
+            and optionally ``portal_status`` and ``reason``
+        timestamp (str): Build timestamp; defaults to the current time
+
+    Returns:
+        pd.DataFrame: Compact catalog, see ``compact_catalog``
+    """
+    import numpy as np
+
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    rows = len(df_batches)
+    source = np.repeat(np.arange(rows), len(DOC_TYPES))
+
+    def column(name, default):
+        if name in df_batches:
+            return df_batches[name].iloc[source].fillna(default)
+        return np.full(len(source), default, dtype=object)
+
+    return compact_catalog(
+        batch=df_batches['Batch'].iloc[source],
+        doc_type=np.tile(np.array(DOC_TYPES, dtype=object), rows),
+        version=df_batches['batch_count'].iloc[source],
+        portal_status=column('portal_status', 'Unknown'),
+        reason=column('reason', ''),
+        timestamp=timestamp,
+    )
+
+def build_catalog_from_inventory(inventory, df_batches=None, timestamp=None):
+    """Build the catalog from the objects that actually exist in S3.
+
+    Keys of the form ``{type}/{batch}/{batch}_{version}.pdf`` become catalog
+    rows; anything else in the inventory is ignored. Portal status and
+    reason are joined from the review rows by batch and version.
+
+    Args:
+        inventory (pd.DataFrame): Inventory with a ``key`` column
+        df_batches (pd.DataFrame): Optional review rows for status and reason
+        timestamp (str): Build timestamp; defaults to the current time
+
+    Returns:
+        pd.DataFrame: Compact catalog, see ``compact_catalog``
+    """
+    import pandas as pd
+
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    types = '|'.join(DOC_TYPES)
+    parts = inventory['key'].str.extract(
+        rf'^(?P<type>{types})/(?P<batch>[^/]+)/(?P=batch)_(?P<version>\d+)\.pdf$'
+    ).dropna()
+    parts['version'] = parts['version'].astype('int64')
+
+    if df_batches is not None and {'Batch', 'batch_count'} <= set(df_batches.columns):
+        meta = pd.DataFrame({
+            'batch': df_batches['Batch'].astype(str),
+            'version': df_batches['batch_count'].astype('int64'),
+            'portal_status': df_batches.get('portal_status', 'Unknown'),
+            'reason': df_batches.get('reason', ''),
+        }).drop_duplicates(['batch', 'version'])
+        parts = parts.merge(meta, on=['batch', 'version'], how='left')
+    else:
+        parts['portal_status'] = None
+        parts['reason'] = None
+
+    parts['type'] = pd.Categorical(parts['type'], categories=DOC_TYPES)
+    parts = parts.sort_values(['batch', 'version', 'type'], kind='stable')
+    return compact_catalog(parts['batch'], parts['type'], parts['version'],
+                           parts['portal_status'].fillna('Unknown'), parts['reason'].fillna(''),
+                           timestamp)
+
+def file_key(path):
+    """Identify one version of a file by path, mtime and size."""
+    try:
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, stat.st_size)
+    except (OSError, TypeError):
+        return (None, 0, 0)
+
+def _catalog_key(path, inventory_path):
+    return (file_key(path), file_key(inventory_path))
+
+def load_catalog(path=MANUAL_REVIEW_PATH, inventory_path=INVENTORY_PATH,
+                 snapshot_path=CATALOG_SNAPSHOT_PATH):
+    """Return the catalog, memoized across reruns and sessions.
+
+    When an inventory file exists the catalog lists the documents found in
+    S3; otherwise it is derived from the review CSV. The cache is keyed on
+    each source file's path, mtime and size, so edited files are picked up
+    on the next call. A snapshot written by ``write_catalog_snapshot`` from
+    the same source files is loaded instead of rebuilding. The returned
+    DataFrame is shared between sessions; callers must not modify it in place.
+
+    Args:
+        path (str): Review CSV; the demo data is used if it does not exist
+        inventory_path (str): Inventory CSV written by ``sync_inventory``
+        snapshot_path (str): Catalog snapshot written by ``write_catalog_snapshot``
+
+    Returns:
+        pd.DataFrame: Document catalog
+    """
+    return _load_cached(_catalog_key(path, inventory_path), snapshot_path)[0]
+
+def load_catalog_index(path=MANUAL_REVIEW_PATH, inventory_path=INVENTORY_PATH,
+                       snapshot_path=CATALOG_SNAPSHOT_PATH):
+    """Return the ``CatalogIndex`` for the memoized catalog of ``path``."""
+    return _load_cached(_catalog_key(path, inventory_path), snapshot_path)[1]
+
+def write_catalog_snapshot(path=MANUAL_REVIEW_PATH, inventory_path=INVENTORY_PATH,
+                           snapshot_path=CATALOG_SNAPSHOT_PATH):
+    """Persist the catalog of the given sources for ``load_catalog``.
+
+    The snapshot is a Parquet file. It records the path, mtime and size of
+    the files it was built from in a ``.json`` sidecar and is ignored once
+    either of them changes.
+
+    Returns:
+        pd.DataFrame: The catalog that was written
+    """
+    key = _catalog_key(path, inventory_path)
+    catalog = _load_cached(key, None)[0]
+    os.makedirs(os.path.dirname(snapshot_path) or '.', exist_ok=True)
+    # Parquet keeps the categorical and integer types, so loading needs no parsing
+    catalog.to_parquet(f"{snapshot_path}.tmp", index=False)
+    os.replace(f"{snapshot_path}.tmp", snapshot_path)
+    with open(f"{snapshot_path}.json.tmp", 'w') as f:
+        json.dump([list(source) for source in key], f)
+    os.replace(f"{snapshot_path}.json.tmp", f"{snapshot_path}.json")
+    return catalog
+
+def read_catalog_snapshot(snapshot_path=CATALOG_SNAPSHOT_PATH, columns=CATALOG_COLUMNS):
+    """Read a catalog snapshot, loading only ``columns`` from disk.
+
+    Returns:
+        pd.DataFrame: Compact catalog restricted to ``columns``
+    """
+    import pandas as pd
+
+    return pd.read_parquet(snapshot_path, columns=list(columns))
+
+def _read_snapshot(key, snapshot_path):
+    """Return the snapshot at ``snapshot_path`` if it was built from ``key``."""
+    try:
+        with open(f"{snapshot_path}.json", 'r') as f:
+            sources = json.load(f)
+        if sources != [list(source) for source in key]:
+            return None
+        return read_catalog_snapshot(snapshot_path)
+    except (OSError, TypeError, ValueError):
+        return None
+
+def _load_cached(key, snapshot_path):
+    """Return ``(catalog, index)`` for a source key, building on a miss."""
+    entry = _catalog_cache.get(key)
+    if entry is not None:
+        return entry
+    with _catalog_lock:
+        entry = _catalog_cache.get(key)
+        if entry is None:
+            csv_key, inventory_key = key
+            catalog = _read_snapshot(key, snapshot_path) if snapshot_path else None
+            if catalog is None:
+                import pandas as pd
+
+                df_batches = pd.read_csv(csv_key[0]) if csv_key[0] is not None else None
+                if inventory_key[0] is not None:
+                    inventory = pd.read_csv(inventory_key[0], usecols=['key'], dtype={'key': str})
+                    catalog = build_catalog_from_inventory(inventory, df_batches)
+                else:
+                    catalog = build_catalog(df_batches if df_batches is not None else demo_batches())
+            entry = (catalog, CatalogIndex(catalog))
+            # Keep only the newest build per pair of source paths
+            sources = (csv_key[0], inventory_key[0])
+            for old_key in [k for k in _catalog_cache if (k[0][0], k[1][0]) == sources]:
+                del _catalog_cache[old_key]
+            _catalog_cache[key] = entry
+        return entry
+
+def invalidate_catalog():
+    """Drop every memoized catalog so the next load rebuilds it."""
+    with _catalog_lock:
+        _catalog_cache.clear()
@@ -0,0 +1,169 @@
+"""Content fingerprints of document versions."""
+
+import hashlib
+import threading
+
+from catalog import INVENTORY_PATH, file_key
+from page_diff import content_hash, rasterize_pages
+from s3_utils import get_s3_client, get_bucket_name, get_full_s3_key
+from sidecars import DEFAULT_WORKERS, read_rows, update_sidecars, write_rows
+
+# Written by scripts/update_fingerprints.py and read by the app
+FINGERPRINTS_PATH = "data/fingerprints.csv"
+FINGERPRINT_COLUMNS = ['key', 'etag', 'size', 'byte_hash', 'text_hash', 'page_hashes']
+# Page hashes differing in at most this many of 64 bits count as the same page.
+PAGE_HASH_DISTANCE = 4
+
+IDENTICAL = 'identical'
+TEXT_IDENTICAL = 'text-identical'
+CHANGED = 'changed'
+
+_index_lock = threading.Lock()
+_index_cache = {}
+
+
+def page_hash(page):
+    """Return a 64-bit difference hash of a rasterized page as hex.
+
+    Pages without a raster are identified by their content stream instead;
+    those hashes start with ``c`` and only ever match exactly.
+    """
+    if page['raster'] is None:
+        return 'c' + page['content'][:16]
+    import numpy as np
+    from PIL import Image
+
+    small = np.asarray(Image.fromarray(page['raster']).resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}"
+
+def fingerprint_pdf(pdf_bytes):
+    """Fingerprint one document.
+
+    Returns:
+        dict: ``byte_hash`` (MD5 of the file), ``text_hash`` (MD5 of the
+        shown text, or "" if there is none) and ``page_hashes`` (one
+        ``page_hash`` per page, space separated)
+    """
+    pages = rasterize_pages(pdf_bytes)
+    text = '\n'.join(page['text'] for page in pages)
+    return {
+        'byte_hash': content_hash(pdf_bytes),
+        'text_hash': hashlib.md5(text.encode('utf-8')).hexdigest() if text.strip() else '',
+        'page_hashes': ' '.join(page_hash(page) for page in pages),
+    }
+
+def _pages_match(old_hashes, new_hashes):
+    if not old_hashes or len(old_hashes) != len(new_hashes):
+        return False
+    for old, new in zip(old_hashes, new_hashes):
+        if old.startswith('c') or new.startswith('c'):
+            if old != new:
+                return False
+        elif bin(int(old, 16) ^ int(new, 16)).count('1') > PAGE_HASH_DISTANCE:
+            return False
+    return True
+
+def classify_pair(old, new):
+    """Label how two fingerprinted versions differ.
+
+    Args:
+        old (dict): Fingerprint of the earlier version
+        new (dict): Fingerprint of the later version
+
+    Returns:
+        str: ``identical`` for the same bytes, ``text-identical`` for the
+        same text (or, for documents without a text layer such as scans,
+        pages that look the same), otherwise ``changed``
+    """
+    if old['byte_hash'] == new['byte_hash']:
+        return IDENTICAL
+    if old['text_hash'] or new['text_hash']:
+        return TEXT_IDENTICAL if old['text_hash'] == new['text_hash'] else CHANGED
+    if _pages_match(old['page_hashes'].split(), new['page_hashes'].split()):
+        return TEXT_IDENTICAL
+    return CHANGED
+
+
+class FingerprintIndex:
+    """Fingerprints by S3 key, loaded from the fingerprint file."""
+
+    def __init__(self, fingerprints):
+        self._by_key = {
+            row['key']: row
+            for row in fingerprints[['key', 'etag', 'byte_hash', 'text_hash', 'page_hashes']].to_dict('records')
+        }
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def get(self, relative_key):
+        """Return the fingerprint of a document, or None if it has none yet."""
+        return self._by_key.get(relative_key)
+
+    def etag(self, relative_key):
+        """Return the ETag a document was fingerprinted at, or None."""
+        row = self._by_key.get(relative_key)
+        return row['etag'] if row is not None else None
+
+    def label(self, old_key, new_key):
+        """Return the ``classify_pair`` label of two documents, or None if
+        either has not been fingerprinted."""
+        old, new = self._by_key.get(old_key), self._by_key.get(new_key)
+        if old is None or new is None:
+            return None
+        return classify_pair(old, new)
+
+def read_fingerprints(path=FINGERPRINTS_PATH):
+    """Load the fingerprint file, or an empty frame if none exists."""
+    return read_rows(path, FINGERPRINT_COLUMNS)
+
+def load_fingerprint_index(path=FINGERPRINTS_PATH):
+    """Return the ``FingerprintIndex`` of ``path``, reloaded when the file changes."""
+    key = file_key(path)
+    index = _index_cache.get(key)
+    if index is None:
+        with _index_lock:
+            index = _index_cache.get(key)
+            if index is None:
+                index = FingerprintIndex(read_fingerprints(path))
+                _index_cache.clear()
+                _index_cache[key] = index
+    return index
+
+def fingerprint_object(relative_key):
+    """Download and fingerprint one document.
+
+    Returns:
+        dict: A fingerprint row with the columns in ``FINGERPRINT_COLUMNS``
+    """
+    response = get_s3_client().get_object(Bucket=get_bucket_name(), Key=get_full_s3_key(relative_key))
+    body = response['Body'].read()
+    return {
+        'key': relative_key,
+        'etag': response.get('ETag', '').strip('"'),
+        'size': str(len(body)),
+        **fingerprint_pdf(body),
+    }
+
+def write_fingerprints(rows, path=FINGERPRINTS_PATH):
+    """Replace the fingerprint file with ``rows``."""
+    write_rows(rows, path, FINGERPRINT_COLUMNS)
+
+def update_fingerprints(path=FINGERPRINTS_PATH, keys=None, inventory_path=INVENTORY_PATH,
+                        workers=DEFAULT_WORKERS):
+    """Fingerprint documents that are new or changed since the last run.
+
+    See ``sidecars.update_sidecars`` for which documents are downloaded again.
+
+    Args:
+        path (str): Fingerprint CSV to update
+        keys (list): Relative keys to cover; defaults to the catalog's documents
+        inventory_path (str): Inventory CSV with the current ETags
+        workers (int): Documents fingerprinted concurrently
+
+    Returns:
+        dict: Summary with ``documents``, ``updated``, ``reused``,
+        ``failed`` and ``seconds``
+    """
+    return update_sidecars(path, FINGERPRINT_COLUMNS, fingerprint_object, keys, inventory_path, workers)
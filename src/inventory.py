@@ -0,0 +1,203 @@
+"""Paginated, parallel S3 inventory of the review documents."""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import DOC_TYPES, INVENTORY_PATH
+from s3_utils import get_s3_client, get_bucket_name, get_s3_config
+
+INVENTORY_COLUMNS = ['key', 'etag', 'size', 'last_modified', 'shard']
+DEFAULT_WORKERS = 16
+# Keys per listing request; S3 returns at most 1000
+PAGE_KEYS = 1000
+# Ranges are split to this many keys, so a range still fits one page after it grows a little
+RANGE_KEYS = 900
+# The first run cuts each document type into this many ranges per worker
+RANGES_PER_WORKER = 4
+
+
+def iter_objects(prefix, delimiter=None):
+    """Yield every page of a ``list_objects_v2`` listing.
+
+    Args:
+        prefix (str): Relative prefix below the base prefix
+        delimiter (str): Optional delimiter to group keys into prefixes
+
+    Yields:
+        dict: One ``list_objects_v2`` response page
+    """
+    params = {
+        'Bucket': get_bucket_name(),
+        'Prefix': f"{get_s3_config()['base_prefix']}{prefix}",
+    }
+    if delimiter:
+        params['Delimiter'] = delimiter
+    paginator = get_s3_client().get_paginator('list_objects_v2')
+    yield from paginator.paginate(**params)
+
+def discover_shards(doc_types=DOC_TYPES, workers=DEFAULT_WORKERS):
+    """List the batch folders below each document type prefix.
+
+    Only the first sync needs them, to cut each document type into key
+    ranges at folder boundaries.
+
+    Returns:
+        list: Sorted relative folder prefixes
+    """
+    base_len = len(get_s3_config()['base_prefix'])
+
+    def shards_of(doc_type):
+        found = []
+        for page in iter_objects(f"{doc_type}/", delimiter='/'):
+            found.extend(p['Prefix'][base_len:] for p in page.get('CommonPrefixes', []))
+        return found
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(doc_types)))) as pool:
+        return sorted(shard for shards in pool.map(shards_of, doc_types) for shard in shards)
+
+def plan_ranges(folders, doc_types=DOC_TYPES, count=DEFAULT_WORKERS * RANGES_PER_WORKER):
+    """Cut each document type into about ``count`` key ranges at folder boundaries.
+
+    A range holds the keys after its ``start`` up to and including its
+    ``end``; the last range of a document type has no ``end``.
+
+    Returns:
+        list: ``{'start', 'end'}`` dicts in key order
+    """
+    ranges = []
+    for doc_type in doc_types:
+        own = [folder for folder in folders if folder.startswith(f"{doc_type}/")]
+        step = max(1, -(-len(own) // max(1, count)))
+        bounds = [f"{doc_type}/"] + own[step::step]
+        ranges.extend({'start': start, 'end': end} for start, end in zip(bounds, bounds[1:] + [None]))
+    return ranges
+
+def _records(page, shard, base_len):
+    return [{
+        'key': obj['Key'][base_len:],
+        'etag': obj.get('ETag', '').strip('"'),
+        'size': obj.get('Size', 0),
+        'last_modified': obj['LastModified'].isoformat() if obj.get('LastModified') else '',
+        'shard': shard,
+    } for obj in page.get('Contents', [])]
+
+def list_range(start, end=None, max_keys=PAGE_KEYS):
+    """List the keys after ``start`` up to and including ``end``.
+
+    A range of up to ``max_keys`` objects costs one request; larger ones
+    continue page by page.
+
+    Returns:
+        tuple: Inventory records of the range and the number of requests
+    """
+    config = get_s3_config()
+    base = config['base_prefix']
+    params = {'Bucket': get_bucket_name(), 'Prefix': f"{base}{start.split('/', 1)[0]}/",
+              'StartAfter': f"{base}{start}", 'MaxKeys': max_keys}
+    records, requests = [], 0
+    while True:
+        page = get_s3_client().list_objects_v2(**params)
+        requests += 1
+        page_records = _records(page, start, len(base))
+        records.extend(record for record in page_records if end is None or record['key'] <= end)
+        if not page.get('IsTruncated') or (end is not None and page_records and page_records[-1]['key'] > end):
+            return records, requests
+        params['ContinuationToken'] = page['NextContinuationToken']
+
+def _split(records, range_keys):
+    """Split a range's records into ranges of at most ``range_keys`` keys."""
+    return [records[i:i + range_keys] for i in range(0, len(records), range_keys)] or [[]]
+
+def _signature(records):
+    """Return what tells a range's listings apart: its object count and a digest of keys and ETags."""
+    digest = hashlib.md5()
+    for record in records:
+        digest.update(f"{record['key']}\0{record['etag']}\n".encode('utf-8'))
+    return {'objects': len(records), 'digest': digest.hexdigest()}
+
+def read_inventory(path=INVENTORY_PATH):
+    """Load a persisted inventory, or an empty one if none exists."""
+    import pandas as pd
+
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=INVENTORY_COLUMNS)
+    return pd.read_csv(path, dtype={'key': str, 'etag': str, 'last_modified': str, 'shard': str},
+                       keep_default_na=False)
+
+def _state_path(path):
+    return f"{path}.ranges.json"
+
+def sync_inventory(path=INVENTORY_PATH, doc_types=DOC_TYPES, workers=DEFAULT_WORKERS,
+                   range_keys=RANGE_KEYS, force=False):
+    """Refresh the local inventory by listing its key ranges in parallel.
+
+    The inventory is cut into ranges of at most ``range_keys`` keys, so
+    each range is checked with a single ``list_objects_v2`` request and all
+    of them run concurrently. A range whose object count or digest of keys
+    and ETags differs from the last run counts as changed; a range that
+    outgrew one page is listed to its end and split. The first run, or
+    ``force``, cuts each document type into ranges at batch folder boundaries.
+
+    Args:
+        path (str): CSV file the inventory is persisted to
+        doc_types (list): Top-level prefixes to inventory
+        workers (int): Number of concurrent listings
+        range_keys (int): Keys per range after a split
+        force (bool): Cut the ranges again from the batch folders
+
+    Returns:
+        dict: Summary with range, request, object and timing counts
+    """
+    import pandas as pd
+
+    start = time.perf_counter()
+    state = {}
+    if os.path.exists(_state_path(path)) and not force:
+        with open(_state_path(path), 'r') as f:
+            state = json.load(f)
+    known = [r for r in state.get('ranges', []) if r['start'].split('/', 1)[0] in doc_types]
+    planned = {r['start'].split('/', 1)[0] for r in known}
+    missing = [doc_type for doc_type in doc_types if doc_type not in planned]
+    ranges = known
+    if missing:
+        ranges += plan_ranges(discover_shards(missing, workers), missing, workers * RANGES_PER_WORKER)
+    ranges.sort(key=lambda r: r['start'])
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        listings = list(pool.map(lambda r: list_range(r['start'], r.get('end')), ranges))
+
+    kept, records, changed, split, requests = [], [], 0, 0, 0
+    for old, (listed, pages) in zip(ranges, listings):
+        requests += pages
+        parts = _split(listed, range_keys)
+        if len(parts) > 1:
+            split += 1
+        # A split range ends at the last key of each part but the final one
+        bounds = [old['start']] + [part[-1]['key'] for part in parts[:-1]] + [old.get('end')]
+        for part, part_start, part_end in zip(parts, bounds, bounds[1:]):
+            signature = _signature(part)
+            if {k: old.get(k) for k in signature} != signature:
+                changed += 1
+            kept.append({'start': part_start, 'end': part_end, **signature})
+            records.extend({**record, 'shard': part_start} for record in part)
+
+    inventory = pd.DataFrame(records, columns=INVENTORY_COLUMNS).sort_values('key', kind='stable')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    inventory.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    with open(f"{_state_path(path)}.tmp", 'w') as f:
+        json.dump({'ranges': kept}, f)
+    os.replace(f"{_state_path(path)}.tmp", _state_path(path))
+
+    return {
+        'ranges': len(kept),
+        'requests': requests,
+        'changed': changed,
+        'split': split,
+        'objects': len(inventory),
+        'seconds': time.perf_counter() - start,
+    }
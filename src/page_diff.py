@@ -0,0 +1,450 @@
+"""Visual page differences between document versions."""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from io import BytesIO
+
+DIFF_CACHE_DIR = os.environ.get('DOC_REVIEW_DIFF_DIR', '.cache/diffs')
+# Pages are compared at this raster width; height follows the aspect ratio.
+DIFF_WIDTH = 600
+# Grey-level difference below which a pixel counts as unchanged.
+PIXEL_THRESHOLD = 40
+# Changed pixels are grouped into square blocks of this size for boxes.
+BLOCK_SIZE = 12
+# Pages whose share of changed pixels is below this are unchanged.
+MIN_CHANGE_SCORE = 0.0005
+MAX_CACHED_DOCUMENTS = 64
+MAX_CACHED_DIFFS = 1024
+# Raised by zlib and Pillow for image streams that cannot be decoded; see _decode_errors
+_DECODE_ERRORS = (zlib.error, OSError, ValueError, SyntaxError)
+
+_OBJ_HEADER_RE = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+_STREAM_RE = re.compile(rb'stream\r?\n')
+_LENGTH_RE = re.compile(rb'/Length\s+(\d+)(?!\s+\d+\s+R)')
+_MEDIABOX_RE = re.compile(rb'/MediaBox\s*\[\s*([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s*\]')
+_CONTENTS_RE = re.compile(rb'/Contents\s*(\[[^\]]*\]|\d+\s+\d+\s+R)')
+_INT_RE = rb'(\d+)'
+_TEXT_BLOCK_RE = re.compile(rb'\bBT\b(.*?)\bET\b', re.S)
+# A literal ``(...)`` string or a hex ``<...>`` string, but not a ``<<`` dictionary
+_STRING_RE = re.compile(rb'\(((?:\\.|[^\\()])*)\)|(?<!<)<([0-9A-Fa-f\s]*)>', re.S)
+_ESCAPE_RE = re.compile(rb'\\([()\\])')
+
+_pages_lock = threading.Lock()
+_pages_cache = OrderedDict()
+_diff_lock = threading.Lock()
+_diff_cache = OrderedDict()
+
+
+def content_hash(pdf_bytes):
+    """Return the MD5 hex digest of a document.
+
+    This matches the S3 ETag of objects uploaded in a single part.
+    """
+    return hashlib.md5(pdf_bytes).hexdigest()
+
+def _parse_objects(pdf_bytes):
+    """Map object numbers to ``(dictionary, stream)`` byte strings."""
+    objects = {}
+    position = 0
+    while True:
+        header = _OBJ_HEADER_RE.search(pdf_bytes, position)
+        if header is None:
+            break
+        start = header.end()
+        end = pdf_bytes.find(b'endobj', start)
+        if end < 0:
+            break
+        body = pdf_bytes[start:end]
+        stream = None
+        stream_match = _STREAM_RE.search(body)
+        if stream_match is not None:
+            head = body[:stream_match.start()]
+            data_start = start + stream_match.end()
+            length = _LENGTH_RE.search(head)
+            if length is not None:
+                stream = pdf_bytes[data_start:data_start + int(length.group(1))]
+                end = pdf_bytes.find(b'endobj', data_start + len(stream))
+                if end < 0:
+                    break
+            else:
+                stream_end = pdf_bytes.find(b'endstream', data_start)
+                stream = pdf_bytes[data_start:stream_end].rstrip(b'\r\n')
+            body = head
+        objects[int(header.group(1))] = (body, stream)
+        position = end + len(b'endobj')
+    return objects
+
+def _ref(body, name):
+    match = re.search(rb'/' + name + rb'\s+' + _INT_RE + rb'\s+\d+\s+R', body)
+    return int(match.group(1)) if match else None
+
+def _refs(body):
+    return [int(n) for n in re.findall(_INT_RE + rb'\s+\d+\s+R', body)]
+
+def _sub_dict(body, name):
+    """Return the inline ``<< ... >>`` value of ``/name`` or None."""
+    match = re.search(rb'/' + name + rb'\s*<<', body)
+    if match is None:
+        return None
+    depth, position = 1, match.end()
+    while depth and position < len(body):
+        if body.startswith(b'<<', position):
+            depth += 1
+            position += 2
+        elif body.startswith(b'>>', position):
+            depth -= 1
+            position += 2
+        else:
+            position += 1
+    return body[match.end():position - 2]
+
+def _page_order(objects):
+    """Return page object numbers in document order."""
+    for body, _ in objects.values():
+        if re.search(rb'/Type\s*/Catalog', body):
+            root = _ref(body, b'Pages')
+            if root in objects:
+                pages = []
+                stack = [root]
+                seen = set()
+                while stack:
+                    number = stack.pop()
+                    if number in seen or number not in objects:
+                        continue
+                    seen.add(number)
+                    node = objects[number][0]
+                    kids = _sub_kids(node)
+                    if kids is None:
+                        pages.append(number)
+                    else:
+                        stack.extend(reversed(kids))
+                return pages
+    return sorted(n for n, (body, _) in objects.items() if re.search(rb'/Type\s*/Page(?![A-Za-z])', body))
+
+def _sub_kids(node):
+    match = re.search(rb'/Kids\s*\[([^\]]*)\]', node)
+    return _refs(match.group(1)) if match else None
+
+def _inherited(objects, number, pattern):
+    """Search a page and its ancestors for ``pattern``."""
+    seen = set()
+    while number in objects and number not in seen:
+        seen.add(number)
+        body = objects[number][0]
+        match = pattern.search(body)
+        if match:
+            return match
+        number = _ref(body, b'Parent')
+    return None
+
+def _page_images(objects, page):
+    """Return object numbers of the image XObjects used by a page."""
+    body = objects[page][0]
+    resources = _sub_dict(body, b'Resources')
+    if resources is None:
+        ref = _ref(body, b'Resources')
+        resources = objects.get(ref, (b'', None))[0]
+    xobjects = _sub_dict(resources, b'XObject')
+    if xobjects is None:
+        ref = _ref(resources, b'XObject')
+        xobjects = objects.get(ref, (b'', None))[0]
+    return [n for n in _refs(xobjects)
+            if n in objects and re.search(rb'/Subtype\s*/Image', objects[n][0])]
+
+def _decode_errors():
+    """Return ``_DECODE_ERRORS`` and Pillow's decompression bomb error."""
+    from PIL import Image
+
+    return _DECODE_ERRORS + (Image.DecompressionBombError,)
+
+def _decode_image(body, stream):
+    """Decode a DCT or uncompressed/Flate image XObject with Pillow.
+
+    Returns None for encodings this does not handle; malformed data raises
+    one of ``_decode_errors()``.
+    """
+    from PIL import Image
+
+    if stream is None:
+        return None
+    filters = re.findall(rb'/(DCTDecode|FlateDecode|JPXDecode|CCITTFaxDecode|LZWDecode)', body)
+    data = stream
+    if filters[:1] == [b'FlateDecode']:
+        data = zlib.decompress(data)
+        filters = filters[1:]
+    if filters and filters[0] in (b'DCTDecode', b'JPXDecode'):
+        return Image.open(BytesIO(data))
+    if filters or re.search(rb'/Predictor\s+(1\d)', body):
+        return None
+
+    width = re.search(rb'/Width\s+' + _INT_RE, body)
+    height = re.search(rb'/Height\s+' + _INT_RE, body)
+    if not width or not height:
+        return None
+    size = (int(width.group(1)), int(height.group(1)))
+    if re.search(rb'/BitsPerComponent\s+8', body) is None:
+        return None
+    for name, mode in ((b'DeviceRGB', 'RGB'), (b'DeviceGray', 'L'), (b'DeviceCMYK', 'CMYK')):
+        if name in body:
+            try:
+                return Image.frombytes(mode, size, data)
+            except ValueError:
+                return None
+    return None
+
+def _shown_strings(body, stream):
+    """Return the strings drawn by text operators in a content stream.
+
+    Literal ``(...)`` and hex ``<...>`` strings are read as Latin-1; font
+    encodings are ignored, which is enough to tell whether two pages carry
+    the same text.
+    """
+    if not stream:
+        return []
+    if re.search(rb'/FlateDecode', body):
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            return []
+    strings = []
+    for block in _TEXT_BLOCK_RE.findall(stream):
+        for literal, hex_string in _STRING_RE.findall(block):
+            if hex_string:
+                digits = re.sub(rb'\s', b'', hex_string)
+                # An odd final digit is padded with 0, as the PDF specification says
+                strings.append(bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode()).decode('latin-1'))
+            else:
+                strings.append(_ESCAPE_RE.sub(rb'\1', literal).decode('latin-1'))
+    return strings
+
+def rasterize_pages(pdf_bytes):
+    """Return a grey-scale raster and metadata for each page.
+
+    Pages are rasterized from their largest embedded image, which covers
+    scanned and image-based documents. Pages without a supported image get
+    no raster and are compared by their content stream instead; pages whose
+    image is malformed get no raster either and are flagged ``undecodable``.
+
+    Returns:
+        list: Per page, a dict with ``raster`` (uint8 array or None),
+        ``undecodable`` (bool), ``content`` (hash of the content stream),
+        ``text`` (the strings shown by the content stream) and ``size`` (points)
+    """
+    import numpy as np
+    from PIL import Image
+
+    decode_errors = _decode_errors()
+    objects = _parse_objects(pdf_bytes)
+    pages = []
+    for number in _page_order(objects):
+        body = objects[number][0]
+        mediabox = _inherited(objects, number, _MEDIABOX_RE)
+        size = (612.0, 792.0)
+        if mediabox:
+            x0, y0, x1, y1 = (float(v) for v in mediabox.groups())
+            size = (abs(x1 - x0), abs(y1 - y0))
+
+        contents = _CONTENTS_RE.search(body)
+        digest = hashlib.md5()
+        text = []
+        for ref in _refs(contents.group(1)) if contents else []:
+            stream_body, stream = objects.get(ref, (b'', None))
+            digest.update(stream or b'')
+            text.extend(_shown_strings(stream_body, stream))
+
+        raster, undecodable = None, False
+        images = []
+        for n in _page_images(objects, number):
+            try:
+                image = _decode_image(*objects[n])
+            except decode_errors:
+                undecodable = True
+                continue
+            if image is not None:
+                images.append(image)
+        if images:
+            try:
+                # Pillow decodes lazily, so broken image data may only fail here
+                image = max(images, key=lambda i: i.size[0] * i.size[1]).convert('L')
+                height = max(1, round(DIFF_WIDTH * image.size[1] / image.size[0]))
+                raster = np.asarray(image.resize((DIFF_WIDTH, height), Image.BILINEAR), dtype=np.uint8)
+            except decode_errors:
+                undecodable = True
+        pages.append({'raster': raster, 'undecodable': undecodable and raster is None,
+                      'content': digest.hexdigest(), 'text': ' '.join(' '.join(text).split()), 'size': size})
+    return pages
+
+def _cached_pages(doc_hash, pdf_bytes):
+    """Rasterize a document once and reuse it for every pair it appears in."""
+    with _pages_lock:
+        pages = _pages_cache.get(doc_hash)
+        if pages is not None:
+            _pages_cache.move_to_end(doc_hash)
+            return pages
+    pages = rasterize_pages(pdf_bytes)
+    with _pages_lock:
+        _pages_cache[doc_hash] = pages
+        while len(_pages_cache) > MAX_CACHED_DOCUMENTS:
+            _pages_cache.popitem(last=False)
+    return pages
+
+def _changed_boxes(mask):
+    """Group a changed-pixel mask into normalized bounding boxes."""
+    import numpy as np
+
+    height, width = mask.shape
+    rows, cols = -(-height // BLOCK_SIZE), -(-width // BLOCK_SIZE)
+    padded = np.zeros((rows * BLOCK_SIZE, cols * BLOCK_SIZE), dtype=bool)
+    padded[:height, :width] = mask
+    blocks = padded.reshape(rows, BLOCK_SIZE, cols, BLOCK_SIZE).any(axis=(1, 3))
+
+    boxes = []
+    unvisited = blocks.copy()
+    for row, col in zip(*np.nonzero(blocks)):
+        if not unvisited[row, col]:
+            continue
+        unvisited[row, col] = False
+        stack = [(row, col)]
+        r0, c0, r1, c1 = row, col, row, col
+        while stack:
+            r, c = stack.pop()
+            r0, c0, r1, c1 = min(r0, r), min(c0, c), max(r1, r), max(c1, c)
+            for nr in range(max(r - 1, 0), min(r + 2, rows)):
+                for nc in range(max(c - 1, 0), min(c + 2, cols)):
+                    if unvisited[nr, nc]:
+                        unvisited[nr, nc] = False
+                        stack.append((nr, nc))
+        boxes.append([
+            round(c0 * BLOCK_SIZE / width, 4),
+            round(r0 * BLOCK_SIZE / height, 4),
+            round(min((c1 + 1) * BLOCK_SIZE, width) / width, 4),
+            round(min((r1 + 1) * BLOCK_SIZE, height) / height, 4),
+        ])
+    return boxes
+
+def compare_pages(old, new):
+    """Compare two rasterized pages.
+
+    A page that could not be decoded on either side counts as changed as
+    a whole, since nothing is known about its content.
+
+    Returns:
+        dict: ``score`` (share of changed pixels) and ``boxes`` (changed
+        regions as ``[x0, y0, x1, y1]`` fractions of the page, top-left origin)
+    """
+    if old.get('undecodable') or new.get('undecodable'):
+        return {'score': 1.0, 'boxes': [[0.0, 0.0, 1.0, 1.0]]}
+    if old['raster'] is None or new['raster'] is None:
+        changed = old['content'] != new['content'] or (old['raster'] is None) != (new['raster'] is None)
+        return {'score': 1.0 if changed else 0.0, 'boxes': [[0.0, 0.0, 1.0, 1.0]] if changed else []}
+
+    import numpy as np
+    from PIL import Image
+
+    a, b = old['raster'], new['raster']
+    if a.shape != b.shape:
+        b = np.asarray(Image.fromarray(b).resize((a.shape[1], a.shape[0]), Image.BILINEAR))
+    mask = np.abs(a.astype(np.int16) - b.astype(np.int16)) > PIXEL_THRESHOLD
+    score = float(mask.mean())
+    if score < MIN_CHANGE_SCORE:
+        return {'score': score, 'boxes': []}
+    return {'score': score, 'boxes': _changed_boxes(mask)}
+
+def diff_documents(old_bytes, new_bytes):
+    """Compute per-page changes between two versions of a document.
+
+    Returns:
+        dict: ``old_hash``, ``new_hash``, ``pages`` (one entry per page of
+        the longer document with ``page``, ``status``, ``score``, ``boxes``
+        and ``size``) and ``changed_pages``
+    """
+    old_hash, new_hash = content_hash(old_bytes), content_hash(new_bytes)
+    old_pages = _cached_pages(old_hash, old_bytes)
+    new_pages = _cached_pages(new_hash, new_bytes)
+
+    pages = []
+    for number in range(max(len(old_pages), len(new_pages))):
+        if number >= len(old_pages):
+            status, change = 'added', {'score': 1.0, 'boxes': [[0.0, 0.0, 1.0, 1.0]]}
+        elif number >= len(new_pages):
+            status, change = 'removed', {'score': 1.0, 'boxes': []}
+        else:
+            change = compare_pages(old_pages[number], new_pages[number])
+            status = 'changed' if change['boxes'] else 'unchanged'
+        size = (new_pages if number < len(new_pages) else old_pages)[number]['size']
+        pages.append({'page': number + 1, 'status': status, 'size': list(size), **change})
+
+    return {
+        'old_hash': old_hash,
+        'new_hash': new_hash,
+        'pages': pages,
+        'changed_pages': [p['page'] for p in pages if p['status'] != 'unchanged'],
+    }
+
+def _diff_path(old_hash, new_hash, cache_dir):
+    return os.path.join(cache_dir, f"{old_hash}_{new_hash}.json")
+
+def load_page_diff(old_hash, new_hash, cache_dir=DIFF_CACHE_DIR):
+    """Return a previously computed diff, or None if there is none."""
+    key = (old_hash, new_hash, cache_dir)
+    with _diff_lock:
+        diff = _diff_cache.get(key)
+        if diff is not None:
+            _diff_cache.move_to_end(key)
+            return diff
+    try:
+        with open(_diff_path(old_hash, new_hash, cache_dir), 'r') as f:
+            diff = json.load(f)
+    except (OSError, ValueError):
+        return None
+    _remember_diff(key, diff)
+    return diff
+
+def _remember_diff(key, diff):
+    with _diff_lock:
+        _diff_cache[key] = diff
+        _diff_cache.move_to_end(key)
+        while len(_diff_cache) > MAX_CACHED_DIFFS:
+            _diff_cache.popitem(last=False)
+
+def get_page_diff(old_bytes, new_bytes, cache_dir=DIFF_CACHE_DIR):
+    """Return the diff of two versions, computing and storing it if needed.
+
+    Results are cached on disk by the content hashes of both documents, so
+    a pair is only ever computed once.
+    """
+    old_hash, new_hash = content_hash(old_bytes), content_hash(new_bytes)
+    diff = load_page_diff(old_hash, new_hash, cache_dir)
+    if diff is not None:
+        return diff
+
+    diff = diff_documents(old_bytes, new_bytes)
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _diff_path(old_hash, new_hash, cache_dir)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(diff, f)
+    os.replace(tmp_path, path)
+    _remember_diff((old_hash, new_hash, cache_dir), diff)
+    return diff
+
+def diff_annotations(diff, color='red'):
+    """Convert a diff's changed regions into ``pdf_viewer`` annotations."""
+    annotations = []
+    for page in diff['pages']:
+        width, height = page['size']
+        for x0, y0, x1, y1 in page['boxes']:
+            annotations.append({
+                'page': page['page'],
+                'x': x0 * width,
+                'y': y0 * height,
+                'width': (x1 - x0) * width,
+                'height': (y1 - y0) * height,
+                'color': color,
+            })
+    return annotations
@@ -0,0 +1,291 @@
+"""Two-tier cache for PDF bytes fetched from S3."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from s3_utils import get_s3_client, get_bucket_name, get_full_s3_key
+from timing import annotate
+
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+DEFAULT_DISK_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_CACHE_DIR = os.environ.get('DOC_REVIEW_CACHE_DIR', '.cache/pdf')
+# Entries validated within this many seconds are served without asking S3.
+DEFAULT_REVALIDATE_AFTER = 60
+# A full disk tier is evicted down to this share of its size, so that not every write scans it
+DISK_EVICT_TO = 0.9
+
+_cache_lock = threading.Lock()
+_pdf_cache = None
+
+
+class PdfCache:
+    """Byte-bounded memory LRU in front of a byte-bounded disk tier.
+
+    Entries are keyed by ``bucket/full_key`` and carry the object's ETag.
+    Stale entries are revalidated with a conditional ``GetObject``
+    (``IfNoneMatch``), so an unchanged document costs a 304 and no body.
+    """
+
+    def __init__(self, memory_bytes=DEFAULT_MEMORY_BYTES, disk_bytes=DEFAULT_DISK_BYTES,
+                 cache_dir=DEFAULT_CACHE_DIR, revalidate_after=DEFAULT_REVALIDATE_AFTER):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.cache_dir = cache_dir
+        self.revalidate_after = revalidate_after
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        # Bytes on disk, counted by one scan and then kept up to date on writes and evictions
+        self._disk_lock = threading.Lock()
+        self._disk_used = None
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'not_modified': 0,
+            'misses': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+        }
+
+    def get_pdf(self, relative_key):
+        """Return the bytes of a PDF, fetching from S3 only when needed.
+
+        Args:
+            relative_key (str): Relative S3 key of the document
+
+        Returns:
+            bytes: The document content
+        """
+        bucket_name = get_bucket_name()
+        full_key = get_full_s3_key(relative_key)
+        cache_key = f"{bucket_name}/{full_key}"
+
+        entry, tier = self._get_memory(cache_key), 'memory'
+        if entry is None:
+            entry, tier = self._read_disk(cache_key), 'disk'
+            if entry is not None:
+                self._count('disk_hits')
+                self._put_memory(cache_key, entry)
+        else:
+            self._count('memory_hits')
+
+        if entry is not None and time.time() - entry['validated'] < self.revalidate_after:
+            annotate(cache=tier, bytes=len(entry['body']))
+            return entry['body']
+
+        etag = entry['etag'] if entry is not None else None
+        fresh = self._fetch(bucket_name, full_key, etag)
+        if fresh is None:
+            self._count('not_modified')
+            entry['validated'] = time.time()
+            self._touch_disk(cache_key)
+            annotate(cache='not_modified', bytes=len(entry['body']))
+            return entry['body']
+
+        self._count('misses')
+        self._put_memory(cache_key, fresh)
+        self._write_disk(cache_key, fresh)
+        annotate(cache='miss', bytes=len(fresh['body']))
+        return fresh['body']
+
+    def peek(self, relative_key):
+        """Return cached bytes without touching S3, or None if not cached."""
+        cache_key = f"{get_bucket_name()}/{get_full_s3_key(relative_key)}"
+        entry = self._get_memory(cache_key)
+        return entry['body'] if entry is not None else None
+
+    def invalidate(self, relative_key=None):
+        """Drop one entry, or every entry when no key is given."""
+        with self._lock:
+            if relative_key is None:
+                keys = list(self._memory)
+            else:
+                keys = [f"{get_bucket_name()}/{get_full_s3_key(relative_key)}"]
+            for key in keys:
+                entry = self._memory.pop(key, None)
+                if entry is not None:
+                    self._memory_used -= len(entry['body'])
+        if relative_key is None:
+            if os.path.isdir(self.cache_dir):
+                for name in os.listdir(self.cache_dir):
+                    _remove(os.path.join(self.cache_dir, name))
+            with self._disk_lock:
+                self._disk_used = 0
+        else:
+            body_path, meta_path = self._disk_paths(keys[0])
+            size = _file_size(body_path)
+            _remove(body_path)
+            _remove(meta_path)
+            with self._disk_lock:
+                if self._disk_used is not None:
+                    self._disk_used = max(0, self._disk_used - size)
+
+    def get_stats(self):
+        """Return counters plus current memory and disk usage."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_used
+        stats['disk_bytes'] = self._disk_usage()
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _fetch(self, bucket_name, full_key, etag):
+        """Fetch an object, or return None if it still matches ``etag``."""
+        from botocore.exceptions import ClientError
+
+        params = {'Bucket': bucket_name, 'Key': full_key}
+        if etag:
+            params['IfNoneMatch'] = etag
+        try:
+            response = get_s3_client().get_object(**params)
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code')
+            status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+            if etag and (code in ('304', 'NotModified') or status == 304):
+                return None
+            raise
+        return {
+            'body': response['Body'].read(),
+            'etag': response.get('ETag'),
+            'validated': time.time(),
+        }
+
+    def _get_memory(self, cache_key):
+        with self._lock:
+            entry = self._memory.get(cache_key)
+            if entry is not None:
+                self._memory.move_to_end(cache_key)
+            return entry
+
+    def _put_memory(self, cache_key, entry):
+        size = len(entry['body'])
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(cache_key, None)
+            if old is not None:
+                self._memory_used -= len(old['body'])
+            self._memory[cache_key] = entry
+            self._memory_used += size
+            while self._memory_used > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted['body'])
+                self.stats['memory_evictions'] += 1
+
+    def _disk_paths(self, cache_key):
+        digest = hashlib.sha256(cache_key.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, digest)
+        return f"{base}.pdf", f"{base}.json"
+
+    def _read_disk(self, cache_key):
+        body_path, meta_path = self._disk_paths(cache_key)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get('key') != cache_key or len(body) != meta.get('size'):
+            return None
+        self._touch_disk(cache_key)
+        # Disk entries are always revalidated before first use.
+        return {'body': body, 'etag': meta.get('etag'), 'validated': 0.0}
+
+    def _write_disk(self, cache_key, entry):
+        size = len(entry['body'])
+        if self.disk_bytes <= 0 or size > self.disk_bytes:
+            return
+        body_path, meta_path = self._disk_paths(cache_key)
+        # Counted before writing, so the first scan does not see the new file as well
+        self._disk_usage()
+        old_size = _file_size(body_path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(entry['body'])
+            os.replace(tmp_path, body_path)
+            with open(meta_path, 'w') as f:
+                json.dump({'key': cache_key, 'etag': entry['etag'], 'size': size}, f)
+        except OSError:
+            return
+        with self._disk_lock:
+            self._disk_used += size - old_size
+            full = self._disk_used > self.disk_bytes
+        if full:
+            self._evict_disk()
+
+    def _touch_disk(self, cache_key):
+        body_path, _ = self._disk_paths(cache_key)
+        try:
+            os.utime(body_path)
+        except OSError:
+            pass
+
+    def _disk_usage(self):
+        with self._disk_lock:
+            if self._disk_used is None:
+                self._disk_used = sum(size for _, size, _ in self._disk_entries())
+            return self._disk_used
+
+    def _disk_entries(self):
+        """Yield ``(body_path, size, last_used)`` for every disk entry."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pdf'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st_result = os.stat(path)
+            except OSError:
+                continue
+            yield path, st_result.st_size, st_result.st_mtime
+
+    def _evict_disk(self):
+        """Remove the least recently used entries until the tier is below ``DISK_EVICT_TO``."""
+        with self._disk_lock:
+            entries = sorted(self._disk_entries(), key=lambda e: e[2])
+            used = sum(size for _, size, _ in entries)
+            target = self.disk_bytes * DISK_EVICT_TO
+            for path, size, _ in entries:
+                if used <= target:
+                    break
+                _remove(path)
+                _remove(path[:-len('.pdf')] + '.json')
+                used -= size
+                self._count('disk_evictions')
+            self._disk_used = used
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _file_size(path):
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def get_pdf_cache():
+    """Return the process-wide PDF cache."""
+    global _pdf_cache
+    if _pdf_cache is None:
+        with _cache_lock:
+            if _pdf_cache is None:
+                _pdf_cache = PdfCache()
+    return _pdf_cache
@@ -0,0 +1,102 @@
+"""Page-level metadata for PDFs, read with byte-range requests."""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from s3_utils import get_s3_client, get_bucket_name, get_full_s3_key
+
+# The linearization dictionary must start within the first 1024 bytes.
+PROBE_BYTES = 1024
+MAX_PROBES = 4096
+# Probes younger than this are reused without a conditional request
+PROBE_REVALIDATE_AFTER = 60
+
+_LINEARIZED_RE = re.compile(rb'<<\s*/Linearized\s+[\d.]+(?P<body>.*?)>>', re.S)
+_LINEARIZED_FIELD_RE = re.compile(rb'/([LENOT])\s+(\d+)')
+_PAGE_RE = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+
+_probe_lock = threading.Lock()
+_probe_cache = OrderedDict()
+
+
+def read_linearization(head):
+    """Parse the linearization dictionary at the start of a PDF.
+
+    Args:
+        head (bytes): The first bytes of the file
+
+    Returns:
+        dict: ``L`` (file length), ``E`` (end of first page), ``N`` (page
+        count), ``O`` (first page object) and ``T`` (main xref offset), or
+        None if the file is not linearized
+    """
+    match = _LINEARIZED_RE.search(head[:PROBE_BYTES])
+    if match is None:
+        return None
+    return {name.decode(): int(value) for name, value in _LINEARIZED_FIELD_RE.findall(match.group('body'))}
+
+def count_pages(pdf_bytes):
+    """Count page objects in a PDF body.
+
+    Pages stored inside compressed object streams are not visible to this
+    scan, so the result can be 0 for such files.
+    """
+    return len(_PAGE_RE.findall(pdf_bytes))
+
+def probe_pdf(relative_key, etag=None, max_age=0):
+    """Read size and linearization of a PDF with a single range request.
+
+    Only the first ``PROBE_BYTES`` are transferred, and a repeated probe of
+    an unchanged object is a conditional request answered with a 304. No
+    request is made when the object's current ``etag`` is known and matches
+    the cached probe, or when that probe is younger than ``max_age``.
+
+    Args:
+        relative_key (str): Relative S3 key of the document
+        etag (str): Current ETag of the object, e.g. from the inventory
+        max_age (float): Seconds a cached probe is reused without revalidation
+
+    Returns:
+        dict: ``size``, ``etag``, ``linearized``, ``page_count`` (None if not
+        linearized) and ``first_page_end`` (None if not linearized)
+    """
+    from botocore.exceptions import ClientError
+
+    full_key = get_full_s3_key(relative_key)
+    with _probe_lock:
+        cached, validated = _probe_cache.get(full_key, (None, 0.0))
+    if cached is not None and ((etag and etag.strip('"') == (cached['etag'] or '').strip('"'))
+                               or time.time() - validated < max_age):
+        return cached
+
+    params = {'Bucket': get_bucket_name(), 'Key': full_key, 'Range': f"bytes=0-{PROBE_BYTES - 1}"}
+    if cached is not None:
+        params['IfNoneMatch'] = cached['etag']
+    try:
+        response = get_s3_client().get_object(**params)
+    except ClientError as e:
+        if cached is not None and e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304:
+            with _probe_lock:
+                _probe_cache[full_key] = (cached, time.time())
+            return cached
+        raise
+    head = response['Body'].read()
+    etag = response.get('ETag')
+
+    content_range = response.get('ContentRange', '')
+    size = int(content_range.rsplit('/', 1)[1]) if '/' in content_range else len(head)
+    linearization = read_linearization(head)
+    info = {
+        'size': size,
+        'etag': etag,
+        'linearized': linearization is not None,
+        'page_count': linearization.get('N') if linearization else None,
+        'first_page_end': linearization.get('E') if linearization else None,
+    }
+    with _probe_lock:
+        _probe_cache[full_key] = (info, time.time())
+        while len(_probe_cache) > MAX_PROBES:
+            _probe_cache.popitem(last=False)
+    return info
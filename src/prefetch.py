@@ -0,0 +1,200 @@
+"""Concurrent and speculative fetching of comparison documents."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_cache import get_pdf_cache
+from timing import span, traced
+
+DEFAULT_FOREGROUND_WORKERS = 4
+DEFAULT_PREFETCH_WORKERS = 4
+DEFAULT_MAX_PENDING = 16
+DEFAULT_MAX_INFLIGHT_BYTES = 64 * 1024 * 1024
+# Size assumed for a document before any has been fetched.
+DEFAULT_SIZE_ESTIMATE = 1024 * 1024
+
+_prefetcher_lock = threading.Lock()
+_prefetcher = None
+
+
+class Prefetcher:
+    """Fetch documents in parallel and warm the PDF cache in the background.
+
+    Foreground fetches run on their own pool so speculative work can never
+    delay the documents the reviewer is waiting for. Background prefetches
+    are bounded by a pending-task limit and an estimate of in-flight bytes
+    (the running mean of observed document sizes).
+    """
+
+    def __init__(self, cache=None, foreground_workers=DEFAULT_FOREGROUND_WORKERS,
+                 prefetch_workers=DEFAULT_PREFETCH_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 max_inflight_bytes=DEFAULT_MAX_INFLIGHT_BYTES):
+        self.cache = cache if cache is not None else get_pdf_cache()
+        self.max_pending = max_pending
+        self.max_inflight_bytes = max_inflight_bytes
+        self._foreground = ThreadPoolExecutor(max_workers=foreground_workers,
+                                              thread_name_prefix='pdf-fetch')
+        self._background = ThreadPoolExecutor(max_workers=prefetch_workers,
+                                              thread_name_prefix='pdf-prefetch')
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_bytes = 0
+        self._prefetched = set()
+        self._warm = set()
+        self._fetched_bytes = 0
+        self._fetched_count = 0
+        self.stats = {
+            'hits': 0,
+            'joined': 0,
+            'misses': 0,
+            'scheduled': 0,
+            'skipped': 0,
+            'errors': 0,
+        }
+
+    def get(self, relative_key):
+        """Return a document's bytes, joining an in-flight prefetch if any."""
+        with self._lock:
+            future = self._inflight.get(relative_key)
+            if relative_key in self._warm:
+                # Already counted by the fetch_many call that loaded it
+                self._warm.discard(relative_key)
+            elif future is not None:
+                self.stats['joined'] += 1
+            elif relative_key in self._prefetched:
+                self._prefetched.discard(relative_key)
+                self.stats['hits'] += 1
+            else:
+                self.stats['misses'] += 1
+        with span('fetch_pdf', key=relative_key) as timed:
+            if future is not None:
+                try:
+                    body = future.result()
+                    timed.set(cache='prefetch', bytes=len(body))
+                    return body
+                except Exception:
+                    pass
+            return self.cache.get_pdf(relative_key)
+
+    def fetch_many(self, relative_keys):
+        """Fetch several documents at the same time.
+
+        Args:
+            relative_keys (list): Relative S3 keys to fetch
+
+        Returns:
+            dict: Key to bytes for every document that could be fetched
+        """
+        keys = list(dict.fromkeys(k for k in relative_keys if k))
+        futures = {key: self._foreground.submit(traced(self.get), key) for key in keys}
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+                with self._lock:
+                    self._warm.add(key)
+            except Exception:
+                with self._lock:
+                    self.stats['errors'] += 1
+        return results
+
+    def prefetch(self, relative_keys):
+        """Warm the cache for documents the reviewer is likely to open next.
+
+        Keys already cached in memory or in flight are ignored. Scheduling
+        stops once the pending or in-flight byte budget is used up.
+
+        Args:
+            relative_keys (list): Relative S3 keys in priority order
+
+        Returns:
+            int: Number of prefetches scheduled
+        """
+        scheduled = 0
+        for key in dict.fromkeys(k for k in relative_keys if k):
+            with self._lock:
+                if key in self._inflight:
+                    continue
+            try:
+                if self.cache.peek(key) is not None:
+                    continue
+            except ValueError:
+                # S3 is not configured; there is nothing to prefetch
+                return scheduled
+            with self._lock:
+                estimate = self._size_estimate()
+                if (len(self._inflight) >= self.max_pending or
+                        self._inflight_bytes + estimate > self.max_inflight_bytes):
+                    self.stats['skipped'] += 1
+                    continue
+                future = self._background.submit(self._prefetch_one, key, estimate)
+                self._inflight[key] = future
+                self._inflight_bytes += estimate
+                self.stats['scheduled'] += 1
+            scheduled += 1
+        return scheduled
+
+    def get_stats(self):
+        """Return prefetch counters and current in-flight usage."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['inflight'] = len(self._inflight)
+            stats['inflight_bytes'] = self._inflight_bytes
+        return stats
+
+    def _size_estimate(self):
+        if not self._fetched_count:
+            return DEFAULT_SIZE_ESTIMATE
+        return self._fetched_bytes // self._fetched_count
+
+    def _prefetch_one(self, relative_key, estimate):
+        try:
+            body = self.cache.get_pdf(relative_key)
+        except Exception:
+            with self._lock:
+                self.stats['errors'] += 1
+                self._inflight.pop(relative_key, None)
+                self._inflight_bytes -= estimate
+            raise
+        with self._lock:
+            self._inflight.pop(relative_key, None)
+            self._inflight_bytes -= estimate
+            self._prefetched.add(relative_key)
+            self._fetched_bytes += len(body)
+            self._fetched_count += 1
+        return body
+
+
+def get_prefetcher():
+    """Return the process-wide prefetcher."""
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = Prefetcher()
+    return _prefetcher
+
+
+def get_prefetch_keys(index, batch, doc_type, selected):
+    """List the documents worth prefetching for the current view.
+
+    Covers every version behind the other comparison pairs of the current
+    batch, followed by the first pair of the next batch.
+
+    Args:
+        index (CatalogIndex): Index of the document catalog
+        batch (str): Currently selected batch
+        doc_type (str): Currently selected document type
+        selected (tuple): Versions currently displayed
+
+    Returns:
+        list: Relative S3 keys in priority order
+    """
+    keys = [index.row(batch, doc_type, version)['file_path']
+            for version in index.versions(batch, doc_type) if version not in selected]
+
+    upcoming = index.next_batch(batch)
+    if upcoming is not None:
+        keys.extend(index.row(upcoming, doc_type, version)['file_path']
+                    for version in index.versions(upcoming, doc_type)[:2])
+    return keys
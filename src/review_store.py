@@ -0,0 +1,230 @@
+"""Persistent review state shared by all sessions."""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+
+REVIEW_DB_PATH = os.environ.get('DOC_REVIEW_DB', 'data/reviews.db')
+# Saves arriving within this many seconds are written in one transaction.
+DEFAULT_FLUSH_INTERVAL = 0.5
+REVIEWED = 'reviewed'
+NOT_REVIEWED = 'not-reviewed'
+REVIEW_COLUMNS = ['timestamp', 'batch', 'doc_type', 'v1_v2', 'status', 'notes', 'decision']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    batch TEXT NOT NULL,
+    doc_type TEXT NOT NULL,
+    v1_v2 TEXT,
+    status TEXT NOT NULL,
+    notes TEXT,
+    decision TEXT
+);
+CREATE INDEX IF NOT EXISTS reviews_batch_doc_type ON reviews (batch, doc_type, timestamp);
+CREATE INDEX IF NOT EXISTS reviews_timestamp ON reviews (timestamp);
+CREATE TABLE IF NOT EXISTS batch_status (
+    batch TEXT NOT NULL,
+    doc_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    decision TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (batch, doc_type)
+) WITHOUT ROWID;
+"""
+
+logger = logging.getLogger(__name__)
+
+_store_lock = threading.Lock()
+_review_store = None
+
+
+class ReviewStore:
+    """Review decisions and current batch statuses in SQLite.
+
+    The database runs in WAL mode, so any number of sessions read while a
+    single background thread writes. ``record`` queues a review and returns;
+    queued reviews are written together in one transaction. Reads flush the
+    queue first, so a session always sees its own saves.
+
+    Every review is kept in ``reviews``; ``batch_status`` holds the latest
+    status per ``(batch, doc_type)`` for the bulk status query.
+    """
+
+    def __init__(self, path=REVIEW_DB_PATH, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pending = []
+        self._generation = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+
+    def _connection(self):
+        """Return this thread's connection; SQLite connections are per thread."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.statuses = (None, {})
+        return connection
+
+    def record(self, entry):
+        """Queue one review for writing.
+
+        Args:
+            entry (dict): Review with the keys in ``REVIEW_COLUMNS``
+        """
+        with self._lock:
+            self._pending.append(tuple(entry.get(column) for column in REVIEW_COLUMNS))
+        self.start()
+        self._wakeup.set()
+
+    def flush(self):
+        """Write all queued reviews in one transaction.
+
+        Returns:
+            int: Number of reviews written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            connection = self._connection()
+            try:
+                with connection:
+                    connection.executemany(
+                        f"INSERT INTO reviews ({', '.join(REVIEW_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(REVIEW_COLUMNS))})", batch)
+                    connection.executemany(
+                        "INSERT INTO batch_status (batch, doc_type, status, decision, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (batch, doc_type) DO UPDATE SET status = excluded.status, "
+                        "decision = excluded.decision, updated_at = excluded.updated_at "
+                        "WHERE excluded.updated_at >= batch_status.updated_at",
+                        [(row[1], row[2], row[4], row[6], row[0]) for row in batch])
+            except Exception:
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+            with self._lock:
+                self._generation += 1
+            return len(batch)
+
+    def _read(self):
+        """Return a connection for reading, after writing queued reviews."""
+        if self._pending:
+            self.flush()
+        return self._connection()
+
+    def statuses(self):
+        """Return the status of every reviewed ``(batch, doc_type)``.
+
+        One query answers for all batches, and its result is reused until
+        the database changes. Batches missing from the result are not
+        reviewed. The returned dict must not be modified.
+
+        Returns:
+            dict: ``(batch, doc_type)`` to status
+        """
+        connection = self._read()
+        version = (connection.execute("PRAGMA data_version").fetchone()[0], self._generation)
+        cached_version, statuses = self._local.statuses
+        if cached_version != version:
+            statuses = {
+                (batch, doc_type): status
+                for batch, doc_type, status in connection.execute(
+                    "SELECT batch, doc_type, status FROM batch_status")
+            }
+            self._local.statuses = (version, statuses)
+        return statuses
+
+    def status(self, batch, doc_type):
+        """Return the status of one batch and document type."""
+        return self.statuses().get((batch, doc_type), NOT_REVIEWED)
+
+    def history(self, batch=None, doc_type=None, since=None, until=None, limit=None):
+        """Return recorded reviews, newest first.
+
+        Args:
+            batch (str): Only reviews of this batch
+            doc_type (str): Only reviews of this document type (with ``batch``)
+            since (str): Only reviews at or after this timestamp
+            until (str): Only reviews before this timestamp
+            limit (int): Maximum number of reviews
+
+        Returns:
+            list: Reviews as dicts with the keys in ``REVIEW_COLUMNS``
+        """
+        clauses, params = [], []
+        if batch is not None:
+            clauses.append("batch = ?")
+            params.append(batch)
+            if doc_type is not None:
+                clauses.append("doc_type = ?")
+                params.append(doc_type)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        query = f"SELECT {', '.join(REVIEW_COLUMNS)} FROM reviews"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [dict(zip(REVIEW_COLUMNS, row)) for row in self._read().execute(query, params)]
+
+    def start(self):
+        """Start the background writer if it is not running."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='review-writer', daemon=True)
+                    self._thread.start()
+                    atexit.register(self.stop)
+
+    def stop(self):
+        """Write what is queued and stop the background writer."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Let concurrent saves join this transaction
+            self._stopped.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Writing reviews failed; will retry")
+                # The failed rows are queued again; retry after the next interval without waiting for a new save
+                self._wakeup.set()
+
+def get_review_store():
+    """Return the process-wide review store."""
+    global _review_store
+    if _review_store is None:
+        with _store_lock:
+            if _review_store is None:
+                _review_store = ReviewStore()
+    return _review_store
@@ -1,9 +1,39 @@
 """S3 utilities for document storage and retrieval."""
 
-import boto3
 import streamlit as st
-from botocore.exceptions import ClientError
 import os
+import threading
+import time
+
+from timing import annotate, record as record_span
+
+# Default connection settings for the shared client. Each can be overridden
+# through the ``aws`` secrets section or the matching ``AWS_*`` variable.
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_URL_EXPIRES = 3600
+# Cached URLs are replaced this many seconds before they expire.
+DEFAULT_URL_REFRESH_MARGIN = 300
+MAX_CACHED_URLS = 10000
+# A connectivity check older than this is refreshed in the background.
+DEFAULT_HEALTH_TTL = 60
+
+_config_lock = threading.Lock()
+_s3_config = None
+
+_client_lock = threading.Lock()
+_s3_clients = {}
+
+_stats_lock = threading.Lock()
+_s3_stats = {}
+
+_url_lock = threading.Lock()
+_url_cache = {}
+
+_health_lock = threading.Lock()
+_health = {}
 
 def get_secret(key, default=None):
     """Get a secret from Streamlit secrets or environment variables."""
@@ -12,15 +42,188 @@ def get_secret(key, default=None):
     except (KeyError, FileNotFoundError):
         return os.environ.get(f"AWS_{key.upper()}", default)
 
+def get_s3_config():
+    """Return the S3 configuration, resolved once per process.
+
+    Secrets are read on the first call and reused afterwards, so hot paths
+    do not go back to ``st.secrets`` or the environment on every operation.
+    Call ``reset_s3_client()`` to pick up changed secrets.
+
+    Returns:
+        dict: Credentials, bucket, base prefix and connection settings
+    """
+    global _s3_config
+    config = _s3_config
+    if config is not None:
+        return config
+    with _config_lock:
+        if _s3_config is None:
+            _s3_config = {
+                'access_key_id': get_secret('access_key_id'),
+                'secret_access_key': get_secret('secret_access_key'),
+                'session_token': get_secret('session_token'),
+                'region': get_secret('region', 'eu-central-1'),
+                'endpoint_url': get_secret('endpoint_url'),
+                'bucket_name': get_secret('bucket_name'),
+                'base_prefix': get_secret('base_prefix', 'Doc_Review/'),
+                'max_pool_connections': int(get_secret('max_pool_connections', DEFAULT_MAX_POOL_CONNECTIONS)),
+                'connect_timeout': float(get_secret('connect_timeout', DEFAULT_CONNECT_TIMEOUT)),
+                'read_timeout': float(get_secret('read_timeout', DEFAULT_READ_TIMEOUT)),
+                'max_attempts': int(get_secret('max_attempts', DEFAULT_MAX_ATTEMPTS)),
+            }
+        return _s3_config
+
+def _config_key(config):
+    """Build a hashable key identifying a client configuration."""
+    return tuple(sorted((k, v) for k, v in config.items()
+                        if k not in ('bucket_name', 'base_prefix')))
+
 def get_s3_client():
-    """Create and return an S3 client using credentials from Streamlit secrets or environment variables."""
-    return boto3.client(
+    """Return the shared S3 client for the current configuration.
+
+    One client is created per distinct configuration and reused by every
+    caller in the process. boto3 clients are thread-safe, so the same
+    instance (and its connection pool) serves all Streamlit sessions.
+    """
+    config = get_s3_config()
+    key = _config_key(config)
+    client = _s3_clients.get(key)
+    if client is not None:
+        return client
+    with _client_lock:
+        client = _s3_clients.get(key)
+        if client is None:
+            client = _create_s3_client(config)
+            _s3_clients[key] = client
+        return client
+
+def _create_s3_client(config):
+    """Create an S3 client with pooling, timeouts and stats hooks."""
+    # boto3 takes a noticeable share of startup; only load it once a client is needed
+    import boto3
+    from botocore.config import Config
+
+    session = boto3.session.Session(
+        aws_access_key_id=config['access_key_id'],
+        aws_secret_access_key=config['secret_access_key'],
+        aws_session_token=config['session_token'],
+        region_name=config['region']
+    )
+    client = session.client(
         's3',
-        aws_access_key_id=get_secret('access_key_id'),
-        aws_secret_access_key=get_secret('secret_access_key'),
-        aws_session_token=get_secret('session_token'),
-        region_name=get_secret('region', 'eu-central-1')
+        endpoint_url=config['endpoint_url'],
+        config=Config(
+            max_pool_connections=config['max_pool_connections'],
+            connect_timeout=config['connect_timeout'],
+            read_timeout=config['read_timeout'],
+            retries={'max_attempts': config['max_attempts'], 'mode': 'standard'}
+        )
     )
+    client.meta.events.register('before-call.s3', _on_before_call)
+    client.meta.events.register('after-call.s3', _on_after_call)
+    return client
+
+def reset_s3_client():
+    """Drop the shared clients and the resolved configuration."""
+    global _s3_config
+    with _config_lock, _client_lock, _url_lock, _health_lock:
+        _s3_config = None
+        _s3_clients.clear()
+        _url_cache.clear()
+        _health.clear()
+
+def get_s3_health(ttl=DEFAULT_HEALTH_TTL):
+    """Return the result of the last S3 connectivity check.
+
+    The check never runs on the caller's thread: a missing or stale result
+    starts a check in the background and the last known result is returned
+    right away.
+
+    Args:
+        ttl (float): Seconds after which a result is refreshed
+
+    Returns:
+        dict: ``ok`` (True, False, or None before the first check has
+        finished), ``error`` (message if the check failed) and ``age``
+        (seconds since the check, or None)
+    """
+    with _health_lock:
+        checked_at = _health.get('checked_at')
+        stale = checked_at is None or time.monotonic() - checked_at >= ttl
+        refresh = stale and not _health.get('refreshing')
+        if refresh:
+            _health['refreshing'] = True
+        result = {
+            'ok': _health.get('ok'),
+            'error': _health.get('error'),
+            'age': time.monotonic() - checked_at if checked_at is not None else None,
+        }
+    if refresh:
+        threading.Thread(target=_check_s3_health, name='s3-health', daemon=True).start()
+    return result
+
+def _check_s3_health():
+    try:
+        get_s3_client().list_objects_v2(Bucket=get_bucket_name(), Prefix=get_s3_config()['base_prefix'],
+                                        MaxKeys=1)
+        ok, error = True, None
+    except Exception as e:
+        ok, error = False, str(e)
+    with _health_lock:
+        _health.update(ok=ok, error=error, checked_at=time.monotonic(), refreshing=False)
+
+def _on_before_call(context, **kwargs):
+    context['_stats_start'] = time.perf_counter()
+
+def _on_after_call(http_response, parsed, model, context, **kwargs):
+    start = context.get('_stats_start')
+    elapsed = time.perf_counter() - start if start is not None else 0.0
+    nbytes = 0
+    if isinstance(parsed, dict):
+        nbytes = parsed.get('ContentLength') or 0
+    if not nbytes and http_response is not None:
+        try:
+            nbytes = int(http_response.headers.get('content-length', 0))
+        except (TypeError, ValueError):
+            nbytes = 0
+    record_s3_request(model.name, nbytes, elapsed)
+    record_span(f"s3.{model.name}", elapsed, bytes=nbytes)
+
+def record_s3_request(operation, nbytes=0, elapsed=0.0):
+    """Record one S3 request in the process-wide counters.
+
+    Args:
+        operation (str): S3 operation name, e.g. ``GetObject``
+        nbytes (int): Bytes transferred by the request
+        elapsed (float): Request latency in seconds
+    """
+    with _stats_lock:
+        entry = _s3_stats.setdefault(operation, {'requests': 0, 'bytes': 0, 'seconds': 0.0})
+        entry['requests'] += 1
+        entry['bytes'] += nbytes
+        entry['seconds'] += elapsed
+
+def get_s3_stats():
+    """Return a snapshot of the S3 request counters.
+
+    Returns:
+        dict: ``requests``, ``bytes``, ``seconds``, ``clients`` and a
+        per-operation breakdown under ``operations``
+    """
+    with _stats_lock:
+        operations = {op: dict(entry) for op, entry in _s3_stats.items()}
+    return {
+        'requests': sum(e['requests'] for e in operations.values()),
+        'bytes': sum(e['bytes'] for e in operations.values()),
+        'seconds': sum(e['seconds'] for e in operations.values()),
+        'clients': len(_s3_clients),
+        'operations': operations,
+    }
+
+def reset_s3_stats():
+    """Clear the S3 request counters."""
+    with _stats_lock:
+        _s3_stats.clear()
 
 def get_full_s3_key(relative_key):
     """Get the full S3 key including the base prefix.
@@ -31,9 +234,16 @@ def get_full_s3_key(relative_key):
     Returns:
         str: Full S3 key including base prefix
     """
-    base_prefix = get_secret('base_prefix', 'Doc_Review/')
+    base_prefix = get_s3_config()['base_prefix']
     return f"{base_prefix}{relative_key}"
 
+def get_bucket_name():
+    """Return the configured bucket name or raise if it is missing."""
+    bucket_name = get_s3_config()['bucket_name']
+    if not bucket_name:
+        raise ValueError("S3 bucket name not configured")
+    return bucket_name
+
 def upload_file_to_s3(local_file_path, relative_key):
     """Upload a file to S3.
     
@@ -43,9 +253,7 @@ def upload_file_to_s3(local_file_path, relative_key):
     """
     try:
         s3_client = get_s3_client()
-        bucket_name = get_secret('bucket_name')
-        if not bucket_name:
-            raise ValueError("S3 bucket name not configured")
+        bucket_name = get_bucket_name()
         
         full_key = get_full_s3_key(relative_key)
         s3_client.upload_file(local_file_path, bucket_name, full_key)
@@ -63,9 +271,7 @@ def download_file_from_s3(relative_key, local_file_path):
     """
     try:
         s3_client = get_s3_client()
-        bucket_name = get_secret('bucket_name')
-        if not bucket_name:
-            raise ValueError("S3 bucket name not configured")
+        bucket_name = get_bucket_name()
         
         full_key = get_full_s3_key(relative_key)
         os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
@@ -75,6 +281,48 @@ def download_file_from_s3(relative_key, local_file_path):
         st.error(f"Error downloading file from S3: {str(e)}")
         return False
 
+def get_presigned_url(relative_key, expires_in=DEFAULT_URL_EXPIRES, inline_pdf=False,
+                      refresh_margin=DEFAULT_URL_REFRESH_MARGIN):
+    """Return a pre-signed GET URL, reusing it until shortly before expiry.
+
+    Handing out the same URL for the lifetime of the signature also lets
+    browsers serve repeat views of a document from their HTTP cache.
+
+    Args:
+        relative_key (str): Relative S3 key (path) of the file
+        expires_in (int): Lifetime of a newly signed URL in seconds
+        inline_pdf (bool): Ask S3 to serve the object as an inline PDF
+        refresh_margin (int): Re-sign when less than this many seconds remain
+
+    Returns:
+        str: Pre-signed URL for the file
+    """
+    bucket_name = get_bucket_name()
+    full_key = get_full_s3_key(relative_key)
+    cache_key = (bucket_name, full_key, expires_in, inline_pdf)
+    now = time.time()
+
+    cached = _url_cache.get(cache_key)
+    if cached is not None and cached[1] - refresh_margin > now:
+        annotate(cache='hit')
+        return cached[0]
+    annotate(cache='miss')
+
+    params = {'Bucket': bucket_name, 'Key': full_key}
+    if inline_pdf:
+        params['ResponseContentType'] = 'application/pdf'
+        params['ResponseContentDisposition'] = 'inline'
+    url = get_s3_client().generate_presigned_url('get_object', Params=params, ExpiresIn=expires_in)
+
+    with _url_lock:
+        if len(_url_cache) >= MAX_CACHED_URLS:
+            for key in [k for k, (_, expiry) in _url_cache.items() if expiry - refresh_margin <= now]:
+                del _url_cache[key]
+            if len(_url_cache) >= MAX_CACHED_URLS:
+                _url_cache.clear()
+        _url_cache[cache_key] = (url, now + expires_in)
+    return url
+
 def get_s3_file_url(relative_key):
     """Generate a pre-signed URL for an S3 object.
     
@@ -85,18 +333,8 @@ def get_s3_file_url(relative_key):
         str: Pre-signed URL for the file
     """
     try:
-        s3_client = get_s3_client()
-        bucket_name = get_secret('bucket_name')
-        if not bucket_name:
-            raise ValueError("S3 bucket name not configured")
-        
-        full_key = get_full_s3_key(relative_key)
-        url = s3_client.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': bucket_name, 'Key': full_key},
-            ExpiresIn=3600  # URL expires in 1 hour
-        )
-        return url
+        # URL expires in 1 hour; reused from the cache until close to that
+        return get_presigned_url(relative_key)
     except Exception as e:
         st.error(f"Error generating pre-signed URL: {str(e)}")
         return None
@@ -112,22 +350,18 @@ def list_s3_files(prefix=""):
     """
     try:
         s3_client = get_s3_client()
-        bucket_name = get_secret('bucket_name')
-        if not bucket_name:
-            raise ValueError("S3 bucket name not configured")
+        bucket_name = get_bucket_name()
         
-        base_prefix = get_secret('base_prefix', 'Doc_Review/')
+        base_prefix = get_s3_config()['base_prefix']
         full_prefix = f"{base_prefix}{prefix}"
         
-        response = s3_client.list_objects_v2(
-            Bucket=bucket_name,
-            Prefix=full_prefix
-        )
-        
-        if 'Contents' in response:
+        # Follow continuation tokens past the 1000-key page limit
+        paginator = s3_client.get_paginator('list_objects_v2')
+        keys = []
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=full_prefix):
             # Remove base prefix from returned keys
-            return [obj['Key'][len(base_prefix):] for obj in response['Contents']]
-        return []
+            keys.extend(obj['Key'][len(base_prefix):] for obj in page.get('Contents', []))
+        return keys
     except Exception as e:
         st.error(f"Error listing S3 files: {str(e)}")
         return [] 
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""Incremental per-document outputs, kept in a CSV manifest next to the inventory.
+
+Fingerprints and thumbnails are both derived from each document version
+once and recomputed only when the inventory lists a new ETag for it.
+``update_sidecars`` holds that loop; the modules supply the computation.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import INVENTORY_PATH, catalog_file_paths, load_catalog
+from inventory import read_inventory
+
+DEFAULT_WORKERS = 8
+
+logger = logging.getLogger(__name__)
+
+
+def read_rows(path, columns):
+    """Load a manifest, or an empty frame with ``columns`` if none exists."""
+    import pandas as pd
+
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=columns)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+def write_rows(rows, path, columns):
+    """Replace a manifest with ``rows``."""
+    import pandas as pd
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    pd.DataFrame(rows, columns=columns).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def update_sidecars(path, columns, compute, keys=None, inventory_path=INVENTORY_PATH,
+                    workers=DEFAULT_WORKERS, reusable=None):
+    """Recompute the manifest rows of documents that are new or changed.
+
+    A row is reused while the inventory lists the same ETag for its key, or
+    when the inventory does not know the key, and ``reusable(row)`` (if
+    given) agrees. Everything else is passed to ``compute`` in parallel. A
+    document that fails is logged and keeps its previous row, if it had one.
+
+    Args:
+        path (str): Manifest CSV to update
+        columns (list): Manifest columns; ``key`` and ``etag`` are required
+        compute (callable): Returns the new row of one relative key
+        keys (list): Relative keys to cover; defaults to the catalog's documents
+        inventory_path (str): Inventory CSV with the current ETags
+        workers (int): Documents computed concurrently
+        reusable (callable): Extra condition for reusing an existing row
+
+    Returns:
+        dict: Summary with ``documents``, ``updated``, ``reused``,
+        ``failed`` and ``seconds``
+    """
+    start = time.perf_counter()
+    if keys is None:
+        keys = catalog_file_paths(load_catalog(inventory_path=inventory_path)).tolist()
+    keys = list(dict.fromkeys(keys))
+
+    inventory = read_inventory(inventory_path)
+    current_etags = dict(zip(inventory['key'], inventory['etag']))
+    existing = {row['key']: row for row in read_rows(path, columns).to_dict('records')}
+
+    rows = {}
+    stale = []
+    for key in keys:
+        row = existing.get(key)
+        etag = current_etags.get(key)
+        if (row is not None and (etag is None or etag == row['etag'])
+                and (reusable is None or reusable(row))):
+            rows[key] = row
+        else:
+            stale.append(key)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(compute, key): key for key in stale}
+        for future, key in futures.items():
+            try:
+                rows[key] = future.result()
+            except Exception as e:
+                logger.warning(f"Updating {os.path.basename(path)} for {key} failed: {e}")
+                failed += 1
+                if key in existing:
+                    rows[key] = existing[key]
+
+    write_rows([rows[key] for key in keys if key in rows], path, columns)
+    return {
+        'documents': len(keys),
+        'updated': len(stale) - failed,
+        'reused': len(keys) - len(stale),
+        'failed': failed,
+        'seconds': time.perf_counter() - start,
+    }
+
+def repeat_update(update, name, every=0):
+    """Run ``update()`` once, or every ``every`` seconds, logging each summary."""
+    while True:
+        summary = update()
+        logger.info(
+            f"{name} updated: {summary['updated']} new, {summary['reused']} reused, "
+            f"{summary['failed']} failed of {summary['documents']} in {summary['seconds']:.1f}s"
+        )
+        if not every:
+            break
+        time.sleep(every)
@@ -0,0 +1,146 @@
+"""Small WebP page thumbnails stored next to each document version."""
+
+import textwrap
+import threading
+from io import BytesIO
+
+from catalog import INVENTORY_PATH, file_key
+from page_diff import rasterize_pages
+from s3_utils import get_s3_client, get_bucket_name, get_full_s3_key
+from sidecars import DEFAULT_WORKERS, read_rows, update_sidecars, write_rows
+
+# Written by scripts/update_thumbnails.py and read by the app
+THUMBNAILS_PATH = "data/thumbnails.csv"
+THUMBNAIL_COLUMNS = ['key', 'etag', 'pages', 'scope']
+THUMBNAIL_WIDTH = 160
+THUMBNAIL_QUALITY = 60
+
+_index_lock = threading.Lock()
+_index_cache = {}
+
+
+def thumbnail_key(relative_key, page=1):
+    """Return the sidecar key of a page thumbnail, e.g. ``CI/B1/B1_2.page1.webp``."""
+    stem = relative_key[:-4] if relative_key.lower().endswith('.pdf') else relative_key
+    return f"{stem}.page{page}.webp"
+
+def _text_preview(page, width):
+    """Draw the shown text of a page without an image onto a blank page."""
+    from PIL import Image, ImageDraw
+
+    page_width, page_height = page['size']
+    height = max(1, round(width * page_height / page_width))
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    y = 6
+    # Hex strings of fonts with custom encodings decode to control characters; draw those as spaces
+    text = ''.join(c if c.isprintable() else ' ' for c in page['text'])
+    for line in textwrap.wrap(text, width=width // 6)[:height // 12]:
+        draw.text((6, y), line, fill=0)
+        y += 12
+    return image
+
+def render_thumbnails(pdf_bytes, width=THUMBNAIL_WIDTH, all_pages=False):
+    """Render WebP thumbnails of a document's pages.
+
+    Pages are drawn from their largest embedded image, as for page diffs;
+    pages without one show their text instead.
+
+    Args:
+        pdf_bytes (bytes): The document
+        width (int): Thumbnail width in pixels; height follows the page
+        all_pages (bool): Render every page instead of the first only
+
+    Returns:
+        list: WebP bytes per rendered page
+    """
+    from PIL import Image
+
+    pages = rasterize_pages(pdf_bytes)
+    thumbnails = []
+    for page in pages if all_pages else pages[:1]:
+        if page['raster'] is not None:
+            raster = page['raster']
+            height = max(1, round(width * raster.shape[0] / raster.shape[1]))
+            image = Image.fromarray(raster).resize((width, height), Image.LANCZOS)
+        else:
+            image = _text_preview(page, width)
+        buffer = BytesIO()
+        image.save(buffer, 'WEBP', quality=THUMBNAIL_QUALITY, method=6)
+        thumbnails.append(buffer.getvalue())
+    return thumbnails
+
+def thumbnail_object(relative_key, width=THUMBNAIL_WIDTH, all_pages=False):
+    """Download one document and upload its page thumbnails next to it.
+
+    Returns:
+        dict: A manifest row with the columns in ``THUMBNAIL_COLUMNS``
+    """
+    client = get_s3_client()
+    bucket = get_bucket_name()
+    response = client.get_object(Bucket=bucket, Key=get_full_s3_key(relative_key))
+    thumbnails = render_thumbnails(response['Body'].read(), width, all_pages)
+    for page, body in enumerate(thumbnails, start=1):
+        client.put_object(Bucket=bucket, Key=get_full_s3_key(thumbnail_key(relative_key, page)), Body=body,
+                          ContentType='image/webp', CacheControl='private, max-age=86400')
+    return {'key': relative_key, 'etag': response.get('ETag', '').strip('"'), 'pages': str(len(thumbnails)),
+            'scope': 'all' if all_pages else 'first'}
+
+
+class ThumbnailIndex:
+    """Thumbnail page counts by document key, loaded from the manifest."""
+
+    def __init__(self, manifest):
+        self._pages = {key: int(pages) for key, pages in zip(manifest['key'], manifest['pages'])}
+
+    def __len__(self):
+        return len(self._pages)
+
+    def keys(self, relative_key):
+        """Return the sidecar keys of a document's thumbnails; empty if it has none yet."""
+        return [thumbnail_key(relative_key, page) for page in range(1, self._pages.get(relative_key, 0) + 1)]
+
+def read_thumbnail_manifest(path=THUMBNAILS_PATH):
+    """Load the thumbnail manifest, or an empty frame if none exists."""
+    return read_rows(path, THUMBNAIL_COLUMNS)
+
+def load_thumbnail_index(path=THUMBNAILS_PATH):
+    """Return the ``ThumbnailIndex`` of ``path``, reloaded when the file changes."""
+    key = file_key(path)
+    index = _index_cache.get(key)
+    if index is None:
+        with _index_lock:
+            index = _index_cache.get(key)
+            if index is None:
+                index = ThumbnailIndex(read_thumbnail_manifest(path))
+                _index_cache.clear()
+                _index_cache[key] = index
+    return index
+
+def write_thumbnail_manifest(rows, path=THUMBNAILS_PATH):
+    """Replace the thumbnail manifest with ``rows``."""
+    write_rows(rows, path, THUMBNAIL_COLUMNS)
+
+def update_thumbnails(path=THUMBNAILS_PATH, keys=None, inventory_path=INVENTORY_PATH,
+                      workers=DEFAULT_WORKERS, width=THUMBNAIL_WIDTH, all_pages=False):
+    """Render thumbnails for document versions that are new or changed.
+
+    Rows are reused as described in ``sidecars.update_sidecars``; documents
+    rendered first page only are rendered again when ``all_pages`` is
+    requested.
+
+    Args:
+        path (str): Manifest CSV to update
+        keys (list): Relative keys to cover; defaults to the catalog's documents
+        inventory_path (str): Inventory CSV with the current ETags
+        workers (int): Documents rendered concurrently
+        width (int): Thumbnail width in pixels
+        all_pages (bool): Render every page instead of the first only
+
+    Returns:
+        dict: Summary with ``documents``, ``updated``, ``reused``,
+        ``failed`` and ``seconds``
+    """
+    return update_sidecars(path, THUMBNAIL_COLUMNS, lambda key: thumbnail_object(key, width, all_pages),
+                           keys, inventory_path, workers,
+                           reusable=lambda row: row['scope'] == 'all' or not all_pages)
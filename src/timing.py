@@ -0,0 +1,230 @@
+"""Lightweight timing spans for the app's hot paths."""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from logging.handlers import RotatingFileHandler
+
+# Time every rerun of every session; otherwise only sessions opened with ?perf=1
+TIMING_ENABLED = os.environ.get('DOC_REVIEW_TIMING', '') not in ('', '0')
+TIMING_LOG_PATH = os.environ.get('DOC_REVIEW_TIMING_LOG', '.cache/timing/spans.jsonl')
+TIMING_LOG_BYTES = 10 * 1024 * 1024
+TIMING_LOG_BACKUPS = 5
+
+_log_lock = threading.Lock()
+_span_log = None
+
+
+class _ThreadState(threading.local):
+    """Per-thread run and open spans; class defaults keep lookups exception-free."""
+
+    run = None
+    stack = None
+    base_depth = 0
+
+_local = _ThreadState()
+
+
+class TimingRun:
+    """The spans recorded during one rerun of one session."""
+
+    def __init__(self, session=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.session = session
+        self.started = time.time()
+        self.spans = []
+        self._start = time.perf_counter()
+
+    def offset_ms(self, moment):
+        return (moment - self._start) * 1000
+
+
+class Span:
+    """A timed stage; extra fields such as ``bytes`` or ``cache`` can be set while it runs."""
+
+    __slots__ = ('run', 'stage', 'fields', 'depth', '_start')
+
+    def __init__(self, run, stage, fields):
+        self.run = run
+        self.stage = stage
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def __enter__(self):
+        stack = _stack()
+        self.depth = _local.base_depth + len(stack)
+        stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        _stack().pop()
+        if exc_type is not None:
+            self.fields['error'] = exc_type.__name__
+        self.run.spans.append(dict(self.fields, stage=self.stage, depth=self.depth,
+                                   start_ms=self.run.offset_ms(self._start),
+                                   ms=(end - self._start) * 1000))
+        return False
+
+
+class _NoSpan:
+    """Stand-in returned when no run is active; every operation is a no-op."""
+
+    __slots__ = ()
+
+    def set(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def _stack():
+    stack = _local.stack
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def begin_run(session=None):
+    """Start recording spans for a rerun on the current thread.
+
+    A run left open by an interrupted rerun (e.g. ``st.stop``) is finished
+    first.
+
+    Returns:
+        TimingRun: The new run
+    """
+    if _local.run is not None:
+        finish_run()
+    _local.run = TimingRun(session)
+    _local.stack = []
+    return _local.run
+
+def current_run():
+    """Return the run recording on this thread, or None."""
+    return _local.run
+
+def span(stage, **fields):
+    """Time a block as ``stage`` of the current run.
+
+    Without an active run this returns a shared no-op object, so
+    instrumented code costs one attribute lookup when timing is off.
+
+        with span('fetch_pdf', key=key) as s:
+            body = fetch(key)
+            s.set(bytes=len(body))
+    """
+    run = _local.run
+    if run is None:
+        return _NO_SPAN
+    return Span(run, stage, fields)
+
+def annotate(**fields):
+    """Add fields to the innermost open span on this thread, if any."""
+    stack = _local.stack
+    if stack:
+        stack[-1].fields.update(fields)
+
+def record(stage, seconds, **fields):
+    """Record an already measured stage, e.g. from a client callback."""
+    run = _local.run
+    if run is None:
+        return
+    now = time.perf_counter()
+    run.spans.append(dict(fields, stage=stage, depth=_local.base_depth + len(_stack()),
+                          start_ms=run.offset_ms(now - seconds), ms=seconds * 1000))
+
+def traced(function):
+    """Bind ``function`` to the current run so spans in worker threads count.
+
+    Returns ``function`` itself when no run is active.
+    """
+    run = _local.run
+    if run is None:
+        return function
+    # Spans in the worker nest under the span open where the work was submitted
+    depth = _local.base_depth + len(_stack())
+
+    def bound(*args, **kwargs):
+        previous = _local.run, _local.stack, _local.base_depth
+        _local.run, _local.stack, _local.base_depth = run, [], depth
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _local.run, _local.stack, _local.base_depth = previous
+    return bound
+
+def stage_breakdown(spans):
+    """Aggregate spans per stage.
+
+    Returns:
+        list: Per stage, in order of first appearance: ``stage``, ``count``,
+        total ``ms``, ``bytes`` and the ``cache`` outcomes seen
+    """
+    stages = {}
+    for item in spans:
+        entry = stages.setdefault(item['stage'], {'stage': item['stage'], 'count': 0, 'ms': 0.0,
+                                                  'bytes': 0, 'cache': {}})
+        entry['count'] += 1
+        entry['ms'] += item['ms']
+        entry['bytes'] += item.get('bytes') or 0
+        if item.get('cache'):
+            entry['cache'][item['cache']] = entry['cache'].get(item['cache'], 0) + 1
+    return list(stages.values())
+
+def finish_run():
+    """Stop recording on this thread and write the run's spans to the log.
+
+    Returns:
+        dict: ``id``, ``session``, ``started``, ``total_ms`` and ``spans``
+        of the run, or None if no run was active
+    """
+    run = _local.run
+    if run is None:
+        return None
+    _local.run, _local.stack = None, []
+    summary = {
+        'id': run.id,
+        'session': run.session,
+        'started': run.started,
+        'total_ms': run.offset_ms(time.perf_counter()),
+        'spans': sorted(run.spans, key=lambda item: item['start_ms']),
+    }
+    try:
+        _write_log(summary)
+    except OSError:
+        logging.getLogger(__name__).exception("Writing timing spans failed")
+    return summary
+
+def _write_log(summary):
+    """Append one JSON line per span to the rotating span log."""
+    global _span_log
+    if _span_log is None:
+        with _log_lock:
+            if _span_log is None:
+                os.makedirs(os.path.dirname(TIMING_LOG_PATH) or '.', exist_ok=True)
+                handler = RotatingFileHandler(TIMING_LOG_PATH, maxBytes=TIMING_LOG_BYTES,
+                                              backupCount=TIMING_LOG_BACKUPS)
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                span_log = logging.getLogger(f"{__name__}.spans")
+                for old in list(span_log.handlers):
+                    span_log.removeHandler(old)
+                    old.close()
+                span_log.setLevel(logging.INFO)
+                span_log.propagate = False
+                span_log.addHandler(handler)
+                _span_log = span_log
+    context = {'run': summary['id'], 'session': summary['session'], 'run_started': summary['started']}
+    for item in summary['spans']:
+        _span_log.info(json.dumps(dict(context, **item), default=str))
+    _span_log.info(json.dumps(dict(context, stage='rerun', depth=-1, start_ms=0.0, ms=summary['total_ms'])))
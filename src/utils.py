@@ -1,66 +1,43 @@
 """Utility functions for the document review system."""
 
-import base64
 import os
-import pandas as pd
 from datetime import datetime
-from io import StringIO
-import csv
-import tempfile
-from s3_utils import upload_file_to_s3, download_file_from_s3, get_s3_file_url, get_s3_client, get_full_s3_key
+import time
+import uuid
+from s3_utils import upload_file_to_s3, download_file_from_s3, get_s3_file_url, get_s3_client, get_full_s3_key, get_bucket_name
 import streamlit as st
-from s3_utils import get_secret
-from streamlit_pdf_viewer import pdf_viewer
+import streamlit.components.v1 as components
+from s3_utils import get_presigned_url, get_s3_health
+from prefetch import get_prefetcher
+from pdf_pages import PROBE_REVALIDATE_AFTER, count_pages, probe_pdf, read_linearization
+from timing import span, stage_breakdown
+# catalog (pandas), fingerprints and page_diff (numpy, Pillow) and audit (pyarrow) are imported
+# where they are used, so scripts that only need the helpers here start quickly
 
+VIEWER_MODE_PROXY = 'proxy'
+VIEWER_MODE_PRESIGNED = 'presigned'
+# Presigned mode needs the bucket to allow the app's origin to embed objects
+DEFAULT_VIEWER_MODE = os.environ.get('DOC_REVIEW_VIEWER_MODE', VIEWER_MODE_PROXY)
+# Pages rendered up front in paged mode, and added per "load more" click
+DEFAULT_PAGE_WINDOW = 3
 
 def load_data():
     """Load and prepare the review data."""
+    from catalog import load_catalog
+
     try:
-        # First try to load from S3
-        try:
-            s3_client = get_s3_client()
-            # Test connection
-            s3_client.list_objects(Bucket=get_secret('bucket_name'), MaxKeys=1)
+        # The connection check runs in the background and is cached
+        health = get_s3_health()
+        if health['ok']:
             st.success("Successfully connected to S3")
-            use_s3 = True
-        except Exception as e:
-            st.warning(f"S3 connection failed: {str(e)}")
+        elif health['ok'] is False:
+            st.warning(f"S3 connection failed: {health['error']}")
             st.info("Using local demo data instead")
-            use_s3 = False
-            
-        if os.path.exists("data/Manual_Review.csv"):
-            df_batches = pd.read_csv("data/Manual_Review.csv")
-        else:
-            # Create demo data
-            data = {
-                'Batch': ['B001', 'B001', 'B002', 'B002', 'B003', 'B003'],
-                'batch_count': [1, 2, 1, 2, 1, 2],
-                'portal_status': ['Pending', 'Accepted', 'Rejected', 'Pending', 'Accepted', 'In Review'],
-                'reason': ['', 'Approved by agent', 'Missing information', '', 'Complete documentation', 'Waiting for verification']
-            }
-            df_batches = pd.DataFrame(data)
-
-        file_data = []
-        for _, row in df_batches.iterrows():
-            batch = row['Batch']
-            count = row['batch_count']
-            portal_status = row.get('portal_status', 'Unknown')
-            reason = row.get('reason', '')
-
-            for doc_type in ['CI', 'PL']:
-                s3_key = f'{doc_type}/{batch}/{batch}_{count}.pdf'
-                file_data.append({
-                    'batch': batch,
-                    'type': doc_type,
-                    'version': count,
-                    'file_path': s3_key,
-                    'filename': f'{batch}_{count}.pdf',
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'portal_status': portal_status,
-                    'reason': reason
-                })
-
-        return pd.DataFrame(file_data)
+
+        with span('load_data') as timed:
+            catalog = load_catalog()
+            timed.set(rows=len(catalog))
+        return catalog
     except Exception as e:
         raise Exception(f"Error loading data: {e}")
 
@@ -75,42 +52,72 @@ def format_portal_status(status, reason=""):
     tooltip = f" title='{reason}'" if reason else ""
     return f"<span class='portal-status'{tooltip}>{status}</span>"
 
-def embed_pdf_base64(s3_key):
-    """Embed a PDF file from S3 as base64 in HTML."""
+def embed_pdf_base64(s3_key, mode=None, paged=False, highlight=None):
+    """Render a PDF from S3 in the current container.
+
+    Args:
+        s3_key (str): Relative S3 key of the document
+        mode (str): ``VIEWER_MODE_PROXY`` streams the bytes through this
+            server into ``pdf_viewer``; ``VIEWER_MODE_PRESIGNED`` lets the
+            browser load the document straight from S3 through a cached
+            pre-signed URL. Defaults to ``DEFAULT_VIEWER_MODE``.
+        paged (bool): Render only the first ``DEFAULT_PAGE_WINDOW`` pages and
+            load later ones on demand. In presigned mode the browser's viewer
+            opens at page 1 and fetches linearized files with range requests.
+        highlight (dict): Precomputed page diff (see ``page_diff``); changed
+            regions are outlined, changed pages are always rendered and the
+            viewer opens on the first one. Proxy mode only.
+    """
+    # Importing the component needs a running Streamlit app
+    from streamlit_pdf_viewer import pdf_viewer
+
+    mode = mode or DEFAULT_VIEWER_MODE
+    with span('embed_pdf', key=s3_key, mode=mode, paged=paged):
+        return _embed_pdf(pdf_viewer, s3_key, mode, paged, highlight)
+
+def _embed_pdf(pdf_viewer, s3_key, mode, paged, highlight):
+    """Render one document; see ``embed_pdf_base64``."""
     try:
-        # Download the PDF content from S3
-        s3_client = get_s3_client()
-        bucket_name = get_secret('bucket_name')
-        full_key = get_full_s3_key(s3_key)
-        
         try:
-            # Get the PDF content directly from S3
-            url = s3_client.generate_presigned_url('get_object',
-                                                 Params={'Bucket': bucket_name,
-                                                        'Key': full_key,
-                                                        'ResponseContentType': 'application/pdf',
-                                                        'ResponseContentDisposition': 'inline'},
-                                                 ExpiresIn=3600)
-            print (url)
-            response = s3_client.get_object(Bucket=bucket_name, Key=full_key)
-            pdf_content = response['Body'].read()
-            
-            # Encode the PDF content as base64
-            base64_pdf = base64.b64encode(pdf_content).decode('utf-8')
-            
-            # Create the PDF viewer HTML with base64 data
-            pdf_display = f"""
-                <iframe
-                    src="https://mozilla.github.io/pdf.js/web/viewer.html?file={url}"
-                    width="700"
-                    height="1000"
-                    style="border: 1px solid #ddd; border-radius: 4px;"
-                ></iframe>
-            """
-
-            pdf_viewer(pdf_content, height= 1200,width= 900)
-
-            # return pdf_display
+            start = time.perf_counter()
+            if mode == VIEWER_MODE_PRESIGNED:
+                # The browser fetches the bytes; nothing passes through here
+                with span('presigned_url'):
+                    url = get_presigned_url(s3_key, inline_pdf=True)
+                components.iframe(f"{url}#page=1" if paged else url, height=1200, scrolling=True)
+                if paged:
+                    # One 1 KB range request tells us the page count if linearized
+                    info = _probe_pdf_quietly(s3_key)
+                    _report_handoff(s3_key, start, info['page_count'] if info else None, None)
+                return None
+
+            # Served from the memory/disk cache, revalidated by ETag
+            pdf_content = get_prefetcher().get(s3_key)
+            highlights = {}
+            if highlight:
+                from page_diff import diff_annotations
+                highlights['annotations'] = diff_annotations(highlight)
+                if highlight['changed_pages']:
+                    highlights['scroll_to_page'] = highlight['changed_pages'][0]
+            if not paged:
+                with span('pdf_viewer', bytes=len(pdf_content)):
+                    pdf_viewer(pdf_content, height= 1200,width= 900, key=f"pdf/{s3_key}", **highlights)
+                return None
+
+            linearization = read_linearization(pdf_content)
+            page_count = (linearization or {}).get('N') or count_pages(pdf_content)
+            window_key = f"page_window/{s3_key}"
+            window = st.session_state.get(window_key, DEFAULT_PAGE_WINDOW)
+            pages = list(range(1, min(window, page_count) + 1))
+            changed = [p for p in (highlight or {}).get('changed_pages', []) if window < p <= page_count]
+            with span('pdf_viewer', bytes=len(pdf_content), pages=len(pages + changed)):
+                pdf_viewer(pdf_content, height= 1200,width= 900, key=f"pdf/{s3_key}",
+                           pages_to_render=pages + changed, **highlights)
+            _report_handoff(s3_key, start, page_count, len(pages))
+            if window < page_count:
+                st.button(f"Load pages {window + 1}-{min(window + DEFAULT_PAGE_WINDOW, page_count)}",
+                          key=f"more/{s3_key}", on_click=_grow_page_window,
+                          args=(window_key, window + DEFAULT_PAGE_WINDOW))
         except Exception as s3_error:
             st.warning(f"Error fetching from S3: {str(s3_error)}")
             
@@ -118,21 +125,8 @@ def embed_pdf_base64(s3_key):
             local_path = f"static/documents/{s3_key}"
             if os.path.exists(local_path):
                 st.info(f"Using local file: {local_path}")
-                with open(local_path, "rb") as f:
-                    pdf_content = f.read()
-                    base64_pdf = base64.b64encode(pdf_content).decode('utf-8')
-                    pdf_display = f'''
-                        <div style="width:100%; height:60vh;">
-                            <embed
-                                type="application/pdf"
-                                src="data:application/pdf;base64,{base64_pdf}"
-                                width="100%"
-                                height="100%"
-                                style="border: 1px solid #ddd; border-radius: 4px;"
-                            />
-                        </div>
-                    '''
-                    return pdf_display
+                pdf_viewer(local_path, height= 1200,width= 900, key=f"pdf/{s3_key}")
+                return None
             else:
                 # Display placeholder instead
                 return f'''
@@ -147,6 +141,55 @@ def embed_pdf_base64(s3_key):
     except Exception as e:
         return f"<div style='padding:20px; border:1px solid #ddd; background:#f9f9f9;'><h3>Error Loading PDF</h3><code>{str(e)}</code></div>"
 
+def _probe_pdf_quietly(s3_key):
+    """Return ``probe_pdf`` metadata, or None if the probe fails.
+
+    A probe is reused while the fingerprint file lists the same ETag for the
+    key, and otherwise revalidated at most every ``PROBE_REVALIDATE_AFTER``
+    seconds, so reruns do not each send a range request.
+    """
+    from fingerprints import load_fingerprint_index
+
+    try:
+        return probe_pdf(s3_key, etag=load_fingerprint_index().etag(s3_key), max_age=PROBE_REVALIDATE_AFTER)
+    except Exception:
+        return None
+
+def _grow_page_window(window_key, window):
+    st.session_state[window_key] = window
+
+def _report_handoff(s3_key, start, page_count, rendered):
+    """Show and record the server time until the document was handed to the viewer.
+
+    The browser renders afterwards, so this is not the time to the first
+    visible page.
+    """
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    st.session_state.setdefault('viewer_handoff_ms', {})[s3_key] = elapsed_ms
+    pages = f"{page_count} pages" if page_count else "page count unknown"
+    shown = f"showing 1-{rendered} · " if rendered else ""
+    st.caption(f"{shown}{pages} · handed to viewer in {elapsed_ms:.0f} ms")
+
+def render_timing_panel(runs):
+    """Show the per-stage timing of a session's most recent reruns.
+
+    Args:
+        runs (list): Run summaries from ``timing.finish_run``, oldest first
+    """
+    if not runs:
+        st.caption("No timed reruns yet")
+        return
+    latest = runs[-1]
+    st.metric("Last rerun", f"{latest['total_ms']:.0f} ms")
+    st.dataframe([
+        {'stage': entry['stage'], 'count': entry['count'], 'ms': round(entry['ms'], 1),
+         'KB': round(entry['bytes'] / 1024, 1),
+         'cache': ', '.join(f"{outcome} {n}" for outcome, n in entry['cache'].items())}
+        for entry in stage_breakdown(latest['spans'])
+    ], hide_index=True, use_container_width=True)
+    st.caption("Nested stages are included in their parents' time")
+    st.line_chart([run['total_ms'] for run in runs], height=120)
+
 def generate_comparison_pairs(versions):
     """Generate pairs of versions for comparison."""
     if len(versions) < 2:
@@ -157,33 +200,22 @@ def generate_comparison_pairs(versions):
     return pairs
 
 def export_audit_trail(audit_trail):
-    """Export audit trail to CSV format and save to S3."""
+    """Export audit trail to CSV format and save a copy to S3.
+
+    Every export gets its own key, so exports never replace each other. The
+    queryable history is written by the audit journal, not here.
+    """
+    from audit import audit_trail_csv
+
     if not audit_trail:
         return ""
 
-    all_keys = set().union(*(row.keys() for row in audit_trail))
-    fieldnames = list(all_keys)
-
-    # Create CSV in memory
-    buffer = StringIO()
-    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
-    writer.writeheader()
-    for row in audit_trail:
-        writer.writerow({key: row.get(key) for key in fieldnames})
-    
-    # Save to temporary file and upload to S3
-    with tempfile.NamedTemporaryFile(mode='w', delete=False) as temp_file:
-        temp_file.write(buffer.getvalue())
-        temp_file.flush()
-        
-        # Generate S3 key with timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d")
-        s3_key = f'audit/audit_trails/{timestamp}/audit_trail.csv'
-        
-        # Upload to S3
-        upload_file_to_s3(temp_file.name, s3_key)
-        
-        # Clean up temporary file
-        os.unlink(temp_file.name)
-    
-    return buffer.getvalue() 
\ No newline at end of file
+    csv_data = audit_trail_csv(audit_trail)
+    now = datetime.now()
+    s3_key = f'audit/exports/{now:%Y-%m-%d}/audit_trail-{now:%H%M%S%f}-{uuid.uuid4().hex[:8]}.csv'
+    try:
+        get_s3_client().put_object(Bucket=get_bucket_name(), Key=get_full_s3_key(s3_key),
+                                   Body=csv_data.encode('utf-8'), ContentType='text/csv')
+    except Exception as e:
+        st.error(f"Error uploading file to S3: {str(e)}")
+    return csv_data
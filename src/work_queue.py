@@ -0,0 +1,261 @@
+"""Lease-based queue that hands each reviewer the next unreviewed batch."""
+
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta
+
+from review_store import REVIEWED, get_review_store
+
+# A claimed item returns to the queue when its lease is not renewed in time.
+DEFAULT_LEASE_SECONDS = 15 * 60
+# A held lease is renewed once less than this is left of it
+RENEW_BEFORE_SECONDS = 5 * 60
+# How often an item held by another session is checked again
+RECHECK_SECONDS = 30
+PRIORITY_AGE = 'age'
+PRIORITY_PORTAL_STATUS = 'portal_status'
+DEFAULT_PRIORITY = os.environ.get('DOC_REVIEW_QUEUE_ORDER', PRIORITY_AGE)
+# Portal statuses reviewed first under the portal_status order, matched by prefix
+DEFAULT_STATUS_ORDER = ('Pending', 'In Review', 'Rejected', 'Accepted')
+# How long peek and throughput answers are reused; every rerun of every session asks
+SNAPSHOT_SECONDS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    batch TEXT NOT NULL,
+    doc_type TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (batch, doc_type)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS leases_owner ON leases (owner);
+"""
+
+_queue_lock = threading.Lock()
+_work_queue = None
+
+
+def queue_order(index, priority=PRIORITY_AGE, status_order=DEFAULT_STATUS_ORDER):
+    """Return every ``(batch, doc_type)`` of a catalog in review order.
+
+    ``age`` reviews the oldest batches first; batch ids are assigned in
+    submission order, so that is catalog order. ``portal_status`` reviews
+    items by the portal status of their latest version, in
+    ``status_order``, and by age within a status.
+    """
+    statuses = index.latest_statuses()
+    items = list(statuses)
+    if priority == PRIORITY_PORTAL_STATUS:
+        def rank(item):
+            status = str(statuses[item])
+            return next((i for i, prefix in enumerate(status_order) if status.startswith(prefix)),
+                        len(status_order))
+        items.sort(key=rank)
+    elif priority != PRIORITY_AGE:
+        raise ValueError(f"Unknown queue priority: {priority}")
+    return items
+
+
+class WorkQueue:
+    """Leases on ``(batch, doc_type)`` items, kept next to the reviews in SQLite.
+
+    Each session holds at most one lease. ``next`` releases the session's
+    lease and claims the first item in queue order that is neither reviewed
+    nor leased by another session; ``claim`` takes or renews the lease on an
+    item picked by hand. Claims run in ``BEGIN IMMEDIATE`` transactions, so
+    sessions in any number of processes never receive the same item.
+    """
+
+    def __init__(self, store, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        # Per catalog and priority: the queue order and how many leading items are reviewed.
+        # Weak keys drop the orders of a replaced catalog.
+        self._orders = weakref.WeakKeyDictionary()
+        # Per catalog and priority: (expiry, item) of the last peek; and (expiry, hours, pace)
+        self._peeks = weakref.WeakKeyDictionary()
+        self._pace = None
+        self._cache_lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        """Return this thread's connection; transactions are managed explicitly."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.store.path, timeout=30, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self, work):
+        """Run ``work(connection, now)`` holding the database write lock."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            connection.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+            result = work(connection, now)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return result
+
+    def _forget_snapshots(self):
+        """Drop the cached peeks and pace once this process hands out or returns an item."""
+        with self._cache_lock:
+            self._peeks.clear()
+            self._pace = None
+
+    def _order(self, index, priority):
+        with self._cache_lock:
+            orders = self._orders.setdefault(index, {})
+            state = orders.get(priority)
+            if state is None:
+                state = orders[priority] = [queue_order(index, priority), 0]
+        return state
+
+    def _candidates(self, index, priority, statuses, taken):
+        """Yield unreviewed items in queue order that are not in ``taken``."""
+        state = self._order(index, priority)
+        order, start = state
+        # Reviews are final, so items before the first unreviewed one are never scanned again
+        while start < len(order) and statuses.get(order[start]) == REVIEWED:
+            start += 1
+        state[1] = start
+        for position in range(start, len(order)):
+            item = order[position]
+            if statuses.get(item) != REVIEWED and item not in taken:
+                yield item
+
+    def _lease(self, batch, doc_type, owner, expires_at):
+        return {'batch': batch, 'doc_type': doc_type, 'owner': owner, 'expires_at': expires_at}
+
+    def next(self, owner, index, priority=DEFAULT_PRIORITY):
+        """Release ``owner``'s lease and claim the next item in the queue.
+
+        Args:
+            owner (str): Id of the reviewing session
+            index (CatalogIndex): Index of the document catalog
+            priority (str): ``age`` or ``portal_status``
+
+        Returns:
+            dict: The new lease (``batch``, ``doc_type``, ``owner``,
+            ``expires_at``), or None when every item is reviewed or leased
+        """
+        # Reading flushes this process's queued reviews, so a saved item is not handed out again.
+        # It writes through the store's connection, so it must happen before the transaction.
+        statuses = self.store.statuses()
+
+        def claim_next(connection, now):
+            connection.execute("DELETE FROM leases WHERE owner = ?", (owner,))
+            taken = set(connection.execute("SELECT batch, doc_type FROM leases"))
+            for batch, doc_type in self._candidates(index, priority, statuses, taken):
+                expires_at = now + self.lease_seconds
+                connection.execute("INSERT INTO leases (batch, doc_type, owner, expires_at) VALUES (?, ?, ?, ?)",
+                                   (batch, doc_type, owner, expires_at))
+                return self._lease(batch, doc_type, owner, expires_at)
+            return None
+        lease = self._transaction(claim_next)
+        self._forget_snapshots()
+        return lease
+
+    def claim(self, owner, batch, doc_type):
+        """Claim or renew the lease on one item.
+
+        Returns:
+            dict: ``owner``'s renewed lease, or the lease of the session that
+            holds the item; compare ``owner`` to tell them apart
+        """
+        def claim_item(connection, now):
+            holder = connection.execute("SELECT owner, expires_at FROM leases WHERE batch = ? AND doc_type = ?",
+                                        (batch, doc_type)).fetchone()
+            if holder is not None and holder[0] != owner:
+                return self._lease(batch, doc_type, *holder)
+            connection.execute("DELETE FROM leases WHERE owner = ?", (owner,))
+            expires_at = now + self.lease_seconds
+            connection.execute("INSERT INTO leases (batch, doc_type, owner, expires_at) VALUES (?, ?, ?, ?)",
+                               (batch, doc_type, owner, expires_at))
+            return self._lease(batch, doc_type, owner, expires_at)
+        return self._transaction(claim_item)
+
+    def hold(self, owner, batch, doc_type, lease=None):
+        """Keep ``owner``'s lease on the item on screen, writing only when needed.
+
+        ``lease`` is the session's last known lease. It is returned as is
+        while it covers this item and has more than ``RENEW_BEFORE_SECONDS``
+        left, or, if another session holds the item, was checked within
+        ``RECHECK_SECONDS``; otherwise the item is claimed again.
+
+        Returns:
+            dict: The lease, as returned by ``claim`` plus ``checked_at``
+        """
+        now = time.time()
+        if lease is not None and (lease['batch'], lease['doc_type']) == (batch, doc_type):
+            if lease['owner'] == owner and lease['expires_at'] - now > RENEW_BEFORE_SECONDS:
+                return lease
+            if lease['owner'] != owner and now - lease.get('checked_at', 0) < RECHECK_SECONDS:
+                return lease
+        return dict(self.claim(owner, batch, doc_type), checked_at=now)
+
+    def release(self, owner):
+        """Return ``owner``'s item to the queue."""
+        self._transaction(lambda connection, now: connection.execute(
+            "DELETE FROM leases WHERE owner = ?", (owner,)))
+        self._forget_snapshots()
+
+    def peek(self, index, priority=DEFAULT_PRIORITY):
+        """Return the item ``next`` would most likely hand out, without claiming it.
+
+        Used to prefetch the documents of the upcoming item. The answer is
+        reused for ``SNAPSHOT_SECONDS``, or until this process hands out or
+        returns an item.
+
+        Returns:
+            tuple: ``(batch, doc_type)``, or None if the queue is empty
+        """
+        now = time.time()
+        with self._cache_lock:
+            cached = self._peeks.get(index, {}).get(priority)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        statuses = self.store.statuses()
+        taken = set(self._connection().execute(
+            "SELECT batch, doc_type FROM leases WHERE expires_at > ?", (now,)))
+        item = next(self._candidates(index, priority, statuses, taken), None)
+        with self._cache_lock:
+            self._peeks.setdefault(index, {})[priority] = (now + SNAPSHOT_SECONDS, item)
+        return item
+
+    def throughput(self, hours=1):
+        """Return the team's recent pace, reused for ``SNAPSHOT_SECONDS``.
+
+        Returns:
+            dict: ``reviews`` saved in the last ``hours``, ``per_hour`` and
+            ``reviewers`` currently holding a lease
+        """
+        pace = self._pace
+        if pace is not None and pace[0] > time.time() and pace[1] == hours:
+            return pace[2]
+        self.store.flush()
+        since = (datetime.now() - timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
+        connection = self._connection()
+        reviews = connection.execute("SELECT COUNT(*) FROM reviews WHERE timestamp >= ?", (since,)).fetchone()[0]
+        reviewers = connection.execute("SELECT COUNT(*) FROM leases WHERE expires_at > ?",
+                                       (time.time(),)).fetchone()[0]
+        pace = {'reviews': reviews, 'per_hour': reviews / hours, 'reviewers': reviewers}
+        with self._cache_lock:
+            self._pace = (time.time() + SNAPSHOT_SECONDS, hours, pace)
+        return pace
+
+def get_work_queue():
+    """Return the process-wide work queue over the review store's database."""
+    global _work_queue
+    if _work_queue is None:
+        with _queue_lock:
+            if _work_queue is None:
+                _work_queue = WorkQueue(get_review_store())
+    return _work_queue
@@ -0,0 +1,57 @@
+"""Fixtures and document builders shared by the tests."""
+
+from io import BytesIO
+
+import boto3
+import pytest
+from moto import mock_aws
+from PIL import Image, ImageDraw
+
+# Tests import src.s3_utils while the modules under test import s3_utils; both copies hold state
+from src import s3_utils
+import s3_utils as s3_utils_under_test
+
+S3_UTILS_COPIES = (s3_utils, s3_utils_under_test)
+
+
+def make_scan(page_count):
+    """Build an image-only PDF with no text layer."""
+    pages = []
+    for number in range(page_count):
+        image = Image.new('RGB', (850, 1100), 'white')
+        ImageDraw.Draw(image).rectangle((100, 100 + 50 * number, 500, 300), fill='black')
+        pages.append(image)
+    buffer = BytesIO()
+    pages[0].save(buffer, 'PDF', save_all=True, append_images=pages[1:])
+    return buffer.getvalue()
+
+def make_text_pdf(text, producer='Scanner 1.0'):
+    """Build a one-page PDF that shows ``text``."""
+    content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode('latin-1')
+    return (b'%PDF-1.4\n'
+            b'1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n'
+            b'2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n'
+            b'3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R >>\nendobj\n'
+            b'4 0 obj\n<< /Length ' + str(len(content)).encode() + b' >>\nstream\n' + content +
+            b'\nendstream\nendobj\n'
+            b'5 0 obj\n<< /Producer (' + producer.encode() + b') >>\nendobj\n%%EOF\n')
+
+@pytest.fixture
+def s3_bucket(monkeypatch):
+    """Provide a mocked bucket and a freshly resolved S3 configuration."""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_BUCKET_NAME', 'review-bucket')
+    monkeypatch.setenv('AWS_REGION', 'eu-central-1')
+    with mock_aws():
+        for module in S3_UTILS_COPIES:
+            module.reset_s3_client()
+            module.reset_s3_stats()
+        client = boto3.client('s3', region_name='eu-central-1')
+        client.create_bucket(
+            Bucket='review-bucket',
+            CreateBucketConfiguration={'LocationConstraint': 'eu-central-1'}
+        )
+        yield client
+        for module in S3_UTILS_COPIES:
+            module.reset_s3_client()
@@ -0,0 +1,105 @@
+"""Tests for the write-behind audit journal."""
+
+import os
+
+from src import audit
+from src.audit import (AuditJournal, audit_trail_csv, batch_bucket, compact_audit_history, import_legacy_audit,
+                       query_audit)
+
+
+def entry(n):
+    return {'timestamp': f'2024-05-0{n} 10:00:00', 'batch': f'B00{n}', 'decision': 'Accept'}
+
+def keys(client):
+    response = client.list_objects_v2(Bucket='review-bucket', Prefix='Doc_Review/audit/')
+    return sorted(obj['Key'] for obj in response.get('Contents', []))
+
+def test_audit_trail_csv_keeps_column_order():
+    """Test that columns follow first appearance and missing values are blank."""
+    text = audit_trail_csv([{'b': 1, 'a': 2}, {'a': 3, 'c': 4}])
+    assert text.splitlines() == ['b,a,c', '1,2,', ',3,4']
+    assert audit_trail_csv([]) == ''
+
+def test_flush_uploads_partitions_and_compact_merges(s3_bucket, tmp_path):
+    """Test batched part uploads into batch and month partitions and their compaction."""
+    journal = AuditJournal(journal_dir=str(tmp_path))
+    journal.append(entry(1))
+    journal.append(entry(1))
+    assert keys(s3_bucket) == []
+    assert [row['batch'] for row in journal.query(batch='B001')] == ['B001', 'B001']
+
+    assert journal.flush() == 2
+    assert journal.pending_count() == 0
+    parts = keys(s3_bucket)
+    assert len(parts) == 1
+    assert f'/audit/history/bucket={batch_bucket("B001"):02d}/month=2024-05/part-' in parts[0]
+
+    journal.append(entry(1))
+    journal.flush()
+    assert journal.compact() == 2
+    merged, = keys(s3_bucket)
+    assert '/month=2024-05/data-' in merged and merged.endswith('.parquet')
+    rows = journal.query(batch='B001')
+    assert len(rows) == 3 and len({row['entry_id'] for row in rows}) == 3
+
+def test_query_reads_only_matching_partitions(s3_bucket, tmp_path, monkeypatch):
+    """Test batch, type and time filters and that other buckets and months are not downloaded."""
+    monkeypatch.setattr(audit, 'LISTING_TTL', 0)
+    journal = AuditJournal(journal_dir=str(tmp_path / 'journal'))
+    for n in range(1, 10):
+        for month in ('03', '05'):
+            journal.append({'timestamp': f'2024-{month}-0{n} 10:00:00', 'batch': f'B00{n}', 'doc_type': 'CI',
+                            'decision': 'Accept'})
+    journal.append({'timestamp': '2024-05-02 11:00:00', 'batch': 'B002', 'doc_type': 'PL', 'decision': 'Reject'})
+    journal.flush()
+
+    cache_dir = str(tmp_path / 'cache')
+    rows = query_audit(batch='B002', since='2024-05-01', cache_dir=cache_dir)
+    assert [(row['doc_type'], row['decision']) for row in rows] == [('PL', 'Reject'), ('CI', 'Accept')]
+    downloaded = [name for _, _, names in os.walk(cache_dir) for name in names]
+    assert len(downloaded) == 1
+
+    assert len(query_audit(batch='B002', doc_type='CI', cache_dir=cache_dir)) == 2
+    assert len(query_audit(until='2024-04-01', cache_dir=cache_dir)) == 9
+    assert len(query_audit(limit=5, cache_dir=cache_dir)) == 5
+
+    compact_audit_history(cache_dir)
+    assert len(query_audit(cache_dir=cache_dir)) == 19
+
+def test_listing_cleanup_keeps_downloads_in_progress(s3_bucket, tmp_path, monkeypatch):
+    """Test that dropping compacted-away copies spares other threads' temporary downloads."""
+    monkeypatch.setattr(audit, 'LISTING_TTL', 0)
+    journal = AuditJournal(journal_dir=str(tmp_path / 'journal'))
+    journal.append(entry(1))
+    journal.flush()
+    cache_dir = str(tmp_path / 'cache')
+    assert len(query_audit(batch='B001', cache_dir=cache_dir)) == 1
+
+    month_dir = os.path.join(cache_dir, audit.partition_prefix(batch_bucket('B001'), '2024-05'))
+    downloading = os.path.join(month_dir, 'data-next.parquet.1a2b3c4d.tmp')
+    compacted = os.path.join(month_dir, 'part-gone.parquet')
+    for path in (downloading, compacted):
+        with open(path, 'wb') as f:
+            f.write(b'partial')
+    assert len(query_audit(batch='B001', cache_dir=cache_dir)) == 1
+    assert os.path.exists(downloading) and not os.path.exists(compacted)
+
+def test_import_legacy_audit_is_idempotent(s3_bucket, tmp_path):
+    """Test that the daily CSV trails are copied into the history once."""
+    s3_bucket.put_object(Bucket='review-bucket', Key='Doc_Review/audit/audit_trails/2024-05-01/audit_trail.csv',
+                         Body=audit_trail_csv([entry(1), entry(2)]).encode('utf-8'))
+    assert import_legacy_audit() == 2
+    assert import_legacy_audit() == 2
+    assert [row['batch'] for row in query_audit(cache_dir=str(tmp_path))] == ['B002', 'B001']
+
+def test_unflushed_entries_survive_restart(s3_bucket, tmp_path):
+    """Test that pending entries are recovered from the journal."""
+    journal = AuditJournal(journal_dir=str(tmp_path))
+    journal.append(entry(1))
+    journal.flush()
+    journal.append(entry(2))
+
+    restarted = AuditJournal(journal_dir=str(tmp_path))
+    assert restarted.pending_count() == 1
+    assert restarted.flush() == 1
+    assert AuditJournal(journal_dir=str(tmp_path)).pending_count() == 0
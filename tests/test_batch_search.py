@@ -0,0 +1,44 @@
+"""Tests for the batch picker search."""
+
+import pandas as pd
+
+from src.batch_search import BatchSearchIndex, get_batch_search
+from src.catalog import build_catalog
+
+
+def catalog(batch_ids, statuses=None):
+    statuses = statuses or ['Pending'] * len(batch_ids)
+    return build_catalog(pd.DataFrame({
+        'Batch': batch_ids, 'batch_count': [1] * len(batch_ids), 'portal_status': statuses,
+    }))
+
+def test_match_ranks_prefix_matches_first():
+    """Test prefix and substring matching, case-insensitively."""
+    search = BatchSearchIndex(catalog(['BATCH0008145', 'BATCH0018146', 'BATCH0008146', 'X8146']))
+    assert search.batches[search.match('batch00081')].tolist() == ['BATCH0008145', 'BATCH0008146']
+    assert search.batches[search.match('8146')].tolist() == ['BATCH0008146', 'BATCH0018146', 'X8146']
+    assert search.batches[search.match('x8')].tolist() == ['X8146']
+    assert len(search.match('')) == 4 and len(search.match('nothing')) == 0
+
+def test_search_pages_and_filters():
+    """Test that only one page is returned and filters narrow the total."""
+    ids = [f'BATCH{n:07d}' for n in range(120)]
+    search = BatchSearchIndex(catalog(ids, ['Accepted' if n % 3 == 0 else 'Pending' for n in range(120)]))
+    assert search.portal_statuses == ['Accepted', 'Pending']
+
+    page, total = search.search('', page=2, page_size=50)
+    assert total == 120 and page == ids[100:]
+
+    page, total = search.search('BATCH00000', portal_status='Accepted', page_size=5)
+    assert total == 34 and page == ['BATCH0000000', 'BATCH0000003', 'BATCH0000006', 'BATCH0000009',
+                                    'BATCH0000012']
+
+    reviewed = ['BATCH0000003', 'BATCH0000004']
+    assert search.search('', reviewed=True, reviewed_batches=reviewed) == (reviewed, 2)
+    assert search.search('', portal_status='Accepted', reviewed=False, reviewed_batches=reviewed)[1] == 39
+
+def test_get_batch_search_is_built_once_per_catalog():
+    """Test that the index is reused for the same catalog object only."""
+    first = catalog(['B1', 'B2'])
+    assert get_batch_search(first) is get_batch_search(first)
+    assert get_batch_search(catalog(['B1', 'B2'])) is not get_batch_search(first)
@@ -0,0 +1,29 @@
+"""Tests for the benchmark suite's helpers."""
+
+from scripts.benchmark_suite import compare_results, measure, synthetic_pdf
+from src.pdf_pages import count_pages
+
+
+def report(**medians):
+    return {'results': {name: {'median': median} for name, median in medians.items()}}
+
+def test_compare_results_flags_only_slowdowns_over_threshold():
+    """Test that regressions beyond the threshold are reported and new benchmarks ignored."""
+    baseline = report(fast=1.0, steady=1.0, slower=1.0)
+    current = report(fast=0.5, steady=1.15, slower=1.5, new=9.0)
+    assert compare_results(current, baseline, threshold=0.2) == [('slower', 1.0, 1.5)]
+    assert compare_results(current, baseline, threshold=0.1) == [('slower', 1.0, 1.5), ('steady', 1.0, 1.15)]
+
+def test_measure_batches_fast_calls():
+    """Test that fast functions are timed over many calls per sample."""
+    calls = []
+    result = measure(lambda: calls.append(1), repeat=3)
+    assert result['number'] > 1 and result['repeat'] == 3
+    assert len(calls) >= 3 * result['number']
+    assert 0 <= result['min'] <= result['median'] <= result['max']
+
+def test_synthetic_pdf_has_requested_shape():
+    """Test that synthetic PDFs are parseable and close to the requested size."""
+    pdf = synthetic_pdf(100_000, pages=4)
+    assert count_pages(pdf) == 4
+    assert 95_000 <= len(pdf) <= 105_000
@@ -0,0 +1,117 @@
+"""Tests for streaming batch-bundle exports."""
+
+import csv
+import os
+import zipfile
+from io import BytesIO, StringIO
+
+import pandas as pd
+import pytest
+from botocore.exceptions import ClientError
+
+from src import bundle
+from src.bundle import MultipartUploadWriter, bundle_entries, export_bundle, start_export, write_bundle
+from src.catalog import CatalogIndex
+
+
+def catalog_index(batches, versions=(1, 2)):
+    rows = [(b, t, v) for b in batches for t in ('CI', 'PL') for v in versions]
+    return CatalogIndex(pd.DataFrame({
+        'batch': [b for b, _, _ in rows],
+        'type': [t for _, t, _ in rows],
+        'version': [v for _, _, v in rows],
+        'file_path': [f'{t}/{b}/{b}_{v}.pdf' for b, t, v in rows],
+        'portal_status': ['Pending'] * len(rows),
+        'reason': [''] * len(rows),
+    }))
+
+class WriteOnly:
+    """A non-seekable stream, like an HTTP response body."""
+
+    def __init__(self):
+        self.buffer = BytesIO()
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+    def flush(self):
+        pass
+
+def test_bundle_entries_cover_every_version():
+    """Test that all versions of both document types are listed per batch."""
+    entries = bundle_entries(catalog_index(['B001', 'B002']), ['B002'])
+    assert entries == [
+        ('B002/CI/B002_1.pdf', 'CI/B002/B002_1.pdf'), ('B002/CI/B002_2.pdf', 'CI/B002/B002_2.pdf'),
+        ('B002/PL/B002_1.pdf', 'PL/B002/B002_1.pdf'), ('B002/PL/B002_2.pdf', 'PL/B002/B002_2.pdf'),
+    ]
+
+def test_write_bundle_streams_to_unseekable_output(s3_bucket, tmp_path, monkeypatch):
+    """Test S3 reads, the local fallback, missing documents and the audit rows."""
+    s3_bucket.put_object(Bucket='review-bucket', Key='Doc_Review/CI/B001/B001_1.pdf', Body=b'%PDF-s3')
+    local = tmp_path / 'CI' / 'B001'
+    local.mkdir(parents=True)
+    (local / 'B001_2.pdf').write_bytes(b'%PDF-local')
+    monkeypatch.setattr(bundle, 'LOCAL_DOCUMENTS_DIR', str(tmp_path))
+
+    output = WriteOnly()
+    summary = write_bundle(output, bundle_entries(catalog_index(['B001']), ['B001'], ['CI']) +
+                           [('B001/CI/B001_9.pdf', 'CI/B001/B001_9.pdf')],
+                           [{'batch': 'B001', 'decision': 'Accept'}])
+
+    assert summary == {'documents': 2, 'missing': ['CI/B001/B001_9.pdf'], 'bytes': 17}
+    with zipfile.ZipFile(BytesIO(output.buffer.getvalue())) as archive:
+        assert archive.read('B001/CI/B001_1.pdf') == b'%PDF-s3'
+        assert archive.read('B001/CI/B001_2.pdf') == b'%PDF-local'
+        assert archive.read('MISSING.txt') == b'CI/B001/B001_9.pdf\n'
+        rows = list(csv.DictReader(StringIO(archive.read('audit_trail.csv').decode())))
+        assert rows == [{'batch': 'B001', 'decision': 'Accept'}]
+
+def test_export_bundle_uploads_in_parts(s3_bucket):
+    """Test that a bundle larger than one part arrives intact via multipart upload."""
+    documents = {}
+    for version in (1, 2):
+        for doc_type in ('CI', 'PL'):
+            key = f'{doc_type}/B001/B001_{version}.pdf'
+            documents[key] = os.urandom(2 * 1024 * 1024)
+            s3_bucket.put_object(Bucket='review-bucket', Key=f'Doc_Review/{key}', Body=documents[key])
+
+    key, summary = export_bundle(catalog_index(['B001']), ['B001'], relative_key='exports/bundles/B001.zip',
+                                 part_size=5 * 1024 * 1024)
+    assert summary['documents'] == 4 and summary['missing'] == []
+
+    body = s3_bucket.get_object(Bucket='review-bucket', Key=f'Doc_Review/{key}')['Body'].read()
+    with zipfile.ZipFile(BytesIO(body)) as archive:
+        for relative_key, data in documents.items():
+            doc_type, batch, filename = relative_key.split('/')
+            assert archive.read(f'{batch}/{doc_type}/{filename}') == data
+
+def test_start_export_reports_progress(s3_bucket):
+    """Test that a background export counts its documents and ends with a key and summary."""
+    for doc_type in ('CI', 'PL'):
+        s3_bucket.put_object(Bucket='review-bucket', Key=f'Doc_Review/{doc_type}/B001/B001_1.pdf', Body=b'%PDF')
+    job = start_export(catalog_index(['B001'], versions=(1,)), ['B001'])
+    job['thread'].join(30)
+    assert job['error'] is None and (job['done'], job['total']) == (2, 2)
+    assert job['summary']['documents'] == 2
+    assert s3_bucket.head_object(Bucket='review-bucket', Key=f"Doc_Review/{job['key']}")['ContentLength'] > 0
+
+def test_only_missing_objects_fall_back_to_local_files(s3_bucket, tmp_path, monkeypatch):
+    """Test that other S3 errors are raised instead of being treated as missing documents."""
+    (tmp_path / 'CI' / 'B001').mkdir(parents=True)
+    (tmp_path / 'CI' / 'B001' / 'B001_1.pdf').write_bytes(b'%PDF-local')
+    monkeypatch.setattr(bundle, 'LOCAL_DOCUMENTS_DIR', str(tmp_path))
+
+    class DeniedClient:
+        def get_object(self, **params):
+            raise ClientError({'Error': {'Code': 'AccessDenied'}}, 'GetObject')
+    monkeypatch.setattr(bundle, 'get_s3_client', DeniedClient)
+    with pytest.raises(ClientError):
+        write_bundle(WriteOnly(), [('B001/CI/B001_1.pdf', 'CI/B001/B001_1.pdf')])
+
+def test_aborted_upload_leaves_no_object(s3_bucket):
+    """Test that an aborted writer discards its parts."""
+    writer = MultipartUploadWriter('exports/bundles/broken.zip', part_size=5 * 1024 * 1024)
+    writer.write(os.urandom(6 * 1024 * 1024))
+    writer.abort()
+    assert s3_bucket.list_multipart_uploads(Bucket='review-bucket').get('Uploads', []) == []
+    assert s3_bucket.list_objects_v2(Bucket='review-bucket').get('KeyCount') == 0
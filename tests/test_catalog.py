@@ -0,0 +1,100 @@
+"""Tests for catalog construction."""
+
+import pandas as pd
+
+from src.catalog import (
+    CatalogIndex,
+    build_catalog,
+    catalog_file_paths,
+    demo_batches,
+    expand_catalog,
+    invalidate_catalog,
+    load_catalog,
+    read_catalog_snapshot,
+    write_catalog_snapshot
+)
+
+
+def test_build_catalog_expands_doc_types():
+    """Test that each source row yields a CI and a PL entry."""
+    catalog = build_catalog(demo_batches(), timestamp='2024-01-01 00:00:00')
+
+    assert len(catalog) == 12
+    first = expand_catalog(catalog).iloc[0].to_dict()
+    assert first == {
+        'batch': 'B001', 'type': 'CI', 'version': 1,
+        'file_path': 'CI/B001/B001_1.pdf', 'filename': 'B001_1.pdf',
+        'timestamp': '2024-01-01 00:00:00',
+        'portal_status': 'Pending', 'reason': '',
+    }
+    assert catalog_file_paths(catalog).iloc[1] == 'PL/B001/B001_1.pdf'
+    assert catalog.iloc[3]['portal_status'] == 'Accepted'
+
+def test_build_catalog_is_compact():
+    """Test that repeated strings are categorical and versions small integers."""
+    catalog = build_catalog(demo_batches(), timestamp='2024-01-01 00:00:00')
+    assert {column: str(dtype) for column, dtype in catalog.dtypes.items()} == {
+        'batch': 'category', 'type': 'category', 'version': 'int16',
+        'portal_status': 'category', 'reason': 'category',
+    }
+    assert catalog.attrs['timestamp'] == '2024-01-01 00:00:00'
+    assert catalog.memory_usage(deep=True).sum() < expand_catalog(catalog).memory_usage(deep=True).sum()
+
+def test_build_catalog_defaults_missing_columns():
+    """Test defaults when the source has no status or reason column."""
+    catalog = build_catalog(pd.DataFrame({'Batch': ['B9'], 'batch_count': [3]}))
+    assert list(catalog['portal_status']) == ['Unknown', 'Unknown']
+    assert list(catalog['reason']) == ['', '']
+
+def test_load_catalog_is_keyed_on_file(tmp_path):
+    """Test that the memoized catalog follows changes to the source file."""
+    path = tmp_path / 'review.csv'
+    path.write_text('Batch,batch_count,portal_status,reason\nB1,1,Pending,x\n')
+    invalidate_catalog()
+
+    first = load_catalog(str(path))
+    assert load_catalog(str(path)) is first
+
+    path.write_text('Batch,batch_count,portal_status,reason\nB1,1,Pending,x\nB1,2,Accepted,y\n')
+    assert len(load_catalog(str(path))) == 4
+
+def test_catalog_index_lookups():
+    """Test version lists, row lookups and batch order from the index."""
+    df_batches = pd.DataFrame({
+        'Batch': ['B002', 'B001', 'B001', 'B001'],
+        'batch_count': [1, 3, 1, 2],
+        'portal_status': ['Pending', 'Rejected', 'Accepted', 'Pending'],
+        'reason': ['a', 'b', 'c', 'd'],
+    })
+    index = CatalogIndex(build_catalog(df_batches))
+
+    assert index.batches == ['B001', 'B002']
+    assert index.versions('B001', 'PL') == [1, 2, 3]
+    assert index.versions('B003', 'CI') == []
+    assert index.row('B001', 'CI', 3) == {
+        'file_path': 'CI/B001/B001_3.pdf', 'portal_status': 'Rejected', 'reason': 'b'
+    }
+    assert index.row('B001', 'CI', 4) is None
+    assert index.next_batch('B001') == 'B002'
+    assert index.next_batch('B002') is None
+    assert index.latest_statuses() == {('B001', 'CI'): 'Rejected', ('B001', 'PL'): 'Rejected',
+                                       ('B002', 'CI'): 'Pending', ('B002', 'PL'): 'Pending'}
+
+def test_load_catalog_reads_matching_snapshot(tmp_path):
+    """Test that a snapshot is used only while its source files are unchanged."""
+    path = tmp_path / 'review.csv'
+    snapshot = str(tmp_path / 'catalog_snapshot.parquet')
+    path.write_text('Batch,batch_count,portal_status,reason\nB1,1,Pending,\nB1,2,Accepted,y\n')
+    invalidate_catalog()
+
+    written = write_catalog_snapshot(str(path), None, snapshot)
+    invalidate_catalog()
+    loaded = load_catalog(str(path), None, snapshot)
+    assert loaded is not written
+    assert catalog_file_paths(loaded).tolist() == catalog_file_paths(written).tolist()
+    assert loaded['version'].tolist() == [1, 1, 2, 2]
+    assert loaded.dtypes.equals(written.dtypes)
+    assert read_catalog_snapshot(snapshot, ['batch', 'version']).columns.tolist() == ['batch', 'version']
+
+    path.write_text('Batch,batch_count,portal_status,reason\nB1,1,Pending,\n')
+    assert len(load_catalog(str(path), None, snapshot)) == 2
@@ -0,0 +1,62 @@
+"""Tests for document fingerprints."""
+
+import pandas as pd
+
+from conftest import make_scan, make_text_pdf
+from src import fingerprints
+from src.fingerprints import (CHANGED, IDENTICAL, TEXT_IDENTICAL, classify_pair, fingerprint_pdf,
+                              load_fingerprint_index, read_fingerprints, update_fingerprints)
+
+
+def test_classify_pair():
+    """Test the identical, text-identical and changed labels."""
+    original = fingerprint_pdf(make_text_pdf('Invoice 42'))
+    assert classify_pair(original, fingerprint_pdf(make_text_pdf('Invoice 42'))) == IDENTICAL
+    assert classify_pair(original, fingerprint_pdf(make_text_pdf('Invoice 42', 'Scanner 2.0'))) == TEXT_IDENTICAL
+    assert classify_pair(original, fingerprint_pdf(make_text_pdf('Invoice 43'))) == CHANGED
+
+def test_classify_pair_compares_scans_by_page_hash():
+    """Test that documents without text fall back to perceptual page hashes."""
+    scan = fingerprint_pdf(make_scan(2))
+    assert scan['text_hash'] == '' and len(scan['page_hashes'].split()) == 2
+    rescan = dict(scan, byte_hash='other')
+    assert classify_pair(scan, rescan) == TEXT_IDENTICAL
+    assert classify_pair(scan, fingerprint_pdf(make_scan(3))) == CHANGED
+
+def test_fingerprint_pdf_reads_hex_strings():
+    """Test that text shown through hex strings is part of the text hash."""
+    placeholder = b'(' + b'X' * 20 + b')'
+    hex_pdf = make_text_pdf('X' * 20).replace(placeholder, b'<496E766F696365203432>')
+    other_pdf = make_text_pdf('X' * 20).replace(placeholder, b'<496E766F696365203433>')
+    assert fingerprint_pdf(hex_pdf)['text_hash'] == fingerprint_pdf(make_text_pdf('Invoice 42'))['text_hash']
+    assert classify_pair(fingerprint_pdf(hex_pdf), fingerprint_pdf(other_pdf)) == CHANGED
+
+def test_update_fingerprints_is_incremental(s3_bucket, tmp_path, monkeypatch):
+    """Test that only new and changed documents are downloaded again."""
+    path = str(tmp_path / 'fingerprints.csv')
+    inventory_path = str(tmp_path / 'inventory.csv')
+    keys = ['CI/B001/B001_1.pdf', 'CI/B001/B001_2.pdf']
+    for key in keys:
+        s3_bucket.put_object(Bucket='review-bucket', Key=f'Doc_Review/{key}', Body=make_text_pdf('Same'))
+
+    summary = update_fingerprints(path, keys, inventory_path)
+    assert summary['updated'] == 2 and summary['reused'] == 0
+    assert load_fingerprint_index(path).label(*keys) == IDENTICAL
+
+    keys.append('CI/B001/B001_3.pdf')
+    s3_bucket.put_object(Bucket='review-bucket', Key=f'Doc_Review/{keys[2]}', Body=make_text_pdf('New'))
+    summary = update_fingerprints(path, keys, inventory_path)
+    assert summary['updated'] == 1 and summary['reused'] == 2
+    assert len(read_fingerprints(path)) == 3
+    assert load_fingerprint_index(path).label(keys[0], keys[2]) == CHANGED
+
+    # A document that cannot be fingerprinted again keeps its previous row
+    etags = ['changed'] + list(read_fingerprints(path)['etag'][1:])
+    inventory = pd.DataFrame({'key': keys, 'etag': etags, 'size': 0, 'last_modified': '', 'shard': ''})
+    inventory.to_csv(inventory_path, index=False)
+    def fail(key):
+        raise OSError('download failed')
+    monkeypatch.setattr(fingerprints, 'fingerprint_object', fail)
+    summary = update_fingerprints(path, keys, inventory_path)
+    assert summary['failed'] == 1
+    assert list(read_fingerprints(path)['key']) == keys
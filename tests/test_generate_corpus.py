@@ -0,0 +1,39 @@
+"""Tests for the synthetic corpus generator."""
+
+import pandas as pd
+
+from src.catalog import build_catalog, catalog_file_paths
+from src.pdf_pages import count_pages
+from scripts.generate_corpus import generate_corpus
+
+
+def test_corpus_matches_review_csv(tmp_path):
+    """Test that every catalog row has a PDF with the requested shape."""
+    summary = generate_corpus(6, versions=(2, 4), pages=(2, 3), size_kb=(10, 20), output=str(tmp_path),
+                              workers=1, chunk=2)
+    review = pd.read_csv(tmp_path / 'Manual_Review.csv')
+    assert review['Batch'].nunique() == 6 and review['Batch'].iloc[0] == 'BATCH8000000'
+    assert review.groupby('Batch')['batch_count'].max().between(2, 4).all()
+
+    keys = catalog_file_paths(build_catalog(review)).tolist()
+    assert summary['documents'] == len(keys) == len(list(tmp_path.rglob('*.pdf')))
+    for key in keys:
+        pdf = (tmp_path / key).read_bytes()
+        assert pdf.startswith(b'%PDF-') and 2 <= count_pages(pdf) <= 3
+        assert 10 * 1024 <= len(pdf) <= 30 * 1024
+
+def test_corpus_is_deterministic_and_repeats_unchanged_versions(tmp_path):
+    """Test that content depends only on the seed and that re-submissions are identical."""
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    generate_corpus(2, versions=(3, 3), size_kb=(1, 1), unchanged=1.0, output=str(first), workers=1)
+    generate_corpus(2, versions=(3, 3), size_kb=(1, 1), unchanged=1.0, output=str(second), workers=2)
+    key = 'CI/BATCH8000001/BATCH8000001_{}.pdf'
+    assert (first / key.format(3)).read_bytes() == (second / key.format(3)).read_bytes()
+    assert (first / key.format(1)).read_bytes() == (first / key.format(3)).read_bytes()
+
+def test_corpus_upload(s3_bucket, tmp_path):
+    """Test that documents are uploaded under the base prefix."""
+    summary = generate_corpus(1, versions=(2, 2), size_kb=(1, 1), output=None,
+                              csv_path=str(tmp_path / 'review.csv'), upload=True, workers=1)
+    response = s3_bucket.list_objects_v2(Bucket='review-bucket', Prefix='Doc_Review/')
+    assert summary['documents'] == response['KeyCount'] == 4
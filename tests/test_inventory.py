@@ -0,0 +1,89 @@
+"""Tests for the S3 inventory sync."""
+
+import json
+from unittest.mock import ANY
+
+import pandas as pd
+
+from src import s3_utils
+from src.catalog import build_catalog_from_inventory, catalog_file_paths, load_catalog
+from src.inventory import list_range, plan_ranges, read_inventory, sync_inventory
+
+
+def put(client, key):
+    client.put_object(Bucket='review-bucket', Key=f'Doc_Review/{key}', Body=b'%PDF')
+
+def test_list_s3_files_paginates(s3_bucket):
+    """Test that listings continue past the 1000-key page limit."""
+    for n in range(1005):
+        put(s3_bucket, f'CI/B001/B001_{n}.pdf')
+    assert len(s3_utils.list_s3_files('CI/')) == 1005
+
+def test_sync_inventory_lists_ranges_and_builds_the_catalog(s3_bucket, tmp_path):
+    """Test that folders are cut into ranges once and the catalog is built from the inventory."""
+    for key in ('CI/B001/B001_1.pdf', 'CI/B001/B001_2.pdf', 'PL/B001/B001_1.pdf'):
+        put(s3_bucket, key)
+    path = str(tmp_path / 'inventory.csv')
+
+    summary = sync_inventory(path, workers=4)
+    assert (summary['ranges'], summary['requests'], summary['changed'], summary['objects']) == (2, 2, 2, 3)
+
+    put(s3_bucket, 'CI/B002/B002_1.pdf')
+    summary = sync_inventory(path, workers=4)
+    assert (summary['ranges'], summary['requests'], summary['changed']) == (2, 2, 1)
+    assert list(read_inventory(path)['key']) == [
+        'CI/B001/B001_1.pdf', 'CI/B001/B001_2.pdf', 'CI/B002/B002_1.pdf', 'PL/B001/B001_1.pdf'
+    ]
+
+    review = tmp_path / 'review.csv'
+    review.write_text('Batch,batch_count,portal_status,reason\nB001,2,Accepted,ok\n')
+    catalog = load_catalog(str(review), path)
+    assert list(catalog_file_paths(catalog)) == [
+        'CI/B001/B001_1.pdf', 'PL/B001/B001_1.pdf', 'CI/B001/B001_2.pdf', 'CI/B002/B002_1.pdf'
+    ]
+    assert list(catalog['portal_status']) == ['Unknown', 'Unknown', 'Accepted', 'Unknown']
+
+def test_plan_ranges_cuts_at_folder_boundaries():
+    """Test that each document type is cut into about the requested number of ranges."""
+    folders = [f'CI/B00{n}/' for n in range(1, 7)] + ['PL/B001/']
+    assert plan_ranges(folders, count=3) == [
+        {'start': 'CI/', 'end': 'CI/B003/'}, {'start': 'CI/B003/', 'end': 'CI/B005/'},
+        {'start': 'CI/B005/', 'end': None}, {'start': 'PL/', 'end': None},
+    ]
+
+def test_sync_inventory_detects_changes_and_splits_large_ranges(s3_bucket, tmp_path):
+    """Test that new, replaced and deleted objects are found and a grown range is split."""
+    for n in range(1, 4):
+        put(s3_bucket, f'CI/B001/B001_{n}.pdf')
+    put(s3_bucket, 'PL/B001/B001_1.pdf')
+    path = str(tmp_path / 'inventory.csv')
+    sync_inventory(path, workers=4, range_keys=2)
+    assert json.load(open(f'{path}.ranges.json'))['ranges'][:2] == [
+        {'start': 'CI/', 'end': 'CI/B001/B001_2.pdf', 'objects': 2, 'digest': ANY},
+        {'start': 'CI/B001/B001_2.pdf', 'end': None, 'objects': 1, 'digest': ANY},
+    ]
+    # Pages stop at the end of the range
+    records, requests = list_range('CI/', 'CI/B001/B001_2.pdf', max_keys=1)
+    assert ([record['key'] for record in records], requests) == (['CI/B001/B001_1.pdf', 'CI/B001/B001_2.pdf'], 3)
+
+    summary = sync_inventory(path, workers=4, range_keys=2)
+    assert (summary['ranges'], summary['requests'], summary['changed'], summary['split']) == (3, 3, 0, 0)
+
+    s3_bucket.put_object(Bucket='review-bucket', Key='Doc_Review/CI/B001/B001_1.pdf', Body=b'%PDF new')
+    s3_bucket.delete_object(Bucket='review-bucket', Key='Doc_Review/CI/B001/B001_3.pdf')
+    for n in range(1, 4):
+        put(s3_bucket, f'CI/B002/B002_{n}.pdf')
+    summary = sync_inventory(path, workers=4, range_keys=2)
+    assert (summary['changed'], summary['split']) == (3, 1)
+    assert list(read_inventory(path)['key']) == [
+        'CI/B001/B001_1.pdf', 'CI/B001/B001_2.pdf', 'CI/B002/B002_1.pdf', 'CI/B002/B002_2.pdf',
+        'CI/B002/B002_3.pdf', 'PL/B001/B001_1.pdf'
+    ]
+    assert sync_inventory(path, workers=4, range_keys=2)['changed'] == 0
+
+def test_build_catalog_from_inventory_ignores_other_keys():
+    """Test that only well-formed document keys become catalog rows."""
+    inventory = pd.DataFrame({'key': ['CI/B1/B1_3.pdf', 'audit/x.csv', 'CI/B1/B2_1.pdf']})
+    catalog = build_catalog_from_inventory(inventory)
+    assert list(catalog_file_paths(catalog)) == ['CI/B1/B1_3.pdf']
+    assert catalog['version'].iloc[0] == 3
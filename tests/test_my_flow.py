@@ -0,0 +1,56 @@
+"""Tests for the nightly preparation flow."""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip('prefect')
+from prefect.testing.utilities import prefect_test_harness
+
+from conftest import make_text_pdf
+import my_flow
+from src.fingerprints import read_fingerprints
+
+
+@pytest.fixture(scope='module', autouse=True)
+def prefect_backend():
+    """Run flows against a temporary local Prefect database."""
+    with prefect_test_harness():
+        yield
+
+def test_flow_survives_a_broken_batch(s3_bucket, tmp_path, monkeypatch):
+    """Test that a document that cannot be fingerprinted is reported without stopping the run."""
+    for batch in ('B001', 'B002'):
+        for version in (1, 2):
+            s3_bucket.put_object(Bucket='review-bucket', Key=f'Doc_Review/CI/{batch}/{batch}_{version}.pdf',
+                                 Body=make_text_pdf(f'{batch} {version}'))
+    fingerprint_object = my_flow.fingerprint_object
+    def broken_b002(key):
+        if key.startswith('CI/B002/'):
+            raise ValueError('broken document')
+        return fingerprint_object(key)
+    monkeypatch.setattr(my_flow, 'fingerprint_object', broken_b002)
+
+    review = tmp_path / 'review.csv'
+    review.write_text('Batch,batch_count,portal_status,reason\nB001,2,Accepted,ok\nB002,2,Accepted,ok\n')
+    paths = {name: str(tmp_path / name) for name in ('inventory.csv', 'fingerprints.csv', 'catalog.parquet',
+                                                     'manifests', 'report.json')}
+
+    def run():
+        return my_flow.prepare_review_documents(str(review), paths['inventory.csv'], paths['fingerprints.csv'],
+                                                paths['catalog.parquet'], paths['manifests'], paths['report.json'])
+
+    report = run()
+    assert report['stages']['batches']['failed_documents'] == 2
+    with open(os.path.join(paths['manifests'], 'B002.json')) as f:
+        manifest = json.load(f)
+    assert [entry['key'] for entry in manifest['failed']] == ['CI/B002/B002_1.pdf', 'CI/B002/B002_2.pdf']
+    assert manifest['pairs'] == []
+    assert list(read_fingerprints(paths['fingerprints.csv'])['key']) == ['CI/B001/B001_1.pdf', 'CI/B001/B001_2.pdf']
+
+    # A deleted manifest is written again, and the broken batch is retried
+    os.remove(os.path.join(paths['manifests'], 'B001.json'))
+    report = run()
+    assert os.path.exists(os.path.join(paths['manifests'], 'B001.json'))
+    assert report['stages']['batches']['cached'] == 0
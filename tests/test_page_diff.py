@@ -0,0 +1,66 @@
+"""Tests for visual page diffs."""
+
+from collections import OrderedDict
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+from src import page_diff
+from src.page_diff import diff_annotations, diff_documents, get_page_diff, load_page_diff
+
+
+def make_pdf(page_count, marked_page=None):
+    """Build an image-based PDF, optionally with a block drawn on one page."""
+    pages = []
+    for number in range(page_count):
+        image = Image.new('RGB', (850, 1100), 'white')
+        draw = ImageDraw.Draw(image)
+        draw.text((100, 100), f"Page {number + 1}", fill='black')
+        if number == marked_page:
+            draw.rectangle((400, 550, 600, 700), fill='black')
+        pages.append(image)
+    buffer = BytesIO()
+    pages[0].save(buffer, 'PDF', save_all=True, append_images=pages[1:])
+    return buffer.getvalue()
+
+def test_diff_documents_finds_changed_region():
+    """Test that only the altered page is reported, with a box around the change."""
+    diff = diff_documents(make_pdf(3), make_pdf(3, marked_page=1))
+    assert diff['changed_pages'] == [2]
+    assert [p['status'] for p in diff['pages']] == ['unchanged', 'changed', 'unchanged']
+
+    (x0, y0, x1, y1), = diff['pages'][1]['boxes']
+    assert x0 <= 400 / 850 < 600 / 850 <= x1
+    assert y0 <= 550 / 1100 < 700 / 1100 <= y1
+
+    annotation, = diff_annotations(diff)
+    assert annotation['page'] == 2
+    assert annotation['x'] <= 400 and annotation['x'] + annotation['width'] >= 600
+
+def test_diff_documents_flags_added_pages():
+    """Test that pages missing from one version are reported."""
+    diff = diff_documents(make_pdf(2), make_pdf(3))
+    assert diff['changed_pages'] == [3]
+    assert diff['pages'][2]['status'] == 'added'
+    assert diff_documents(make_pdf(3), make_pdf(2))['pages'][2]['status'] == 'removed'
+
+def test_get_page_diff_is_cached_by_content(tmp_path, monkeypatch):
+    """Test that a pair is computed once and then served from the cache."""
+    old, new = make_pdf(2), make_pdf(2, marked_page=0)
+    diff = get_page_diff(old, new, str(tmp_path))
+
+    monkeypatch.setattr(page_diff, '_diff_cache', OrderedDict())
+    monkeypatch.setattr(page_diff, 'diff_documents', lambda *args: None)
+    assert get_page_diff(old, new, str(tmp_path)) == diff
+    assert load_page_diff(page_diff.content_hash(old), page_diff.content_hash(new), str(tmp_path)) == diff
+    assert load_page_diff('missing', 'missing', str(tmp_path)) is None
+
+def test_undecodable_pages_count_as_changed():
+    """Test that malformed image streams mark a page changed instead of raising."""
+    pdf = make_pdf(2)
+    broken_jpeg = pdf.replace(b'stream\n\xff\xd8', b'stream\n\x00\x00', 1)
+    broken_flate = pdf.replace(b'/DCTDecode', b'/FlateDecode', 1)
+    for broken in (broken_jpeg, broken_flate):
+        diff = diff_documents(pdf, broken)
+        assert [p['status'] for p in diff['pages']] == ['changed', 'unchanged']
+        assert diff['pages'][0]['boxes'] == [[0.0, 0.0, 1.0, 1.0]]
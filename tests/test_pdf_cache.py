@@ -0,0 +1,73 @@
+"""Tests for the PDF byte cache."""
+
+from src.pdf_cache import PdfCache
+
+
+def put_pdf(client, key, body):
+    client.put_object(Bucket='review-bucket', Key=f'Doc_Review/{key}', Body=body)
+
+def test_memory_hit_and_revalidation(s3_bucket, tmp_path):
+    """Test that fresh entries skip S3 and stale ones revalidate by ETag."""
+    put_pdf(s3_bucket, 'CI/B001/B001_1.pdf', b'%PDF-one')
+    cache = PdfCache(cache_dir=str(tmp_path), revalidate_after=60)
+
+    assert cache.get_pdf('CI/B001/B001_1.pdf') == b'%PDF-one'
+    assert cache.get_pdf('CI/B001/B001_1.pdf') == b'%PDF-one'
+    assert cache.get_stats()['misses'] == 1
+    assert cache.get_stats()['memory_hits'] == 1
+
+    cache.revalidate_after = 0
+    assert cache.get_pdf('CI/B001/B001_1.pdf') == b'%PDF-one'
+    assert cache.get_stats()['not_modified'] == 1
+
+    put_pdf(s3_bucket, 'CI/B001/B001_1.pdf', b'%PDF-two')
+    assert cache.get_pdf('CI/B001/B001_1.pdf') == b'%PDF-two'
+    assert cache.get_stats()['misses'] == 2
+
+def test_memory_eviction_falls_back_to_disk(s3_bucket, tmp_path):
+    """Test byte-bounded LRU eviction and the disk tier."""
+    put_pdf(s3_bucket, 'CI/B001/B001_1.pdf', b'a' * 600)
+    put_pdf(s3_bucket, 'CI/B001/B001_2.pdf', b'b' * 600)
+    cache = PdfCache(memory_bytes=1000, cache_dir=str(tmp_path))
+
+    cache.get_pdf('CI/B001/B001_1.pdf')
+    cache.get_pdf('CI/B001/B001_2.pdf')
+    stats = cache.get_stats()
+    assert stats['memory_evictions'] == 1
+    assert stats['memory_bytes'] == 600
+    assert stats['disk_bytes'] == 1200
+
+    assert cache.get_pdf('CI/B001/B001_1.pdf') == b'a' * 600
+    stats = cache.get_stats()
+    assert stats['disk_hits'] == 1
+    assert stats['not_modified'] == 1
+    assert stats['misses'] == 2
+
+def test_disk_tier_is_bounded(s3_bucket, tmp_path):
+    """Test that the disk tier evicts least recently used files."""
+    for n in range(1, 4):
+        put_pdf(s3_bucket, f'CI/B001/B001_{n}.pdf', bytes([n]) * 400)
+    cache = PdfCache(memory_bytes=0, disk_bytes=1000, cache_dir=str(tmp_path))
+
+    for n in range(1, 4):
+        cache.get_pdf(f'CI/B001/B001_{n}.pdf')
+    stats = cache.get_stats()
+    assert stats['disk_evictions'] == 1
+    assert stats['disk_bytes'] == 800
+
+def test_disk_writes_scan_only_when_full(s3_bucket, tmp_path, monkeypatch):
+    """Test that the disk total is kept up to date and the directory is scanned only to evict."""
+    for n in range(1, 6):
+        put_pdf(s3_bucket, f'CI/B001/B001_{n}.pdf', bytes([n]) * 300)
+    cache = PdfCache(memory_bytes=0, disk_bytes=1000, cache_dir=str(tmp_path))
+    scans = []
+    disk_entries = cache._disk_entries
+    monkeypatch.setattr(cache, '_disk_entries', lambda: scans.append(1) or disk_entries())
+
+    for n in range(1, 4):
+        cache.get_pdf(f'CI/B001/B001_{n}.pdf')
+    assert (len(scans), cache.get_stats()['disk_bytes']) == (1, 900)
+    cache.get_pdf('CI/B001/B001_4.pdf')
+    assert (len(scans), cache.get_stats()['disk_bytes']) == (2, 900)
+    cache.invalidate('CI/B001/B001_4.pdf')
+    assert (len(scans), cache.get_stats()['disk_bytes']) == (2, 600)
@@ -0,0 +1,37 @@
+"""Tests for PDF page metadata."""
+
+from src.pdf_pages import count_pages, probe_pdf, read_linearization
+# The copy of s3_utils that pdf_pages imports and records its requests in
+import s3_utils
+
+LINEARIZED_HEAD = (b'%PDF-1.5\n%\xe2\xe3\xcf\xd3\n'
+                   b'12 0 obj\n<</Linearized 1/L 30000/O 14/E 2048/N 82/T 29000/H [ 500 150]>>\nendobj\n')
+
+
+def test_read_linearization():
+    """Test parsing of the linearization dictionary."""
+    assert read_linearization(LINEARIZED_HEAD) == {'L': 30000, 'O': 14, 'E': 2048, 'N': 82, 'T': 29000}
+    assert read_linearization(b'%PDF-1.4\n1 0 obj\n<</Type /Catalog>>') is None
+
+def test_count_pages():
+    """Test that page objects are counted but the page tree is not."""
+    body = b'<</Type /Pages /Kids [2 0 R 3 0 R]>> <</Type/Page>> <</Type /Page /Parent 1 0 R>>'
+    assert count_pages(body) == 2
+
+def test_probe_pdf_reads_only_the_head(s3_bucket):
+    """Test that a probe returns size and page count from one range request."""
+    body = LINEARIZED_HEAD + b'x' * 5000
+    s3_bucket.put_object(Bucket='review-bucket', Key='Doc_Review/CI/B001/B001_1.pdf', Body=body)
+    s3_utils.reset_s3_stats()
+
+    info = probe_pdf('CI/B001/B001_1.pdf')
+    assert info['size'] == len(body)
+    assert info['linearized'] and info['page_count'] == 82 and info['first_page_end'] == 2048
+    stats = s3_utils.get_s3_stats()
+    assert stats['requests'] == 1 and 0 < stats['bytes'] <= 1024
+
+    assert probe_pdf('CI/B001/B001_1.pdf') == info
+    requests = s3_utils.get_s3_stats()['requests']
+    assert probe_pdf('CI/B001/B001_1.pdf', etag=info['etag'].strip('"')) == info
+    assert probe_pdf('CI/B001/B001_1.pdf', max_age=60) == info
+    assert s3_utils.get_s3_stats()['requests'] == requests
@@ -0,0 +1,51 @@
+"""Tests for concurrent and speculative document fetching."""
+
+import pandas as pd
+import pytest
+
+from src.pdf_cache import PdfCache
+from src.catalog import CatalogIndex
+from src.prefetch import Prefetcher, get_prefetch_keys
+
+
+@pytest.fixture
+def s3_bucket(s3_bucket):
+    """Provide the mocked bucket holding three versions of one document."""
+    for n in (1, 2, 3):
+        s3_bucket.put_object(Bucket='review-bucket', Key=f'Doc_Review/CI/B001/B001_{n}.pdf',
+                             Body=f'%PDF-{n}'.encode())
+    return s3_bucket
+
+def test_fetch_many_and_prefetch_hits(s3_bucket, tmp_path):
+    """Test parallel fetching and that prefetched documents count as hits."""
+    prefetcher = Prefetcher(cache=PdfCache(cache_dir=str(tmp_path)))
+
+    docs = prefetcher.fetch_many(['CI/B001/B001_1.pdf', 'CI/B001/B001_2.pdf'])
+    assert docs == {'CI/B001/B001_1.pdf': b'%PDF-1', 'CI/B001/B001_2.pdf': b'%PDF-2'}
+    assert prefetcher.get('CI/B001/B001_1.pdf') == b'%PDF-1'
+    assert prefetcher.get_stats()['misses'] == 2
+
+    assert prefetcher.prefetch(['CI/B001/B001_1.pdf', 'CI/B001/B001_3.pdf']) == 1
+    assert prefetcher.get('CI/B001/B001_3.pdf') == b'%PDF-3'
+    stats = prefetcher.get_stats()
+    assert stats['hits'] + stats['joined'] == 1
+    assert stats['inflight_bytes'] == 0
+
+def test_prefetch_respects_byte_budget(s3_bucket, tmp_path):
+    """Test that scheduling stops once the in-flight byte cap is reached."""
+    prefetcher = Prefetcher(cache=PdfCache(cache_dir=str(tmp_path)), max_inflight_bytes=0)
+    assert prefetcher.prefetch(['CI/B001/B001_1.pdf']) == 0
+    assert prefetcher.get_stats()['skipped'] == 1
+
+def test_get_prefetch_keys():
+    """Test that other versions and the next batch are prefetched in order."""
+    df = pd.DataFrame({
+        'batch': ['B001'] * 3 + ['B002'] * 3,
+        'type': ['CI'] * 6,
+        'version': [1, 2, 3, 1, 2, 3],
+        'file_path': [f'CI/{b}/{b}_{v}.pdf' for b in ('B001', 'B002') for v in (1, 2, 3)],
+        'portal_status': ['Pending'] * 6,
+        'reason': [''] * 6,
+    })
+    keys = get_prefetch_keys(CatalogIndex(df), 'B001', 'CI', (1, 2))
+    assert keys == ['CI/B001/B001_3.pdf', 'CI/B002/B002_1.pdf', 'CI/B002/B002_2.pdf']
@@ -0,0 +1,78 @@
+"""Tests for the persistent review store."""
+
+import sqlite3
+import threading
+import time
+
+from src.review_store import NOT_REVIEWED, REVIEWED, ReviewStore
+
+
+def review(batch, doc_type='CI', timestamp='2024-05-01 10:00:00', decision='Accept'):
+    return {'timestamp': timestamp, 'batch': batch, 'doc_type': doc_type, 'v1_v2': '1-2',
+            'status': REVIEWED, 'notes': '', 'decision': decision}
+
+def test_store_persists_across_instances(tmp_path):
+    """Test that reviews survive a restart and the database is in WAL mode."""
+    path = str(tmp_path / 'reviews.db')
+    store = ReviewStore(path)
+    store.record(review('B001'))
+    assert store.status('B001', 'CI') == REVIEWED
+    store.stop()
+
+    reopened = ReviewStore(path)
+    assert reopened.statuses() == {('B001', 'CI'): REVIEWED}
+    assert reopened.status('B001', 'PL') == NOT_REVIEWED
+    assert reopened._connection().execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+def test_statuses_follow_other_writers(tmp_path):
+    """Test that the cached bulk status query sees writes from other connections."""
+    path = str(tmp_path / 'reviews.db')
+    reader, writer = ReviewStore(path), ReviewStore(path)
+    assert reader.statuses() == {}
+    writer.record(review('B002', 'PL'))
+    writer.flush()
+    assert reader.statuses() == {('B002', 'PL'): REVIEWED}
+
+def test_concurrent_records_and_history(tmp_path):
+    """Test that concurrent saves are all written and history is newest first."""
+    store = ReviewStore(str(tmp_path / 'reviews.db'), flush_interval=0.05)
+    threads = [
+        threading.Thread(target=store.record,
+                         args=(review(f'B{n:03d}', timestamp=f'2024-05-01 10:00:{n:02d}'),))
+        for n in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(store.statuses()) == 20
+    history = store.history(since='2024-05-01 10:00:15')
+    assert [row['batch'] for row in history] == ['B019', 'B018', 'B017', 'B016', 'B015']
+    window = store.history(since='2024-05-01 10:00:03', until='2024-05-01 10:00:05')
+    assert [row['batch'] for row in window] == ['B004', 'B003']
+
+    store.record(review('B000', timestamp='2024-05-02 09:00:00', decision='Reject'))
+    assert store.history(batch='B000', doc_type='CI', limit=1)[0]['decision'] == 'Reject'
+    store.stop()
+
+def test_failed_flush_is_retried_in_the_background(tmp_path):
+    """Test that reviews are written after a failed flush without another save or read."""
+    path = str(tmp_path / 'reviews.db')
+    store = ReviewStore(path, flush_interval=0.05)
+    flush, attempts = store.flush, []
+    def flaky_flush():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError('database is locked')
+        return flush()
+    store.flush = flaky_flush
+    store.record(review('B003'))
+
+    deadline = time.time() + 5
+    rows = 0
+    while not rows and time.time() < deadline:
+        time.sleep(0.05)
+        rows = sqlite3.connect(path).execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+    assert rows == 1 and len(attempts) >= 2
+    store.stop()
@@ -0,0 +1,54 @@
+"""Tests for S3 utility functions."""
+
+import time
+
+from src import s3_utils
+
+
+def test_get_s3_client_is_shared(s3_bucket):
+    """Test that repeated calls reuse one client."""
+    assert s3_utils.get_s3_client() is s3_utils.get_s3_client()
+    assert s3_utils.get_s3_stats()['clients'] == 1
+
+    s3_utils.reset_s3_client()
+    assert s3_utils.get_s3_stats()['clients'] == 0
+
+def test_s3_stats_count_requests_and_bytes(s3_bucket, tmp_path):
+    """Test that helper calls are recorded in the request counters."""
+    source = tmp_path / 'doc.pdf'
+    source.write_bytes(b'%PDF-1.4' + b'x' * 1000)
+
+    assert s3_utils.upload_file_to_s3(str(source), 'CI/B001/B001_1.pdf')
+    assert s3_utils.list_s3_files('CI/') == ['CI/B001/B001_1.pdf']
+    assert s3_utils.download_file_from_s3('CI/B001/B001_1.pdf', str(tmp_path / 'out' / 'doc.pdf'))
+
+    stats = s3_utils.get_s3_stats()
+    assert stats['clients'] == 1
+    assert stats['operations']['PutObject']['requests'] == 1
+    assert stats['operations']['ListObjectsV2']['requests'] == 1
+    assert stats['bytes'] >= 1008
+
+def test_presigned_urls_are_cached_until_near_expiry(s3_bucket):
+    """Test that a signed URL is reused and re-signed close to expiry."""
+    url = s3_utils.get_presigned_url('CI/B001/B001_1.pdf', inline_pdf=True)
+    assert 'response-content-disposition=inline' in url
+    assert s3_utils.get_presigned_url('CI/B001/B001_1.pdf', inline_pdf=True) == url
+    assert s3_utils.get_presigned_url('CI/B001/B001_1.pdf') != url
+
+    # Inside the refresh margin the URL is signed again
+    s3_utils._url_cache[('review-bucket', 'Doc_Review/CI/B001/B001_1.pdf', 3600, True)] = ('stale', 0)
+    assert s3_utils.get_presigned_url('CI/B001/B001_1.pdf', inline_pdf=True) != 'stale'
+
+def test_s3_health_is_checked_in_background(s3_bucket):
+    """Test that the connectivity check is cached and never blocks the caller."""
+    assert s3_utils.get_s3_health()['ok'] is None
+    for _ in range(100):
+        health = s3_utils.get_s3_health()
+        if health['ok'] is not None:
+            break
+        time.sleep(0.05)
+    assert health['ok'] is True and health['error'] is None
+
+    s3_utils.reset_s3_stats()
+    assert s3_utils.get_s3_health()['ok'] is True
+    assert s3_utils.get_s3_stats()['requests'] == 0
@@ -0,0 +1,37 @@
+"""Tests for incremental per-document manifests."""
+
+import pandas as pd
+
+from src.sidecars import read_rows, update_sidecars
+
+COLUMNS = ['key', 'etag', 'value']
+
+
+def test_update_sidecars_recomputes_changed_documents(tmp_path):
+    """Test reuse by ETag, the extra reuse condition and that failures keep the previous row."""
+    path = str(tmp_path / 'manifest.csv')
+    inventory_path = str(tmp_path / 'inventory.csv')
+    def inventory(etags):
+        pd.DataFrame({'key': list(etags), 'etag': list(etags.values()), 'size': 0, 'last_modified': '',
+                      'shard': ''}).to_csv(inventory_path, index=False)
+
+    inventory({'a.pdf': 'e1', 'b.pdf': 'e1'})
+    computed = []
+    def compute(key):
+        computed.append(key)
+        if key == 'b.pdf' and len(computed) > 2:
+            raise OSError('download failed')
+        return {'key': key, 'etag': 'e1' if len(computed) <= 2 else 'e2', 'value': str(len(computed))}
+
+    summary = update_sidecars(path, COLUMNS, compute, ['a.pdf', 'b.pdf'], inventory_path)
+    assert (summary['updated'], summary['reused'], summary['failed']) == (2, 0, 0)
+
+    inventory({'a.pdf': 'e2', 'b.pdf': 'e2'})
+    summary = update_sidecars(path, COLUMNS, compute, ['a.pdf', 'b.pdf'], inventory_path, workers=1)
+    assert (summary['updated'], summary['reused'], summary['failed']) == (1, 0, 1)
+    rows = read_rows(path, COLUMNS).set_index('key')
+    assert rows.loc['a.pdf', 'etag'] == 'e2' and rows.loc['b.pdf', 'etag'] == 'e1'
+
+    summary = update_sidecars(path, COLUMNS, compute, ['a.pdf'], inventory_path,
+                              reusable=lambda row: row['value'] == 'never')
+    assert summary['updated'] == 1 and list(read_rows(path, COLUMNS)['key']) == ['a.pdf']
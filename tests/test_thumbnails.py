@@ -0,0 +1,54 @@
+"""Tests for page thumbnail sidecars."""
+
+from io import BytesIO
+
+from PIL import Image
+
+from conftest import make_scan, make_text_pdf
+from src.thumbnails import load_thumbnail_index, render_thumbnails, thumbnail_key, update_thumbnails
+
+
+def test_render_thumbnails():
+    """Test first-page and all-page thumbnails of scans and text-only documents."""
+    first, = render_thumbnails(make_scan(3))
+    assert len(render_thumbnails(make_scan(3), all_pages=True)) == 3
+    image = Image.open(BytesIO(first))
+    assert image.format == 'WEBP' and image.size == (160, 207)
+    assert len(first) < 8 * 1024
+
+    text, = render_thumbnails(make_text_pdf('Invoice 42'), width=120)
+    assert Image.open(BytesIO(text)).size == (120, 155)
+
+def test_text_previews_show_hex_strings():
+    """Test that text drawn with hex strings appears in the preview."""
+    hex_pdf = make_text_pdf('X' * 20).replace(b'(' + b'X' * 20 + b')', b'<496E766F696365203432>')
+    blank_pdf = make_text_pdf('X' * 20).replace(b'(' + b'X' * 20 + b')', b'()' + b' ' * 20)
+    def darkest(pdf):
+        return min(Image.open(BytesIO(render_thumbnails(pdf)[0])).convert('L').getdata())
+    assert darkest(blank_pdf) > 200
+    assert darkest(hex_pdf) < 128
+
+def test_update_thumbnails_is_incremental(s3_bucket, tmp_path):
+    """Test that sidecars are uploaded next to the documents and only new versions are rendered."""
+    path = str(tmp_path / 'thumbnails.csv')
+    inventory_path = str(tmp_path / 'inventory.csv')
+    keys = ['CI/B001/B001_1.pdf', 'CI/B001/B001_2.pdf']
+    for key in keys:
+        s3_bucket.put_object(Bucket='review-bucket', Key=f'Doc_Review/{key}', Body=make_scan(2))
+
+    summary = update_thumbnails(path, keys, inventory_path)
+    assert summary['updated'] == 2 and summary['reused'] == 0
+    assert thumbnail_key(keys[0]) == 'CI/B001/B001_1.page1.webp'
+    sidecar = s3_bucket.get_object(Bucket='review-bucket', Key='Doc_Review/CI/B001/B001_1.page1.webp')
+    assert sidecar['ContentType'] == 'image/webp'
+
+    keys.append('CI/B001/B001_3.pdf')
+    s3_bucket.put_object(Bucket='review-bucket', Key=f'Doc_Review/{keys[2]}', Body=make_scan(2))
+    summary = update_thumbnails(path, keys, inventory_path)
+    assert summary['updated'] == 1 and summary['reused'] == 2
+    assert load_thumbnail_index(path).keys(keys[2]) == ['CI/B001/B001_3.page1.webp']
+    assert load_thumbnail_index(path).keys('CI/B001/B001_9.pdf') == []
+
+    summary = update_thumbnails(path, keys, inventory_path, all_pages=True)
+    assert summary['updated'] == 3
+    assert load_thumbnail_index(path).keys(keys[0]) == ['CI/B001/B001_1.page1.webp', 'CI/B001/B001_1.page2.webp']
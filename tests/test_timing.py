@@ -0,0 +1,64 @@
+"""Tests for timing spans."""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src import timing
+from src.timing import annotate, begin_run, current_run, finish_run, span, stage_breakdown, traced
+
+
+def work(stage):
+    with span(stage):
+        pass
+
+def use_log(monkeypatch, tmp_path):
+    path = tmp_path / 'spans.jsonl'
+    monkeypatch.setattr(timing, 'TIMING_LOG_PATH', str(path))
+    monkeypatch.setattr(timing, '_span_log', None)
+    return path
+
+def test_spans_are_no_ops_without_a_run():
+    """Test that instrumented code runs unchanged when timing is off."""
+    assert current_run() is None
+    with span('load_data') as timed:
+        timed.set(rows=3)
+        annotate(cache='hit')
+    assert span('other') is span('load_data')
+    assert finish_run() is None
+
+def test_run_records_nested_spans_and_writes_log(monkeypatch, tmp_path):
+    """Test nesting, annotations, worker threads and the JSONL log."""
+    path = use_log(monkeypatch, tmp_path)
+    begin_run('session-1')
+    with span('embed_pdf', key='CI/B1/B1_1.pdf'):
+        with span('fetch_pdf') as timed:
+            annotate(cache='memory')
+            timed.set(bytes=2048)
+    with span('fetch_documents'), ThreadPoolExecutor(2) as pool:
+        list(pool.map(traced(work), ['fetch_pdf'] * 2))
+    summary = finish_run()
+    assert current_run() is None
+
+    stages = [(item['stage'], item['depth']) for item in summary['spans']]
+    assert stages[:2] == [('embed_pdf', 0), ('fetch_pdf', 1)]
+    assert stages[2:] == [('fetch_documents', 0), ('fetch_pdf', 1), ('fetch_pdf', 1)]
+    breakdown = {entry['stage']: entry for entry in stage_breakdown(summary['spans'])}
+    assert breakdown['fetch_pdf']['count'] == 3
+    assert breakdown['fetch_pdf']['bytes'] == 2048
+    assert breakdown['fetch_pdf']['cache'] == {'memory': 1}
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == len(summary['spans']) + 1
+    assert {line['session'] for line in lines} == {'session-1'}
+    assert lines[-1]['stage'] == 'rerun' and lines[-1]['ms'] == summary['total_ms']
+
+def test_spans_stay_on_their_thread(monkeypatch, tmp_path):
+    """Test that a run on one thread does not collect spans from others."""
+    use_log(monkeypatch, tmp_path)
+    begin_run()
+    other = threading.Thread(target=work, args=('elsewhere',))
+    other.start()
+    other.join()
+    work('here')
+    assert [item['stage'] for item in finish_run()['spans']] == ['here']
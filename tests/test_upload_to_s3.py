@@ -0,0 +1,39 @@
+"""Tests for the bulk migration script."""
+
+import os
+import subprocess
+import sys
+
+from scripts.upload_to_s3 import migrate
+
+SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'upload_to_s3.py')
+
+
+def test_script_runs_without_pythonpath():
+    """Test that the script finds the src modules on its own."""
+    env = {name: value for name, value in os.environ.items() if name != 'PYTHONPATH'}
+    result = subprocess.run([sys.executable, SCRIPT, '--help'], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert 'usage' in result.stdout
+
+
+def test_migrate_uploads_then_resumes(s3_bucket, tmp_path):
+    """Test parallel upload, skipping of unchanged files and re-upload of changes."""
+    source = tmp_path / 'RB'
+    for batch in ('BATCH0000001', 'BATCH0000002'):
+        for doc_type in ('CI', 'PL'):
+            folder = source / batch / doc_type
+            folder.mkdir(parents=True)
+            (folder / f'{batch}_1.pdf').write_bytes(b'%PDF' + batch.encode())
+    (source / 'BATCH0000001' / 'RG_1.xlsx').write_bytes(b'xlsx')
+    manifest = str(tmp_path / 'manifest.jsonl')
+
+    summary = migrate(source, manifest, workers=4)
+    assert (summary['uploaded'], summary['skipped'], summary['failed']) == (5, 0, 0)
+    keys = s3_bucket.list_objects_v2(Bucket='review-bucket')['Contents']
+    assert 'Doc_Review/PL/BATCH0000002/BATCH0000002_1.pdf' in [k['Key'] for k in keys]
+    assert 'Doc_Review/audit/BATCH0000001/RG_1.xlsx' in [k['Key'] for k in keys]
+
+    (source / 'BATCH0000001' / 'CI' / 'BATCH0000001_1.pdf').write_bytes(b'%PDF changed')
+    summary = migrate(source, manifest, workers=4)
+    assert (summary['uploaded'], summary['skipped']) == (1, 4)
@@ -1,5 +1,10 @@
 """Tests for utility functions."""
 
+import ast
+import os
+import subprocess
+import sys
+
 import pytest
 from src.utils import (
     format_status_tag,
@@ -45,4 +50,18 @@ def test_generate_comparison_pairs():
     assert len(pairs) == 3
     assert (1, 2) in pairs
     assert (2, 3) in pairs
-    assert (1, 3) in pairs 
\ No newline at end of file
+    assert (1, 3) in pairs 
+
+def test_import_defers_heavy_dependencies():
+    """Test that the modules app.py imports load neither pandas, pyarrow, numpy, Pillow nor botocore."""
+    src = os.path.join(os.path.dirname(__file__), '..', 'src')
+    with open(os.path.join(src, 'app.py')) as f:
+        modules = sorted({node.module for node in ast.walk(ast.parse(f.read()))
+                          if isinstance(node, ast.ImportFrom) and os.path.exists(os.path.join(src, f'{node.module}.py'))})
+    assert 'utils' in modules and 'catalog' in modules
+    heavy = ('pandas', 'pyarrow', 'numpy', 'PIL', 'botocore')
+    loaded = subprocess.run(
+        [sys.executable, '-c', f"import sys, {', '.join(modules)}; "
+                               f"print(' '.join(m for m in {heavy!r} if m in sys.modules))"],
+        cwd=src, capture_output=True, text=True, check=True).stdout.split()
+    assert loaded == []
@@ -0,0 +1,120 @@
+"""Tests for the lease-based review work queue."""
+
+import gc
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from src.catalog import CatalogIndex, build_catalog
+from src.review_store import REVIEWED, ReviewStore
+from src.work_queue import (PRIORITY_PORTAL_STATUS, RECHECK_SECONDS, RENEW_BEFORE_SECONDS, WorkQueue,
+                            queue_order)
+
+
+def catalog_index():
+    return CatalogIndex(build_catalog(pd.DataFrame({
+        'Batch': ['B001', 'B001', 'B002', 'B003'],
+        'batch_count': [1, 2, 1, 1],
+        'portal_status': ['Pending', 'Accepted 12', 'Rejected', 'Pending'],
+        'reason': [''] * 4,
+    })))
+
+def review(batch, doc_type):
+    return {'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'batch': batch, 'doc_type': doc_type,
+            'v1_v2': '1-2', 'status': REVIEWED, 'notes': '', 'decision': 'Accept'}
+
+def test_queue_order():
+    """Test the age order and the portal status order of the latest versions."""
+    index = catalog_index()
+    assert queue_order(index)[:3] == [('B001', 'CI'), ('B001', 'PL'), ('B002', 'CI')]
+    assert queue_order(index, PRIORITY_PORTAL_STATUS) == [
+        ('B003', 'CI'), ('B003', 'PL'), ('B002', 'CI'), ('B002', 'PL'), ('B001', 'CI'), ('B001', 'PL')]
+
+def test_next_skips_reviewed_and_leased_items(tmp_path):
+    """Test that sessions get distinct items, reviewed items are skipped and leases expire."""
+    store = ReviewStore(str(tmp_path / 'reviews.db'))
+    queue = WorkQueue(store)
+    index = catalog_index()
+    store.record(review('B001', 'CI'))
+
+    first = queue.next('alice', index)
+    assert (first['batch'], first['doc_type'], first['owner']) == ('B001', 'PL', 'alice')
+    assert queue.peek(index) == ('B002', 'CI')
+    assert queue.next('bob', index)['batch'] == 'B002'
+    # Claiming by hand sees the other session's lease
+    assert queue.claim('carol', 'B001', 'PL')['owner'] == 'alice'
+
+    store.record(review('B001', 'PL'))
+    lease = queue.next('alice', index)
+    assert (lease['batch'], lease['doc_type']) == ('B002', 'PL')
+    assert queue.throughput() == {'reviews': 2, 'per_hour': 2.0, 'reviewers': 2}
+
+    expired = WorkQueue(store, lease_seconds=0)
+    assert expired.claim('carol', 'B003', 'PL')['owner'] == 'carol'
+    assert expired.claim('dave', 'B003', 'PL')['owner'] == 'dave'
+    store.stop()
+
+def test_concurrent_sessions_never_share_an_item(tmp_path):
+    """Test that simultaneous claims from many sessions hand out each item once."""
+    store = ReviewStore(str(tmp_path / 'reviews.db'))
+    queue = WorkQueue(store)
+    index = catalog_index()
+    leases = []
+    threads = [threading.Thread(target=lambda n=n: leases.append(queue.next(f'session-{n}', index)))
+               for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    claimed = [(lease['batch'], lease['doc_type']) for lease in leases if lease]
+    assert sorted(claimed) == sorted(queue_order(index))
+    assert leases.count(None) == 2
+    store.stop()
+
+def test_orders_and_snapshots_are_cached_per_catalog(tmp_path, monkeypatch):
+    """Test that peeks are reused until an item is handed out and orders go with their catalog."""
+    store = ReviewStore(str(tmp_path / 'reviews.db'))
+    queue = WorkQueue(store)
+    index = catalog_index()
+    reads = []
+    statuses = store.statuses
+    monkeypatch.setattr(store, 'statuses', lambda: reads.append(1) or statuses())
+
+    assert queue.peek(index) == queue.peek(index) == ('B001', 'CI')
+    assert len(reads) == 1
+    queue.next('alice', index)
+    assert queue.peek(index) == ('B001', 'PL')
+    assert queue.throughput() is queue.throughput()
+
+    del index
+    gc.collect()
+    assert len(queue._orders) == 0
+    store.stop()
+
+def test_hold_writes_only_when_the_lease_needs_it(tmp_path, monkeypatch):
+    """Test that a held lease is reused until it nears expiry or the item changes."""
+    store = ReviewStore(str(tmp_path / 'reviews.db'))
+    queue = WorkQueue(store)
+    claims = []
+    claim = queue.claim
+    monkeypatch.setattr(queue, 'claim', lambda *args: claims.append(args) or claim(*args))
+
+    lease = queue.hold('alice', 'B001', 'CI')
+    assert queue.hold('alice', 'B001', 'CI', lease) is lease
+    lease = queue.hold('alice', 'B002', 'CI', lease)
+    assert len(claims) == 2
+
+    lease['expires_at'] = time.time() + RENEW_BEFORE_SECONDS - 1
+    assert queue.hold('alice', 'B002', 'CI', lease)['expires_at'] > lease['expires_at']
+    # Another session's lease is checked again only after a while
+    other = queue.hold('bob', 'B002', 'CI')
+    assert other['owner'] == 'alice'
+    assert queue.hold('bob', 'B002', 'CI', other) is other
+    other['checked_at'] -= RECHECK_SECONDS
+    queue.release('alice')
+    assert queue.hold('bob', 'B002', 'CI', other)['owner'] == 'bob'
+    assert len(claims) == 5
+    store.stop()